@@ -0,0 +1,81 @@
+"""add view_trend_rollups table
+
+Revision ID: 076de7f5cb55
+Revises: b39015c06c8c
+Create Date: 2026-10-18 09:12:40.318504
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "076de7f5cb55"
+down_revision = "b39015c06c8c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "view_trend_rollups",
+        sa.Column(
+            "window_days",
+            sa.SmallInteger(),
+            nullable=False,
+            comment="window of the last 1 to 90 days, today included",
+        ),
+        sa.Column(
+            "company_id",
+            sa.BigInteger(),
+            nullable=False,
+            comment="company id, reference table companies",
+        ),
+        sa.Column(
+            "symbol",
+            sa.String(10),
+            nullable=False,
+            comment="symbol of each view",
+        ),
+        sa.Column(
+            "count",
+            sa.BigInteger(),
+            nullable=False,
+            server_default="0",
+            comment="views of the company within the window",
+        ),
+        sa.Column(
+            "as_of",
+            sa.Date(),
+            nullable=False,
+            comment="day of the last full rebuild",
+        ),
+        sa.PrimaryKeyConstraint("window_days", "company_id"),
+        sa.ForeignKeyConstraint(
+            ["company_id"],
+            ["companies.id"],
+            name="fk_vtr_companies_id",
+        ),
+    )
+    op.create_index(
+        "ix_vtr_window_count",
+        "view_trend_rollups",
+        ["window_days", "count"],
+    )
+    op.execute(
+        """
+        INSERT INTO view_trend_rollups (window_days, company_id, symbol, count, as_of)
+        SELECT w.days, s.company_id, max(s.symbol), sum(s.count), current_date
+        FROM view_daily_stats AS s
+        JOIN generate_series(1, 90) AS w(days)
+            ON s.created_at > current_date - w.days
+        WHERE s.created_at > current_date - 90
+        GROUP BY w.days, s.company_id
+        """
+    )
+
+
+def downgrade():
+    op.drop_index("ix_vtr_window_count", table_name="view_trend_rollups")
+    op.drop_table("view_trend_rollups")
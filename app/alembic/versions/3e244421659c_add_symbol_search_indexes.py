@@ -0,0 +1,48 @@
+"""add symbol search indexes on companies
+
+Revision ID: 3e244421659c
+Revises: 076de7f5cb55
+Create Date: 2026-10-18 11:03:27.514980
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3e244421659c"
+down_revision = "076de7f5cb55"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # case-insensitive prefix match: upper(symbol) LIKE 'AA%'
+    op.create_index(
+        "ix_companies_symbol_pattern",
+        "companies",
+        [sa.text("upper(symbol) text_pattern_ops")],
+    )
+    # company name ILIKE matches, pg_trgm ships with the contrib modules
+    has_trgm = (
+        op.get_bind()
+        .execute(
+            sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        )
+        .scalar()
+    )
+    if has_trgm:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index(
+            "ix_companies_name_trgm",
+            "companies",
+            ["company_name"],
+            postgresql_using="gin",
+            postgresql_ops={"company_name": "gin_trgm_ops"},
+        )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_companies_name_trgm")
+    op.drop_index("ix_companies_symbol_pattern", table_name="companies")
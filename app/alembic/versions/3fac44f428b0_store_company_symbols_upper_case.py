@@ -0,0 +1,145 @@
+"""store company symbols upper-case
+
+Revision ID: 3fac44f428b0
+Revises: 51be45729f6d
+Create Date: 2026-10-18 17:40:12.663083
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "3fac44f428b0"
+down_revision = "51be45729f6d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # of companies whose symbols differ only in case, the upper-case row
+    # stays, or the oldest one, upper-cased, when there is none
+    op.execute(
+        """
+        UPDATE companies SET symbol = upper(symbol)
+        WHERE id IN (
+            SELECT min(id) FROM companies
+            GROUP BY upper(symbol)
+            HAVING bool_and(symbol <> upper(symbol))
+        )
+        """
+    )
+    # every other spelling is merged into it
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE company_merges AS
+        SELECT c.id AS old_id, o.id AS new_id, o.symbol
+        FROM companies AS c
+        JOIN companies AS o ON o.symbol = upper(c.symbol)
+        WHERE c.symbol <> upper(c.symbol)
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO view_daily_stats (symbol, company_id, created_at, count)
+        SELECT m.symbol, m.new_id, s.created_at, sum(s.count)
+        FROM view_daily_stats AS s
+        JOIN company_merges AS m ON s.company_id = m.old_id
+        GROUP BY m.symbol, m.new_id, s.created_at
+        ON CONFLICT ON CONSTRAINT uniq_vds_created_company
+        DO UPDATE SET count = view_daily_stats.count + excluded.count
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM view_daily_stats AS s USING company_merges AS m
+        WHERE s.company_id = m.old_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE view_daily_stats SET symbol = upper(symbol)
+        WHERE symbol <> upper(symbol)
+        """
+    )
+    # one address profile per address and merged company, its own first
+    op.execute(
+        """
+        DELETE FROM address_profiles WHERE id IN (
+            SELECT id FROM (
+                SELECT a.id, row_number() OVER (
+                    PARTITION BY a.address_id, coalesce(m.new_id, a.profile_id)
+                    ORDER BY m.old_id IS NOT NULL, a.id
+                ) AS n
+                FROM address_profiles AS a
+                LEFT JOIN company_merges AS m ON a.profile_id = m.old_id
+            ) AS ranked
+            WHERE n > 1
+        )
+        """
+    )
+    op.execute(
+        """
+        UPDATE address_profiles AS a SET profile_id = m.new_id
+        FROM company_merges AS m WHERE a.profile_id = m.old_id
+        """
+    )
+    # view counts are unique by symbol, the views of every spelling are
+    # added up in the upper-case row
+    op.execute(
+        """
+        UPDATE view_counts SET symbol = upper(symbol)
+        WHERE id IN (
+            SELECT min(id) FROM view_counts
+            GROUP BY upper(symbol)
+            HAVING bool_and(symbol <> upper(symbol))
+        )
+        """
+    )
+    op.execute(
+        """
+        UPDATE view_counts AS v
+        SET count = v.count + d.count, updated_at = greatest(v.updated_at, d.updated_at)
+        FROM (
+            SELECT upper(symbol) AS symbol, sum(count) AS count,
+                max(updated_at) AS updated_at
+            FROM view_counts WHERE symbol <> upper(symbol)
+            GROUP BY upper(symbol)
+        ) AS d
+        WHERE v.symbol = d.symbol
+        """
+    )
+    op.execute("DELETE FROM view_counts WHERE symbol <> upper(symbol)")
+    op.execute(
+        """
+        UPDATE view_counts AS v SET company_id = m.new_id
+        FROM company_merges AS m WHERE v.company_id = m.old_id
+        """
+    )
+    # rollups of the merged companies are rebuilt from the daily stats
+    op.execute("DELETE FROM view_trend_rollups")
+    op.execute(
+        """
+        INSERT INTO view_trend_rollups (window_days, company_id, symbol, count, as_of)
+        SELECT w.days, s.company_id, max(s.symbol), sum(s.count), current_date
+        FROM view_daily_stats AS s
+        JOIN generate_series(1, 90) AS w(days)
+            ON s.created_at > current_date - w.days
+        WHERE s.created_at > current_date - 90
+        GROUP BY w.days, s.company_id
+        """
+    )
+    op.execute(
+        "DELETE FROM companies AS c USING company_merges AS m WHERE c.id = m.old_id"
+    )
+    op.execute("DROP TABLE company_merges")
+    # checked in the same transaction as the merge, companies stays locked
+    # against writes until the migration commits
+    op.create_check_constraint(
+        "ck_companies_symbol_upper", "companies", "symbol = upper(symbol)"
+    )
+
+
+def downgrade():
+    # merged companies are not split again
+    op.drop_constraint("ck_companies_symbol_upper", table_name="companies")
@@ -0,0 +1,95 @@
+"""add case-insensitive unique cities and addresses
+
+Revision ID: 51be45729f6d
+Revises: 3e244421659c
+Create Date: 2026-10-18 14:21:05.902731
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "51be45729f6d"
+down_revision = "3e244421659c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # merge cities, then addresses, that only differ in case, keeping
+    # the oldest row
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE city_keep ON COMMIT DROP AS
+        SELECT id, min(id) OVER (PARTITION BY state_id, lower(name)) AS keep
+        FROM cities
+        """
+    )
+    op.execute(
+        """
+        UPDATE addresses AS a SET city_id = k.keep
+        FROM city_keep AS k
+        WHERE a.city_id = k.id AND k.id <> k.keep
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM cities AS c
+        USING city_keep AS k
+        WHERE c.id = k.id AND k.id <> k.keep
+        """
+    )
+    op.execute(
+        """
+        CREATE UNIQUE INDEX uniq_city_state_lower_name
+        ON cities (state_id, lower(name))
+        """
+    )
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE address_keep ON COMMIT DROP AS
+        SELECT id, min(id) OVER (
+            PARTITION BY city_id, lower(address), lower(coalesce(zip, ''))
+        ) AS keep
+        FROM addresses
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM address_profiles AS ap
+        USING (
+            SELECT ap.id, row_number() OVER (
+                PARTITION BY k.keep, ap.profile_id ORDER BY ap.id
+            ) AS n
+            FROM address_profiles AS ap
+            JOIN address_keep AS k ON k.id = ap.address_id
+        ) AS dup
+        WHERE ap.id = dup.id AND dup.n > 1
+        """
+    )
+    op.execute(
+        """
+        UPDATE address_profiles AS ap SET address_id = k.keep
+        FROM address_keep AS k
+        WHERE ap.address_id = k.id AND k.id <> k.keep
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM addresses AS a
+        USING address_keep AS k
+        WHERE a.id = k.id AND k.id <> k.keep
+        """
+    )
+    op.execute(
+        """
+        CREATE UNIQUE INDEX uniq_addr_city_address_zip
+        ON addresses (city_id, lower(address), lower(coalesce(zip, '')))
+        """
+    )
+
+
+def downgrade():
+    op.drop_index("uniq_addr_city_address_zip", table_name="addresses")
+    op.drop_index("uniq_city_state_lower_name", table_name="cities")
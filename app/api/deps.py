@@ -1,15 +1,16 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 from typing import Annotated
 
-from fastapi import Depends, HTTPException, Path, Query, Request, status
+from fastapi import Depends, Header, HTTPException, Path, Query, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
 from pydantic import ValidationError
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
 from app.core.log_config import ip_logger
-from app.core.db import engine
+from app.core.db import async_engine, engine
 from app.models.common import StatementInterval
 from app.models.relationships import User
 from app.models.user import Token
@@ -25,7 +26,13 @@ def get_db() -> Generator[Session, None, None]:
         yield session
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
 SessionDep = Annotated[Session, Depends(get_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
@@ -86,3 +93,6 @@ StmtIntervalDep = Annotated[
     StatementInterval,
     Query(..., title="interval of statement"),
 ]
+
+# etags the client holds, answered with 304 when one is current
+IfNoneMatchDep = Annotated[str | None, Header()]
@@ -1,23 +1,40 @@
 # import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Any, Annotated
 
-from fastapi import APIRouter, BackgroundTasks, Query, Request, Depends
-import pandas as pd
-from sqlmodel import col, func, select
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    Header,
+    Query,
+    Request,
+    Response,
+)
 
-from app.api.deps import SessionDep, StmtIntervalDep, SymbolDep, logging_deps
+from app.api.deps import (
+    AsyncSessionDep,
+    IfNoneMatchDep,
+    SessionDep,
+    StmtIntervalDep,
+    SymbolDep,
+    logging_deps,
+)
 
 from app.core.config import settings
-from app.models.common import HistoryPeriod
-from app.models.history import History, PeriodData, StockBrief
-from app.models.keystats import KeyStat
+from app.core.executor import run_blocking
+from app.core.httpcache import CachedBody, cached_response
+from app.core.responses import NumpyJSONResponse
+from app.models.common import StatementInterval
+from app.models.history import History
+from app.models.keystats import KeyStat, KeyStatBatch
 from app.models.pathview import PathViewPublic, ViewDailyStatTrendList
-from app.models.relationships import Company, View, ViewDailyStat
+from app.models.relationships import Company
 from app.models.stock import (
     BalanceSheet,
     CashCapital,
     CashFlow,
+    FundamentalsReport,
     GrossProfit,
     IncomeStmt,
     NetIncome,
@@ -25,21 +42,38 @@ from app.models.stock import (
 )
 
 from app.services.auth.auth_bearer import JWTBearer
+from app.services import historybin
+from app.services.fundamentals import fundamentals_body, parse_fields
+from app.services.historycache import (
+    daily_history_payload,
+    pack_payloads,
+    parse_periods,
+    period_payloads,
+)
 from app.services.company import (
     load_company_profile,
     fetch_company_profile,
 )
-from app.services.stock import get_symbol_list
+from app.services.ranking import ranking_backend, ticker_rank_async
+from app.services.stock import get_symbol_list_async
+from app.services.symbolindex import symbol_index
+from app.services.upstream import fetch_upstream, key_stat, statement_body
 
-from app.services.yfdata import YFinFetch
-from app.tasks.views import update_view_counts, update_view_stats
+from app.services.yfbatch import YFinBatchFetch, parse_symbols
+from app.tasks.views import view_buffer
 
 router = APIRouter()
 
+# documents the conditional answer of the cached routes
+CACHED_RESPONSES: dict[int | str, dict[str, Any]] = {
+    304: {"description": "not modified since the etag in If-None-Match"}
+}
+
 
 @router.get(
     "/symbol/{symbol}",
     response_model=Company,
+    responses=CACHED_RESPONSES,
 )
 async def get_stock_by_symbol(
     *,
@@ -47,6 +81,7 @@ async def get_stock_by_symbol(
     session: SessionDep,
     background_tasks: BackgroundTasks,
     symbol: SymbolDep,
+    if_none_match: IfNoneMatchDep = None,
 ) -> Any:
     """
     Get stock by ticker.
@@ -76,20 +111,11 @@ async def get_stock_by_symbol(
             industry=resp.get("industry"),
             sector=resp.get("sector"),
         )
-    # update task as background task, add view count + 1
-    background_tasks.add_task(
-        update_view_counts,
-        path=request.url.path,
-        symbol=symbol,
-        session=session,
-    )
-    background_tasks.add_task(
-        update_view_stats,
-        symbol=symbol,
-        session=session,
-        company=company,
-    )
-    return company
+    # view count + 1, written to the database by the periodic flush
+    view_buffer.add(symbol=symbol, path=request.url.path, company_id=company.id)
+    body = CachedBody.of(company.model_dump_json().encode())
+    # revalidated on every visit, a response served from cache is not counted
+    return cached_response(body, if_none_match, revalidate=True)
 
 
 @router.get(
@@ -100,30 +126,15 @@ async def get_stock_by_symbol(
 )
 async def get_ticker_rank(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     limit: Annotated[
         int, Query(title="set number of tickers to fetch", ge=1, le=15)
     ] = 6,
 ) -> Any:
-    statement = (
-        select(View)
-        .order_by(
-            View.count.desc(),  # type: ignore
-        )
-        .limit(limit)
+    return Response(
+        content=await ticker_rank_async(session, limit),
+        media_type="application/json",
     )
-    tickers = session.exec(statement).all()
-    resp: list[PathViewPublic] = []
-    for ticker in tickers:
-        if ticker.company:
-            resp.append(
-                PathViewPublic(
-                    **(ticker.model_dump()),
-                    image=ticker.company.image,
-                )
-            )
-
-    return resp
 
 
 @router.get(
@@ -134,7 +145,7 @@ async def get_ticker_rank(
 )
 async def get_ticker_trend(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     ticker_limit: Annotated[
         int,
         Query(
@@ -152,21 +163,9 @@ async def get_ticker_trend(
         ),
     ] = 6,
 ) -> Any:
-    days_ago = datetime.now() - timedelta(days=day_limit)
-    statement = (
-        select(
-            col(ViewDailyStat.company_id),
-            func.sum(col(ViewDailyStat.count)).label("count"),
-            col(ViewDailyStat.symbol),
-        )
-        .where(ViewDailyStat.created_at >= days_ago)
-        .group_by(col(ViewDailyStat.company_id), col(ViewDailyStat.symbol))
-        .order_by(
-            func.sum(col(ViewDailyStat.count)).desc(),
-        )
-        .limit(ticker_limit)
+    tickers = await ranking_backend.trend_async(
+        session, days=day_limit, limit=ticker_limit
     )
-    tickers = session.exec(statement).all()
 
     return ViewDailyStatTrendList(
         data=tickers,
@@ -175,43 +174,86 @@ async def get_ticker_trend(
     )
 
 
+@router.get(
+    "/keystat",
+    response_model=KeyStatBatch,
+    summary="key stats of several symbols",
+    description="symbols separated by comma, failed symbols are listed in errors",
+)
+async def get_batch_key_stats(
+    *,
+    symbols: Annotated[
+        str,
+        Query(title="symbols separated by comma", min_length=1),
+    ],
+) -> Any:
+    valid, errors = parse_symbols(symbols)
+    batch = YFinBatchFetch(symbols=valid)
+    result = await run_blocking(batch.get_key_stats)
+    result.errors.update(errors)
+
+    return result
+
+
 @router.get(
     "/keystat/{symbol}",
     response_model=KeyStat,
     # dependencies=[Depends(logging_deps)],
 )
-async def get_key_stats(*, symbol: SymbolDep) -> Any:
-    key_stat = YFinFetch(symbol=symbol)
-
-    return KeyStat(
-        growth=key_stat.get_growth(),
-        profit=key_stat.get_profit(),
+async def get_key_stats(
+    *,
+    symbol: SymbolDep,
+    series: Annotated[bool, Query(title="include per-period ratio series")] = False,
+) -> Any:
+    return await key_stat(symbol, series=series)
+
+
+AcceptDep = Annotated[str | None, Header()]
+# documents the binary alternative of the history routes
+HISTORY_RESPONSES: dict[int | str, dict[str, Any]] = {
+    200: {
+        "content": {historybin.MEDIA_TYPE: {}},
+        "description": "json, or the compact binary format when the Accept "
+        f"header prefers {historybin.MEDIA_TYPE}",
+    }
+}
+
+
+def history_response(payload: bytes, binary: bool) -> Response:
+    headers = {"Vary": "Accept"}
+    if binary:
+        # float32 arrays barely compress, an explicit content-encoding
+        # makes GZipMiddleware pass the payload through untouched
+        headers["Content-Encoding"] = "identity"
+    return Response(
+        content=payload,
+        media_type=historybin.MEDIA_TYPE if binary else "application/json",
+        headers=headers,
     )
 
 
 @router.get(
     "/daily_history/{symbol}",
     response_model=History,
+    response_class=NumpyJSONResponse,
+    responses=HISTORY_RESPONSES,
     summary="one day history data",
     description="history data in one day, with 1hour interval",
 )
-async def get_symbol_daily_history(*, symbol: SymbolDep) -> Any:
-    fin_api = YFinFetch(symbol=symbol)
-    period: HistoryPeriod = HistoryPeriod.ONE_DAY
-
-    hist_data_d: pd.DataFrame = fin_api.get_history(
-        period=period,
-        interval="1h",
-    )
-    result = fin_api.get_history_data(
-        hist_data=hist_data_d,
-        period=period,
+async def get_symbol_daily_history(
+    *, symbol: SymbolDep, accept: AcceptDep = None
+) -> Any:
+    binary = historybin.accepts_binary(accept)
+    payload = await fetch_upstream(
+        symbol,
+        "daily_history",
+        ("1h", binary),
+        daily_history_payload,
+        symbol,
+        binary,
     )
 
-    return History(
-        brief=StockBrief(name=symbol),
-        data={period.name: result},
-    )
+    return history_response(payload, binary)
 
 
 # @router.get(
@@ -248,119 +290,171 @@ async def get_symbol_daily_history(*, symbol: SymbolDep) -> Any:
 @router.get(
     "/history/{symbol}",
     response_model=History,
+    response_class=NumpyJSONResponse,
+    responses=HISTORY_RESPONSES,
     summary="history data",
     description="history data in periods, with 1day interval",
 )
-async def get_symbol_history(*, symbol: SymbolDep) -> Any:
-    fin_api = YFinFetch(symbol=symbol)
-    periods = [
-        # HistoryPeriod.ONE_DAY,
-        HistoryPeriod.ONE_MONTH,
-        HistoryPeriod.ONE_YEAR,
-        HistoryPeriod.FIVE_YEAR,
-        HistoryPeriod.TEN_YEAR,
-        HistoryPeriod.YEAR_TO_DAY,
-        HistoryPeriod.MAX,
-    ]
-    hist_data: pd.DataFrame = fin_api.get_history()
-    results: dict[str, PeriodData] = {}
-    for period in periods:
-        results[period.name] = fin_api.get_history_data(
-            hist_data=hist_data,
-            period=period,
-        )
-
-    return History(
-        brief=StockBrief(name=symbol),
-        data=results,
+async def get_symbol_history(
+    *,
+    symbol: SymbolDep,
+    periods: Annotated[
+        str | None,
+        Query(
+            title="periods to return",
+            description="comma separated period names or labels, "
+            "such as ONE_YEAR,max; all periods when omitted",
+        ),
+    ] = None,
+    accept: AcceptDep = None,
+) -> Any:
+    binary = historybin.accepts_binary(accept)
+    requested = parse_periods(periods)
+    # history_cache keeps the payloads, the flight only coalesces misses
+    payloads = await fetch_upstream(
+        symbol, "history", ("1d", binary), period_payloads, symbol, binary, ttl=0
     )
+    payload = pack_payloads(symbol, payloads, requested, binary)
+
+    return history_response(payload, binary)
 
 
 @router.get("/stock/symbol/{search}", response_model=SymbolSearchList)
 async def get_symbol_search(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     search: SymbolDep,
     limit: Annotated[
         int, Query(title="set number of tickers to fetch", ge=1, le=20)
     ] = 8,
 ) -> Any:
-    results = get_symbol_list(session=session, search=search, limit=limit)
+    # the sql search answers until the index is loaded
+    if symbol_index.loaded:
+        return SymbolSearchList(data=symbol_index.search(search, limit))
+    results = await get_symbol_list_async(session=session, search=search, limit=limit)
 
     return results
 
 
-@router.get("/inc-stmt/{symbol}", response_model=IncomeStmt)
+@router.get(
+    "/inc-stmt/{symbol}",
+    response_model=IncomeStmt,
+    responses=CACHED_RESPONSES,
+)
 async def get_income_stmt(
     *,
     symbol: SymbolDep,
     interval: StmtIntervalDep,
+    if_none_match: IfNoneMatchDep = None,
 ) -> Any:
-    fin_api = YFinFetch(symbol=symbol)
-    data = fin_api.get_income_stmt_report(interval=interval)
-    return data
+    body = await statement_body(symbol, "income_stmt", interval)
+    return cached_response(body, if_none_match)
 
 
-@router.get("/net-inc/{symbol}", response_model=NetIncome)
+@router.get(
+    "/net-inc/{symbol}",
+    response_model=NetIncome,
+    responses=CACHED_RESPONSES,
+)
 async def get_net_income(
     *,
     symbol: SymbolDep,
     interval: StmtIntervalDep,
+    if_none_match: IfNoneMatchDep = None,
 ) -> Any:
-    fin_api = YFinFetch(symbol=symbol)
-    data = fin_api.get_net_inc_report(interval=interval)
-    return data
+    body = await statement_body(symbol, "net_inc", interval)
+    return cached_response(body, if_none_match)
 
 
-@router.get("/cashflow/{symbol}", response_model=CashFlow)
+@router.get(
+    "/cashflow/{symbol}",
+    response_model=CashFlow,
+    responses=CACHED_RESPONSES,
+)
 async def get_cashflow(
     *,
     symbol: SymbolDep,
     interval: StmtIntervalDep,
+    if_none_match: IfNoneMatchDep = None,
 ) -> Any:
-    fin_api = YFinFetch(symbol=symbol)
-    data = fin_api.get_cashflow_report(interval=interval)
-    return data
+    body = await statement_body(symbol, "cashflow", interval)
+    return cached_response(body, if_none_match)
 
 
-@router.get("/gross-profit/{symbol}", response_model=GrossProfit)
+@router.get(
+    "/gross-profit/{symbol}",
+    response_model=GrossProfit,
+    responses=CACHED_RESPONSES,
+)
 async def get_gross_profit(
     *,
     symbol: SymbolDep,
     interval: StmtIntervalDep,
+    if_none_match: IfNoneMatchDep = None,
 ) -> Any:
+    body = await statement_body(symbol, "gross_profit", interval)
+    return cached_response(body, if_none_match)
 
-    fin_api = YFinFetch(symbol=symbol)
-    data = fin_api.get_gross_profit_report(interval=interval)
-    return data
 
-
-@router.get("/cash-capital/{symbol}", response_model=CashCapital)
+@router.get(
+    "/cash-capital/{symbol}",
+    response_model=CashCapital,
+    responses=CACHED_RESPONSES,
+)
 async def get_cash_capital(
     *,
     symbol: SymbolDep,
     interval: StmtIntervalDep,
+    if_none_match: IfNoneMatchDep = None,
 ) -> Any:
-
-    fin_api = YFinFetch(symbol=symbol)
-    data = fin_api.get_cash_capital_report(interval=interval)
-    return data
+    body = await statement_body(symbol, "cash_capital", interval)
+    return cached_response(body, if_none_match)
 
 
 @router.get(
     "/balancesheet/{symbol}",
     response_model=BalanceSheet,
+    responses=CACHED_RESPONSES,
     # dependencies=[Depends(JWTBearer())],
 )
 async def get_balancesheet(
     *,
     symbol: SymbolDep,
     interval: StmtIntervalDep,
+    if_none_match: IfNoneMatchDep = None,
 ) -> Any:
+    body = await statement_body(symbol, "balancesheet", interval)
+    return cached_response(body, if_none_match)
+
 
-    fin_api = YFinFetch(symbol=symbol)
-    data = fin_api.get_balancesheet_report(interval=interval)
-    return data
+@router.get(
+    "/fundamentals/{symbol}",
+    response_model=FundamentalsReport,
+    responses=CACHED_RESPONSES,
+    summary="every statement report in one response",
+    description="income, net income, gross profit, cashflow, cash capital "
+    "and balance sheet reports, built from one fetch of each statement",
+)
+async def get_fundamentals(
+    *,
+    symbol: SymbolDep,
+    interval: Annotated[
+        StatementInterval | None,
+        Query(title="interval of statements", description="both when omitted"),
+    ] = None,
+    fields: Annotated[
+        str | None,
+        Query(
+            title="reports or series to return",
+            description="comma separated reports or report series, such as "
+            "income_stmt,balancesheet.asset; all reports when omitted",
+        ),
+    ] = None,
+    if_none_match: IfNoneMatchDep = None,
+) -> Any:
+    intervals = [interval] if interval else list(StatementInterval)
+    body = await fundamentals_body(symbol, intervals, parse_fields(fields))
+    return cached_response(body, if_none_match)
 
 
 @router.get(
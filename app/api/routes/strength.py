@@ -1,9 +1,10 @@
 from typing import Any
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Response
 
-from app.mlmodels.utils.analysis import sector_strength
+from app.api.deps import get_current_active_superuser
 from app.models.strength import StrengthsPublic
+from app.services.strength import strength_snapshot
 
 router = APIRouter()
 
@@ -11,16 +12,26 @@ router = APIRouter()
 @router.get("/", response_model=StrengthsPublic)
 async def read_strengths() -> Any:
     """
-    Retrieve blogs.
+    Retrieve sector strengths, precomputed after market close.
     """
-
-    ticker_list = ["XLK", "XLY", "XLC", "XLE", "XLB", "XLP", "XLV", "XLI"]
-    period = "10mo"
-    # strong, weak = {}, {}
-
     try:
-        strong, weak = await sector_strength(ticker_list=ticker_list, period=period)
+        payload = await strength_snapshot.get()
     except Exception as e:
         print(e)
+        return StrengthsPublic()
+
+    return Response(content=payload, media_type="application/json")
+
+
+@router.post(
+    "/refresh",
+    response_model=StrengthsPublic,
+    dependencies=[Depends(get_current_active_superuser)],
+)
+async def refresh_strengths() -> Any:
+    """
+    Recompute the sector strengths snapshot now.
+    """
+    payload = await strength_snapshot.refresh()
 
-    return StrengthsPublic(strong=strong, weak=weak)
+    return Response(content=payload, media_type="application/json")
@@ -1,8 +1,16 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from pydantic.networks import EmailStr
 
 from app.api.deps import get_current_active_superuser
+from app.core.executor import blocking_executor
+from app.models.metrics import (
+    ExecutorStats,
+    SingleFlightStats,
+    UpstreamSessionStats,
+)
 from app.models.user import Message
+from app.services.upstream import upstream_flight
+from app.services.yfsession import yf_sessions
 from app.utils import generate_test_email, send_email
 
 router = APIRouter()
@@ -24,3 +32,53 @@ def test_email(email_to: EmailStr) -> Message:
         html_content=email_data.html_content,
     )
     return Message(message="Test email sent")
+
+
+@router.get(
+    "/upstream-stats/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=UpstreamSessionStats,
+)
+def upstream_stats() -> UpstreamSessionStats:
+    """
+    Cache and rate limiter counters of the yfinance session in this worker.
+    """
+    return yf_sessions.stats()
+
+
+@router.get(
+    "/executor-stats/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=ExecutorStats,
+)
+def executor_stats() -> ExecutorStats:
+    """
+    Time spent in the blocking executor of this worker.
+    """
+    return blocking_executor.stats()
+
+
+@router.get(
+    "/upstream-fetch-stats/",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=SingleFlightStats,
+)
+def upstream_fetch_stats() -> SingleFlightStats:
+    """
+    Coalesced and cached upstream fetches of this worker.
+    """
+    return upstream_flight.stats()
+
+
+@router.post(
+    "/purge-upstream-cache/",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def purge_upstream_cache(
+    tags: list[str] = Query(..., description="such as symbol:AAPL or dataset:cashflow"),
+) -> Message:
+    """
+    Drop the cached upstream fetches of this worker carrying any of the tags.
+    """
+    purged = upstream_flight.purge(*tags)
+    return Message(message=f"{purged} cached fetches purged")
@@ -0,0 +1,125 @@
+"""throughput of a sql-bound route with concurrent clients: a sync Session
+inside async def as the routes used to run, the same in the blocking
+executor, and an AsyncSession on the async engine
+
+every request runs the symbol search, plus pg_sleep to stand in for the
+network round trip of a remote database
+
+    python -m app.benchmarks.db_routes --clients 100 --requests 2000 --db-ms 2
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import engine_options
+from app.core.executor import run_blocking
+from app.services.stock import get_symbol_list, get_symbol_list_async
+
+
+def make_app(db_seconds: float) -> FastAPI:
+    url = str(settings.SQLALCHEMY_DATABASE_URI)
+    engine = create_engine(url, **engine_options())
+    async_engine = create_async_engine(url, **engine_options())
+    sleep = text("SELECT pg_sleep(:seconds)")
+    app = FastAPI()
+
+    def search() -> int:
+        with Session(engine) as session:
+            session.execute(sleep, {"seconds": db_seconds})
+            found = get_symbol_list(session=session, search="A", limit=8)
+        return len(found.data) if found else 0
+
+    @app.get("/sync")
+    async def sync_route() -> int:
+        # blocks the event loop for the whole query
+        return search()
+
+    @app.get("/executor")
+    async def executor_route() -> int:
+        return await run_blocking(search)
+
+    @app.get("/async")
+    async def async_route() -> int:
+        async with AsyncSession(async_engine) as session:
+            await session.execute(sleep, {"seconds": db_seconds})
+            found = await get_symbol_list_async(session=session, search="A", limit=8)
+        return len(found.data) if found else 0
+
+    @app.on_event("shutdown")
+    async def dispose() -> None:
+        engine.dispose()
+        await async_engine.dispose()
+
+    return app
+
+
+async def load(
+    client: httpx.AsyncClient, path: str, clients: int, requests: int
+) -> tuple[float, list[float]]:
+    latencies: list[float] = []
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        for _ in remaining:
+            start = time.perf_counter()
+            resp = await client.get(path)
+            resp.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return time.perf_counter() - start, latencies
+
+
+async def run(args: argparse.Namespace) -> None:
+    app = make_app(args.db_ms / 1000)
+    transport = httpx.ASGITransport(app=app)  # type: ignore[arg-type]
+    print(
+        f"{args.clients} clients, {args.requests} requests, "
+        f"{args.db_ms} ms in the database, pool "
+        f"{settings.DB_POOL_SIZE}+{settings.DB_MAX_OVERFLOW}"
+    )
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for name, path in [
+            ("sync session", "/sync"),
+            ("executor", "/executor"),
+            ("async session", "/async"),
+        ]:
+            # open the pool connections first
+            await load(client, path, args.clients, args.clients)
+            seconds, latencies = await load(client, path, args.clients, args.requests)
+            latencies.sort()
+            p99 = latencies[int(len(latencies) * 0.99) - 1]
+            print(
+                f"{name:>14}: {args.requests / seconds:8.0f} req/s, "
+                f"p50 {statistics.median(latencies) * 1000:7.1f} ms, "
+                f"p99 {p99 * 1000:7.1f} ms"
+            )
+    await app.router.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--db-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
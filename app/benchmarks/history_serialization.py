@@ -0,0 +1,142 @@
+"""compare the validated list path, the orjson numpy path and the compact
+binary format used to serialize /stocks/history responses, encode time
+and size, raw and after gzip as GZipMiddleware would apply it
+
+    python -m app.benchmarks.history_serialization --rows 10000 --repeat 20
+"""
+
+import argparse
+import gzip
+import json
+import time
+from collections.abc import Callable
+
+import numpy as np
+import pandas as pd
+
+from app.core.responses import NumpyJSONResponse
+from app.models.common import HistoryPeriod
+from app.models.history import History, PeriodData, StockBrief
+from app.services.historybin import encode_history
+from app.services.yfdata import _column, epoch_seconds, iso_dates, period_starts
+
+PERIODS = [
+    HistoryPeriod.ONE_MONTH,
+    HistoryPeriod.ONE_YEAR,
+    HistoryPeriod.FIVE_YEAR,
+    HistoryPeriod.TEN_YEAR,
+    HistoryPeriod.YEAR_TO_DAY,
+    HistoryPeriod.MAX,
+]
+
+
+def synthetic_history(rows: int) -> pd.DataFrame:
+    """business day OHLCV frame shaped like yfinance daily history"""
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range(end="2024-05-01", periods=rows, tz="America/New_York")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    return pd.DataFrame(
+        {
+            "Open": close * (1 + rng.normal(0, 0.002, rows)),
+            "High": close * 1.01,
+            "Low": close * 0.99,
+            "Close": close,
+            "Volume": rng.integers(1e6, 1e7, rows).astype(float),
+        },
+        index=index,
+    )
+
+
+def period_slices(
+    hist_data: pd.DataFrame,
+) -> list[tuple[HistoryPeriod, pd.DataFrame]]:
+    # sliced the way get_history_periods does
+    starts = period_starts(hist_data.index, PERIODS)
+    return [
+        (period, hist_data.iloc[start:])
+        for period, start in zip(PERIODS, starts, strict=True)
+    ]
+
+
+def list_path(hist_data: pd.DataFrame) -> bytes:
+    # python lists validated by PeriodData/History, then dumped the way
+    # FastAPI does for a response_model
+    data = {}
+    for period, hist_slice in period_slices(hist_data):
+        data[period.name] = PeriodData(
+            date=hist_slice.index.array,
+            start=hist_slice.loc[:, "Open"].to_list(),
+            close=hist_slice.loc[:, "Close"].to_list(),
+            high=hist_slice.loc[:, "High"].to_list(),
+            low=hist_slice.loc[:, "Low"].to_list(),
+            rev_idx=0.0,
+        )
+    history = History(brief=StockBrief(name="BENCH"), data=data)
+    return json.dumps(history.model_dump(mode="json")).encode()
+
+
+def _period_data(hist_data: pd.DataFrame, epoch: bool) -> dict[str, PeriodData]:
+    data = {}
+    for period, hist_slice in period_slices(hist_data):
+        data[period.name] = PeriodData.model_construct(
+            date=epoch_seconds(hist_slice.index)
+            if epoch
+            else iso_dates(hist_slice.index),
+            start=_column(hist_slice, "Open"),
+            close=_column(hist_slice, "Close"),
+            high=_column(hist_slice, "High"),
+            low=_column(hist_slice, "Low"),
+            rev_idx=0.0,
+        )
+    return data
+
+
+def numpy_path(hist_data: pd.DataFrame) -> bytes:
+    data = _period_data(hist_data, epoch=False)
+    history = History.model_construct(brief=StockBrief(name="BENCH"), data=data)
+    return NumpyJSONResponse(history).body
+
+
+def binary_path(hist_data: pd.DataFrame) -> bytes:
+    return encode_history("BENCH", _period_data(hist_data, epoch=True))
+
+
+def timeit(
+    func: Callable[[pd.DataFrame], bytes], hist_data: pd.DataFrame, repeat: int
+) -> tuple[float, bytes]:
+    body = func(hist_data)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(hist_data)
+    return (time.perf_counter() - start) / repeat, body
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    hist_data = synthetic_history(args.rows)
+    print(f"{args.rows} rows, {len(PERIODS)} periods, {args.repeat} runs")
+    paths = [
+        ("pydantic lists", list_path),
+        ("orjson numpy", numpy_path),
+        ("binary", binary_path),
+    ]
+    baseline = None
+    for name, func in paths:
+        seconds, body = timeit(func, hist_data, args.repeat)
+        baseline = baseline or seconds
+        start = time.perf_counter()
+        zipped = gzip.compress(body, compresslevel=9)
+        gzip_seconds = time.perf_counter() - start
+        print(
+            f"{name:>15}: {seconds * 1000:8.2f} ms/response "
+            f"x{baseline / seconds:<5.1f} {len(body) / 1024:8.1f} KiB, "
+            f"gzip {len(zipped) / 1024:7.1f} KiB in {gzip_seconds * 1000:6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
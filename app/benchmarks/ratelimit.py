@@ -0,0 +1,146 @@
+"""per-request overhead of the rate limit middleware, requests are sent
+straight into the ASGI apps, without a server or an http client
+
+an app answering "ok" alone, behind a no-op BaseHTTPMiddleware as the old
+limiter was built, and behind RateLimitMiddleware for anonymous clients
+spread over many ips, for one authenticated user, and on redis
+
+    python -m app.benchmarks.ratelimit --requests 20000 --clients 10000
+    python -m app.benchmarks.ratelimit --redis redis://localhost:6379/0
+"""
+
+import argparse
+import asyncio
+import time
+from collections.abc import Callable
+from datetime import timedelta
+from typing import Any
+
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middleware.ratelimit import (
+    MemoryRateLimitBackend,
+    RateLimiter,
+    RateLimitMiddleware,
+    RedisRateLimitBackend,
+    aioredis,
+)
+from app.models.relationships import User
+from app.services.auth.auth_jwt import JWTHandler
+
+# never reached, the benchmark measures the bookkeeping of allowed requests
+UNLIMITED = "1000000000/minute"
+
+
+async def ok_app(scope: Scope, receive: Receive, send: Send) -> None:  # noqa: ARG001
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+class NoopMiddleware(BaseHTTPMiddleware):
+    async def dispatch(
+        self, request: Request, call_next: RequestResponseEndpoint
+    ) -> Response:
+        return await call_next(request)
+
+
+def limited(backend: Any) -> ASGIApp:
+    limiter = RateLimiter(backend, default=UNLIMITED, user=UNLIMITED)
+    return RateLimitMiddleware(ok_app, limiter=limiter)
+
+
+def scopes(clients: int, authorization: str | None) -> Callable[[int], Scope]:
+    headers = [(b"host", b"bench")]
+    if authorization:
+        headers.append((b"authorization", authorization.encode()))
+
+    def scope(i: int) -> Scope:
+        return {
+            "type": "http",
+            "method": "GET",
+            "path": "/api/v1/stocks/keystat/AAPL",
+            "raw_path": b"/api/v1/stocks/keystat/AAPL",
+            "query_string": b"",
+            "root_path": "",
+            "scheme": "http",
+            "server": ("bench", 80),
+            "client": (f"10.0.{i % clients // 256}.{i % 256}", 50000),
+            "headers": headers,
+            "http_version": "1.1",
+        }
+
+    return scope
+
+
+def receiver() -> Receive:
+    received = False
+
+    async def receive() -> Message:
+        nonlocal received
+        if received:
+            # the client stays connected, response tasks listening for
+            # a disconnect are cancelled when the response is sent
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    return receive
+
+
+async def send(message: Message) -> None:
+    pass
+
+
+async def per_request(app: ASGIApp, scope: Callable[[int], Scope], n: int) -> float:
+    """microseconds per request"""
+    for i in range(min(n, 1000)):
+        await app(scope(i), receiver(), send)
+    start = time.perf_counter()
+    for i in range(n):
+        await app(scope(i), receiver(), send)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+async def run(args: argparse.Namespace) -> None:
+    user = User(id=1, email="bench@example.com", hashed_password="x")
+    token = JWTHandler.jwt_encode(user, expires_delta=timedelta(hours=1))
+    anonymous = scopes(args.clients, None)
+    authenticated = scopes(1, f"Bearer {token.access_token}")
+
+    cases: list[tuple[str, ASGIApp, Callable[[int], Scope]]] = [
+        ("bare app", ok_app, anonymous),
+        ("BaseHTTPMiddleware", NoopMiddleware(ok_app), anonymous),
+        ("memory, by ip", limited(MemoryRateLimitBackend()), anonymous),
+        ("memory, by user", limited(MemoryRateLimitBackend()), authenticated),
+    ]
+    if args.redis:
+        if aioredis is None:
+            raise RuntimeError("--redis needs the redis package")
+        client = aioredis.Redis.from_url(args.redis)
+        backend = RedisRateLimitBackend(client, prefix="bench")
+        cases.append(("redis, by ip", limited(backend), anonymous))
+
+    print(f"{args.requests} requests, {args.clients} client ips")
+    bare = 0.0
+    for name, app, scope in cases:
+        micros = await per_request(app, scope, args.requests)
+        bare = bare or micros
+        print(f"{name:>20}: {micros:8.1f} us/request, +{micros - bare:7.1f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--clients", type=int, default=10000)
+    parser.add_argument("--redis", help="redis url, also measures the redis backend")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -56,6 +56,14 @@ class Settings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str = ""
+    # connection pool of each engine, sync and async
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = True
+    # unit seconds, connections are replaced after this age
+    DB_POOL_RECYCLE: int = 30 * 60
+    # unit milliseconds, 0 leaves the server default
+    DB_STATEMENT_TIMEOUT_MS: int = 0
 
     @computed_field  # type: ignore[misc]
     @property
@@ -125,6 +133,89 @@ class Settings(BaseSettings):
     FINN_ENDPOINT: str | None = None
     FINN_KEY: str | None = None
 
+    # yfinance upstream session, shared by the whole worker process
+    YF_CACHE_PATH: str = "app/data/cache/yfinance.cache"
+    # sqlite file backing the rate limit bucket, shared across workers
+    YF_LIMITER_PATH: str | None = "app/data/cache/yfinance.limiter"
+    YF_RATE_LIMIT_REQUESTS: int = 10
+    # unit minutes
+    YF_RATE_LIMIT_MINUTES: int = 10
+    YF_POOL_SIZE: int = 10
+    # batch key stats, statement fetches running in parallel per batch
+    YF_BATCH_WORKERS: int = 4
+    YF_BATCH_MAX_SYMBOLS: int = 30
+    # local daily bar store, synced with upstream at most every n seconds
+    OHLCV_STORE_PATH: str = "app/data/ohlcv"
+    OHLCV_REFRESH_SECONDS: int = 15 * 60
+    # pre-serialized history periods per symbol and format
+    HISTORY_CACHE_TTL: int = 15 * 60
+    HISTORY_CACHE_MAXSIZE: int = 128
+    # statement, key stat, history and profile fetches, shared by
+    # concurrent requests and cached n seconds
+    UPSTREAM_CACHE_TTL: int = 5 * 60
+    UPSTREAM_CACHE_MAXSIZE: int = 1024
+    # early refresh of cached fetches, larger refreshes sooner, 0 is off
+    UPSTREAM_EARLY_REFRESH_BETA: float = 1.0
+    # serialized statements change at most quarterly, unit seconds
+    STATEMENT_CACHE_TTL: int = 6 * 60 * 60
+    # Cache-Control of statements and profiles, clients may reuse them for
+    # max-age seconds and a stale copy for further n seconds while they
+    # revalidate with If-None-Match
+    HTTP_CACHE_MAX_AGE: int = 60 * 60
+    HTTP_CACHE_STALE_SECONDS: int = 24 * 60 * 60
+
+    # thread pool for blocking upstream I/O and pandas work
+    EXECUTOR_MAX_WORKERS: int = 8
+    # unit seconds
+    EXECUTOR_TIMEOUT_SECONDS: float = 30
+
+    # sector strength snapshot age limit without the daily refresh, unit seconds
+    STRENGTH_CACHE_TTL: int = 15 * 60
+    # daily snapshot refresh after market close, New York time
+    STRENGTH_REFRESH_ENABLED: bool = True
+    STRENGTH_REFRESH_HOUR: int = 16
+    STRENGTH_REFRESH_MINUTE: int = 30
+
+    # buffered page views are written to the database every n seconds
+    VIEW_FLUSH_INTERVAL_SECONDS: float = 10
+    # view rank and trend, sql answers from the view tables, redis from
+    # sorted sets fed by the view flush (needs the redis extra)
+    RANKING_BACKEND: Literal["sql", "redis"] = "sql"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    RANKING_KEY_PREFIX: str = "views"
+    # redis sorted sets are rebuilt from the sql tables every n seconds
+    RANKING_RECONCILE_SECONDS: int = 60 * 60
+    # unit seconds
+    RANKING_TREND_CACHE_SECONDS: int = 60
+    # serialized /ticker_rank responses, also dropped on every view flush
+    RANK_CACHE_TTL: int = 30
+    # company rows by symbol, dropped when a profile is written
+    COMPANY_CACHE_TTL: int = 10 * 60
+    COMPANY_CACHE_MAXSIZE: int = 1024
+    # ids of countries, states and cities written by profile creation
+    ADDRESS_ID_CACHE_TTL: int = 24 * 60 * 60
+    ADDRESS_ID_CACHE_MAXSIZE: int = 4096
+    # symbol search trie, reloaded from companies and view_counts every
+    # n seconds to pick up rows written by other workers
+    SYMBOL_INDEX_RELOAD_SECONDS: int = 15 * 60
+
+    # per client request limits, counted in sliding windows in front of
+    # every route, limits are "<n>/<second|minute|hour|day>"
+    RATE_LIMIT_ENABLED: bool = False
+    # anonymous clients, by ip
+    RATE_LIMIT_DEFAULT: str = "120/minute"
+    # authenticated users, by the user id of their bearer token
+    RATE_LIMIT_USER: str = "600/minute"
+    # path prefix -> limit, counted apart from the default ones
+    RATE_LIMIT_ROUTES: dict[str, str] = {}
+    # user id -> limit, instead of RATE_LIMIT_USER
+    RATE_LIMIT_USERS: dict[str, str] = {}
+    # memory counts per worker, redis on REDIS_URL across all workers
+    # (needs the redis extra)
+    RATE_LIMIT_BACKEND: Literal["memory", "redis"] = "memory"
+    # most clients counted in memory, least recently seen are dropped
+    RATE_LIMIT_MAXSIZE: int = 100_000
+
     LOG_LEVEL: str | int = "INFO"
     LOG_PATH: str = "app/data/logs"
 
@@ -1,3 +1,6 @@
+from typing import Any
+
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import Session, create_engine, select
 
 from app.core.config import settings
@@ -5,7 +8,27 @@ from app.models.relationships import User
 from app.models.user import UserCreate
 from app.services.user import create_user
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+
+def engine_options() -> dict[str, Any]:
+    """pool and connection settings shared by the sync and async engines"""
+    options: dict[str, Any] = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+        }
+    return options
+
+
+engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), **engine_options())
+# psycopg in async mode, for routes on AsyncSessionDep
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI), **engine_options()
+)
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
@@ -0,0 +1,124 @@
+import asyncio
+import functools
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.models.metrics import ExecutorStats
+
+T = TypeVar("T")
+
+
+class BlockingExecutor:
+    """bounded thread pool for upstream I/O and pandas work,
+    keeps blocking calls off the event loop
+
+    at most max_workers calls run at a time, further callers wait on the
+    event loop; a call that exceeds its timeout answers 504, the worker
+    thread itself can not be interrupted and finishes in the background
+    """
+
+    def __init__(
+        self,
+        max_workers: int = settings.EXECUTOR_MAX_WORKERS,
+        timeout: float = settings.EXECUTOR_TIMEOUT_SECONDS,
+    ) -> None:
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._pool: ThreadPoolExecutor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self.busy_seconds = 0.0
+        self.max_seconds = 0.0
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="blocking",
+            )
+        return self._pool
+
+    def _timed(self, func: Callable[[], T]) -> T:
+        start = time.perf_counter()
+        try:
+            return func()
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.busy_seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+
+    async def run(
+        self,
+        func: Callable[..., T],
+        *args: Any,
+        timeout: float | None = None,
+        **kwargs: Any,
+    ) -> T:
+        """run func(*args, **kwargs) in the pool and await its result
+
+        Args:
+            func (Callable[..., T]): blocking callable
+            timeout (float | None): seconds, defaults to EXECUTOR_TIMEOUT_SECONDS
+
+        Returns:
+            T: result of func
+        """
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+            self._loop = loop
+        call = functools.partial(func, *args, **kwargs)
+        async with self._semaphore:
+            self.calls += 1
+            self.in_flight += 1
+            try:
+                return await asyncio.wait_for(
+                    loop.run_in_executor(self.pool, self._timed, call),
+                    timeout=timeout or self.timeout,
+                )
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise HTTPException(
+                    status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                    detail="upstream data took too long",
+                )
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self.in_flight -= 1
+
+    def stats(self) -> ExecutorStats:
+        return ExecutorStats(
+            max_workers=self.max_workers,
+            calls=self.calls,
+            errors=self.errors,
+            timeouts=self.timeouts,
+            in_flight=self.in_flight,
+            busy_seconds=round(self.busy_seconds, 3),
+            max_seconds=round(self.max_seconds, 3),
+        )
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+        self._semaphore = None
+        self._loop = None
+
+
+blocking_executor = BlockingExecutor()
+run_blocking = blocking_executor.run
@@ -0,0 +1,80 @@
+import hashlib
+from dataclasses import dataclass
+
+from fastapi import Response, status
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True, slots=True)
+class CachedBody:
+    """serialized response body and its content hash etag
+
+    the etag is weak, GZipMiddleware rewrites the bytes of large bodies
+    """
+
+    content: bytes
+    etag: str
+    media_type: str = "application/json"
+
+    @classmethod
+    def of(cls, content: bytes, media_type: str = "application/json") -> "CachedBody":
+        digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+        return cls(content=content, etag=f'W/"{digest}"', media_type=media_type)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """whether an If-None-Match header names etag
+
+    weak comparison, as If-None-Match asks for, with or without W/ on
+    either side
+    """
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def cache_control(
+    max_age: int = settings.HTTP_CACHE_MAX_AGE,
+    stale: int = settings.HTTP_CACHE_STALE_SECONDS,
+    revalidate: bool = False,
+) -> str:
+    if revalidate:
+        return "no-cache"
+    return f"public, max-age={max_age}, stale-while-revalidate={stale}"
+
+
+def cached_response(
+    body: CachedBody,
+    if_none_match: str | None,
+    max_age: int = settings.HTTP_CACHE_MAX_AGE,
+    stale: int = settings.HTTP_CACHE_STALE_SECONDS,
+    revalidate: bool = False,
+) -> Response:
+    """200 with body, or an empty 304 when the client holds its etag
+
+    Args:
+        body (CachedBody): current version of the resource
+        if_none_match (str | None): request header
+        max_age (int): seconds clients and proxies may reuse the response
+        stale (int): further seconds a stale response may be served while
+            it is revalidated in the background
+        revalidate (bool): no-cache instead, every use of a stored response
+            asks the handler, for handlers with side effects such as view
+            counting
+
+    Returns:
+        Response: with ETag and Cache-Control headers
+    """
+    headers = {
+        "ETag": body.etag,
+        "Cache-Control": cache_control(max_age, stale, revalidate),
+    }
+    if etag_matches(if_none_match, body.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body.content, media_type=body.media_type, headers=headers)
@@ -0,0 +1,33 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def orjson_default(obj: Any) -> Any:
+    # models built with model_construct are dumped field by field,
+    # numpy arrays inside them are left to orjson
+    if isinstance(obj, BaseModel):
+        return dict(obj)
+    raise TypeError
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(
+        content,
+        default=orjson_default,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+    )
+
+
+class NumpyJSONResponse(JSONResponse):
+    """json response rendered by orjson, numpy arrays are written straight
+    from their buffers instead of going through python floats
+
+    the content is not validated against the route's response_model,
+    NaN and inf are written as null
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
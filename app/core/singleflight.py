@@ -0,0 +1,163 @@
+import asyncio
+import math
+import random
+import time
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+from app.core.cache import TTLCache
+from app.models.metrics import SingleFlightStats
+
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
+class _Entry(Generic[T]):
+    value: T
+    # seconds the fetch took, and monotonic time the entry expires at
+    delta: float
+    expires_at: float
+    tags: frozenset[str] = frozenset()
+
+
+def _retrieve(task: asyncio.Task[Any]) -> None:
+    # a refresh nobody awaits must not log "exception was never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+class SingleFlight:
+    """one call per key at a time, concurrent callers of a key await the
+    same in-flight call, results are cached for ttl seconds
+
+    a cache hit refreshes the entry in the background with a probability
+    growing as it nears expiry and with how long it took to fetch
+    (XFetch), so entries written together do not expire together; the
+    caller is answered from the cache meanwhile. Results are tagged, such
+    as by symbol, to purge them when the data behind them changes
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024, beta: float = 1.0) -> None:
+        self.ttl = ttl
+        self.beta = beta
+        self._cache: TTLCache[Hashable, _Entry[Any]] = TTLCache(
+            ttl=ttl, maxsize=maxsize
+        )
+        self._flights: dict[Hashable, asyncio.Task[Any]] = {}
+        self.calls = 0
+        self.hits = 0
+        self.fetches = 0
+        self.coalesced = 0
+        self.early_refreshes = 0
+        self.errors = 0
+
+    def _expires_early(self, entry: _Entry[Any]) -> bool:
+        if self.beta <= 0:
+            return False
+        # -log of a uniform (0, 1] sample is exponentially distributed
+        gap = -entry.delta * self.beta * math.log(1.0 - random.random())
+        return time.monotonic() + gap >= entry.expires_at
+
+    async def _fetch(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[T]],
+        ttl: float,
+        tags: frozenset[str],
+    ) -> T:
+        start = time.monotonic()
+        try:
+            value = await func()
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self._flights.pop(key, None)
+        if ttl > 0:
+            now = time.monotonic()
+            entry = _Entry(value, now - start, now + ttl, tags)
+            self._cache.set(key, entry, ttl=ttl)
+        return value
+
+    def _flight(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[T]],
+        ttl: float,
+        tags: frozenset[str],
+    ) -> asyncio.Task[T]:
+        task = self._flights.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.create_task(self._fetch(key, func, ttl, tags))
+            task.add_done_callback(_retrieve)
+            self._flights[key] = task
+            self.fetches += 1
+        else:
+            self.coalesced += 1
+        return task
+
+    async def run(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[T]],
+        ttl: float | None = None,
+        tags: Iterable[str] = (),
+    ) -> T:
+        """result of func for key, shared with concurrent callers
+
+        Args:
+            key (Hashable): identifies the result
+            func (Callable[[], Awaitable[T]]): fetch, called once per flight,
+                errors are raised to every caller of the flight and not cached
+            ttl (float | None): seconds to cache the result, defaults to
+                the ttl of the instance, 0 only coalesces
+            tags (Iterable[str]): the cached result is dropped by purge
+                of any of them
+
+        Returns:
+            T: shared between callers, not to be modified
+        """
+        ttl = self.ttl if ttl is None else ttl
+        tagged = frozenset(tags)
+        self.calls += 1
+        entry = self._cache.get(key)
+        if entry is not None:
+            self.hits += 1
+            if key not in self._flights and self._expires_early(entry):
+                self.early_refreshes += 1
+                self._flight(key, func, ttl, tagged)
+            return entry.value  # type: ignore[no-any-return]
+        # a cancelled caller leaves the fetch running for the others
+        return await asyncio.shield(self._flight(key, func, ttl, tagged))
+
+    def forget(self, key: Hashable) -> None:
+        """drop the cached result of key"""
+        self._cache.pop(key)
+
+    def purge(self, *tags: str) -> int:
+        """drop the cached results tagged with any of tags
+
+        Returns:
+            int: results dropped
+        """
+        wanted = set(tags)
+        keys = [key for key, entry in self._cache.items() if entry.tags & wanted]
+        for key in keys:
+            self._cache.pop(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> SingleFlightStats:
+        return SingleFlightStats(
+            calls=self.calls,
+            hits=self.hits,
+            fetches=self.fetches,
+            coalesced=self.coalesced,
+            early_refreshes=self.early_refreshes,
+            errors=self.errors,
+            in_flight=len(self._flights),
+            cached=len(self._cache),
+        )
@@ -1,3 +1,7 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 import sentry_sdk
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
@@ -10,6 +14,14 @@ from fastapi.middleware.gzip import GZipMiddleware
 
 from app.api.main import api_router
 from app.core.config import settings
+from app.core.db import async_engine
+from app.core.executor import blocking_executor
+from app.core.log_config import ip_logger
+from app.middleware.ratelimit import RateLimitMiddleware, make_rate_limiter
+from app.services.strength import strength_refresher
+from app.services.yfsession import yf_sessions
+from app.tasks.company import symbol_indexer
+from app.tasks.views import flush_views, ranking_reconciler, view_flusher
 
 # dictConfig(LogConfig().dict())
 # logger = logging.getLogger("quant-logger")
@@ -22,14 +34,42 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:  # noqa: ARG001
+    tasks: list[asyncio.Task[None]] = [
+        asyncio.create_task(view_flusher()),
+        asyncio.create_task(symbol_indexer()),
+    ]
+    if settings.STRENGTH_REFRESH_ENABLED:
+        tasks.append(asyncio.create_task(strength_refresher()))
+    if settings.RANKING_BACKEND != "sql":
+        tasks.append(asyncio.create_task(ranking_reconciler()))
+    yield
+    for task in tasks:
+        task.cancel()
+    try:
+        flush_views()
+    except Exception as e:
+        ip_logger.error(f"Error flushing views: {e}")
+    blocking_executor.shutdown()
+    await async_engine.dispose()
+    yf_sessions.close()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
+    lifespan=lifespan,
 )
 
 domains = [str(origin).strip("/") for origin in settings.BACKEND_CORS_ORIGINS]
 
+# inside CORS, so that 429 answers carry the CORS headers too
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, limiter=make_rate_limiter())
+
 # Set all CORS enabled origins
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
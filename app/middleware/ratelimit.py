@@ -1,66 +1,249 @@
-from datetime import datetime, timedelta
-from fastapi import FastAPI, Request, Response
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Any
 
-from app.models.common import RequestResponseEndpoint
+from jose import JWTError, jwt
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
+from app.core.cache import TTLCache
+from app.core.config import settings
 
-class RateLimitingMiddleware(BaseHTTPMiddleware):
-    """_summary_
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # the redis extra is not installed
+    aioredis = None  # type: ignore
 
-    Args:
-        BaseHTTPMiddleware (_type_): _description_
+_UNITS = {"second": 1, "minute": 60, "hour": 60 * 60, "day": 24 * 60 * 60}
+_LIMIT = re.compile(r"^\s*(\d+)\s*/\s*(second|minute|hour|day)s?\s*$")
 
-    Returns:
-        _type_: _description_
+
+@dataclass(frozen=True, slots=True)
+class Limit:
+    requests: int
+    seconds: int
+
+    def __str__(self) -> str:
+        return f"{self.requests}/{self.seconds}s"
+
+
+def parse_limit(value: str) -> Limit:
+    """a limit such as '60/minute', units second, minute, hour or day"""
+    match = _LIMIT.match(value)
+    if match is None:
+        raise ValueError(f"invalid rate limit {value!r}, expected like 60/minute")
+    return Limit(requests=int(match[1]), seconds=_UNITS[match[2]])
+
+
+def _estimate(previous: int, current: int, fraction: float) -> float:
+    # the previous window counts in proportion to its overlap with the
+    # sliding window that ends now
+    return previous * (1.0 - fraction) + current
+
+
+def _retry_after(previous: int, current: int, fraction: float, limit: Limit) -> float:
+    """seconds until one more request fits into the sliding window"""
+    if current + 1 > limit.requests or previous == 0:
+        return (1.0 - fraction) * limit.seconds
+    needed = 1.0 - (limit.requests - 1 - current) / previous
+    return max(needed - fraction, 0.0) * limit.seconds
+
+
+class MemoryRateLimitBackend:
+    """sliding window counters of this worker process
+
+    each key holds its window number and the counts of that window and
+    the one before, entries expire after two windows and the least
+    recently used beyond maxsize are dropped
+    """
+
+    def __init__(self, maxsize: int = settings.RATE_LIMIT_MAXSIZE) -> None:
+        self._windows: TTLCache[str, tuple[int, int, int]] = TTLCache(
+            ttl=0, maxsize=maxsize
+        )
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    async def hit(self, key: str, limit: Limit, now: float) -> float:
+        """count a request of key
+
+        Returns:
+            float: 0 when allowed, otherwise seconds to wait
+        """
+        window, fraction = divmod(now / limit.seconds, 1.0)
+        state = self._windows.get(key)
+        previous = current = 0
+        if state is not None:
+            if state[0] == window:
+                _, previous, current = state
+            elif state[0] == window - 1:
+                previous = state[2]
+        if _estimate(previous, current, fraction) + 1 > limit.requests:
+            return _retry_after(previous, current, fraction, limit)
+        self._windows.set(
+            key, (int(window), previous, current + 1), ttl=2 * limit.seconds
+        )
+        return 0.0
+
+
+class RedisRateLimitBackend:
+    """sliding window counters shared by every worker on one redis, one
+    counter key per window, expiring after two windows
     """
 
-    # Rate limiting configurations
-    RATE_LIMIT_DURATION = timedelta(minutes=1)
-    RATE_LIMIT_REQUESTS = 3
+    def __init__(self, client: "aioredis.Redis", prefix: str = "ratelimit") -> None:
+        self.client = client
+        self.prefix = prefix
 
-    def __init__(self, app: FastAPI):
-        super().__init__(app)
-        # Dictionary to store request counts for each IP
-        self.request_counts: dict[str, tuple[int, datetime]]
+    async def hit(self, key: str, limit: Limit, now: float) -> float:
+        window, fraction = divmod(now / limit.seconds, 1.0)
+        current_key = f"{self.prefix}:{key}:{int(window)}"
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.incr(current_key)
+            pipe.expire(current_key, 2 * limit.seconds)
+            pipe.get(f"{self.prefix}:{key}:{int(window) - 1}")
+            current, _, previous = await pipe.execute()
+        previous = int(previous or 0)
+        # current includes this request
+        if _estimate(previous, current, fraction) > limit.requests:
+            await self.client.decr(current_key)
+            return _retry_after(previous, current - 1, fraction, limit)
+        return 0.0
 
-    async def dispatch(
+
+class RateLimiter:
+    """limits of a request by path prefix and client
+
+    clients are authenticated users by the user id of a valid bearer
+    token, or else client ips; a path prefix in routes has its own
+    counters and limit, other paths share the default limit of users or
+    of anonymous clients, limits of single user ids override the user one
+    """
+
+    def __init__(
         self,
-        request: Request,
-        call_next: RequestResponseEndpoint,
-    ) -> Response:
-        # Get the client's IP address
-        client_ip: str = request.client.host if request.client else "0.0.0.0"
-
-        # Check if IP is already present in request_counts
-        request_count, last_request = self.request_counts.get(
-            client_ip, (0, datetime.min)
+        backend: Any,
+        default: str = settings.RATE_LIMIT_DEFAULT,
+        user: str = settings.RATE_LIMIT_USER,
+        routes: dict[str, str] = settings.RATE_LIMIT_ROUTES,
+        users: dict[str, str] = settings.RATE_LIMIT_USERS,
+    ) -> None:
+        self.backend = backend
+        self.default = parse_limit(default)
+        self.user = parse_limit(user)
+        # longest prefix first
+        self.routes = sorted(
+            ((prefix, parse_limit(limit)) for prefix, limit in routes.items()),
+            key=lambda item: len(item[0]),
+            reverse=True,
         )
+        self.users = {user_id: parse_limit(limit) for user_id, limit in users.items()}
+        # bearer token -> user id, "" for tokens that do not verify
+        self._tokens: TTLCache[str, str] = TTLCache(ttl=60, maxsize=4096)
+        self.allowed = 0
+        self.limited = 0
+
+    def user_id(self, authorization: str | None) -> str | None:
+        """user id of a valid bearer token"""
+        if not authorization or not authorization.startswith("Bearer "):
+            return None
+        token = authorization[7:]
+        user_id = self._tokens.get(token)
+        if user_id is None:
+            try:
+                claims = jwt.decode(
+                    token, key=settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+                )
+                user_id = str(claims.get("user_id") or "")
+            except JWTError:
+                user_id = ""
+            self._tokens.set(token, user_id)
+        return user_id or None
+
+    def rule(self, path: str, user_id: str | None) -> tuple[str, Limit]:
+        """counter name and limit of a request"""
+        for prefix, limit in self.routes:
+            if path.startswith(prefix):
+                return prefix, limit
+        if user_id is not None:
+            return "user", self.users.get(user_id, self.user)
+        return "default", self.default
 
-        # Calculate the time elapsed since the last request
-        elapsed_time = datetime.now() - last_request
+    async def check(
+        self,
+        path: str,
+        client: str,
+        authorization: str | None = None,
+        now: float | None = None,
+    ) -> float:
+        """count a request
 
-        if elapsed_time > self.RATE_LIMIT_DURATION:
-            # If the elapsed time is greater than the rate limit duration,
-            # reset the count
-            request_count = 1
+        Args:
+            path (str): request path
+            client (str): client ip
+            authorization (str | None): Authorization header
+            now (float | None): unix time, defaults to the current time
+
+        Returns:
+            float: 0 when allowed, otherwise seconds to wait
+        """
+        user_id = self.user_id(authorization)
+        name, limit = self.rule(path, user_id)
+        identity = f"user:{user_id}" if user_id is not None else f"ip:{client}"
+        retry_after = await self.backend.hit(
+            f"{name}:{identity}", limit, time.time() if now is None else now
+        )
+        if retry_after:
+            self.limited += 1
         else:
-            if request_count >= self.RATE_LIMIT_REQUESTS:
-                # If the request count exceeds the rate limit,
-                # return a JSON response with an error message
-                return JSONResponse(
-                    status_code=429,
-                    content={
-                        "message": "Rate limit exceeded. \
-                             Please try again later."
-                    },
-                )
-            request_count += 1
+            self.allowed += 1
+        return retry_after
+
 
-        # Update the request count and last request timestamp for the IP
-        self.request_counts[client_ip] = (request_count, datetime.now())
+class RateLimitMiddleware:
+    """pure ASGI middleware answering 429 with Retry-After to clients over
+    their rate limit, before the request reaches the app
+    """
 
-        # Proceed with the request
-        response = await call_next(request)
-        return response
+    def __init__(self, app: ASGIApp, limiter: RateLimiter) -> None:
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        authorization = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                authorization = value.decode("latin-1")
+                break
+        client = scope.get("client")
+        retry_after = await self.limiter.check(
+            scope["path"], client[0] if client else "", authorization
+        )
+        if not retry_after:
+            await self.app(scope, receive, send)
+            return
+        response = JSONResponse(
+            status_code=429,
+            content={"detail": "Rate limit exceeded, please try again later"},
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+        await response(scope, receive, send)
+
+
+def make_rate_limiter() -> RateLimiter:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        if aioredis is None:
+            raise RuntimeError(
+                "RATE_LIMIT_BACKEND=redis needs the redis package, "
+                "install the redis extra"
+            )
+        return RateLimiter(
+            RedisRateLimitBackend(aioredis.Redis.from_url(settings.REDIS_URL))
+        )
+    return RateLimiter(MemoryRateLimitBackend())
@@ -3,6 +3,7 @@ from datetime import datetime
 import numpy as np
 import pandas as pd
 
+from app.core.executor import run_blocking
 from app.mlmodels.utils.yfsdk import get_close_return
 
 
@@ -18,6 +19,21 @@ async def sector_strength(
     :returns: tuple[dict[datetime, dict[str, float]], dict[datetime, dict[str, float]]]
     """
     closing_prices, returns = await get_close_return(ticker_list, period=period)
+
+    return await run_blocking(relative_strength, closing_prices, returns)
+
+
+def relative_strength(
+    closing_prices: pd.DataFrame, returns: pd.DataFrame
+) -> tuple[dict[datetime, dict[str, float]], dict[datetime, dict[str, float]]]:
+    """
+    strongest and weakest sectors relative to the equal weighted benchmark
+
+    :param closing_prices: pd.DataFrame, close prices, dates x tickers
+    :param returns: pd.DataFrame, daily returns, dates x tickers
+
+    :returns: tuple[dict[datetime, dict[str, float]], dict[datetime, dict[str, float]]]
+    """
     w = np.array([1/len(returns.columns)] * len(returns.columns))
     b = 1
 
@@ -1,6 +1,26 @@
 import pandas as pd
 import yfinance as yf  # type: ignore
 
+from app.core.executor import run_blocking
+from app.services.yfsession import yf_sessions
+
+
+def _get_closes(tickers_list: list[str], period: str) -> pd.DataFrame:
+    # one bulk request, yfinance downloads the tickers on parallel threads
+    data: pd.DataFrame = yf.download(
+        tickers_list,
+        period=period,
+        group_by="column",
+        auto_adjust=True,
+        progress=False,
+        threads=True,
+        session=yf_sessions.session,
+    )
+    if len(tickers_list) == 1:
+        return data[["Close"]].set_axis(tickers_list, axis=1)
+
+    return data["Close"].reindex(columns=tickers_list)
+
 
 async def get_close_return(
     tickers_list: list[str], period: str = "5mo"
@@ -13,14 +33,8 @@ async def get_close_return(
 
     :returns: tuple(close, returns
     """
-    # Fetching data for each ticker in tickers_list
-    dfs = [
-        yf.Ticker(ticker).history(period=period)["Close"].to_frame(name=ticker)
-        for ticker in tickers_list
-    ]
-
-    # Concatenating dataframes
-    closing_prices = pd.concat(dfs, axis=1)
+    # Fetching data for all tickers in tickers_list, off the event loop
+    closing_prices = await run_blocking(_get_closes, tickers_list, period)
 
     # Calculating daily returns
     returns = closing_prices.pct_change().dropna()
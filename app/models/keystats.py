@@ -1,3 +1,5 @@
+from typing import Any
+
 from sqlmodel import SQLModel
 
 
@@ -19,6 +21,29 @@ class Profitbility(SQLModel):
     return_on_capital_employed: float = 0.0
 
 
+class GrowthSeries(SQLModel):
+    date: list[Any]
+    rev_growth: list[float | None]
+    eps_growth: list[float | None]
+
+
+class ProfitbilitySeries(SQLModel):
+    date: list[Any]
+    gross_margin: list[float | None]
+    op_inc_margin: list[float | None]
+    profit_margin: list[float | None]
+    return_on_equity: list[float | None]
+    return_on_assets: list[float | None]
+    return_on_capital_employed: list[float | None]
+
+
 class KeyStat(SQLModel):
     growth: Growth
     profit: Profitbility
+    growth_series: GrowthSeries | None = None
+    profit_series: ProfitbilitySeries | None = None
+
+
+class KeyStatBatch(SQLModel):
+    data: dict[str, KeyStat]
+    errors: dict[str, str]
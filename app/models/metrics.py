@@ -0,0 +1,31 @@
+from sqlmodel import SQLModel
+
+
+class UpstreamSessionStats(SQLModel):
+    pid: int
+    requests: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+
+
+class ExecutorStats(SQLModel):
+    max_workers: int
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    in_flight: int = 0
+    busy_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+class SingleFlightStats(SQLModel):
+    calls: int = 0
+    hits: int = 0
+    fetches: int = 0
+    coalesced: int = 0
+    early_refreshes: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    cached: int = 0
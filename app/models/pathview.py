@@ -111,6 +111,12 @@ class ViewDailyStatCreate(ViewDailyStatBase):
     )
 
 
+class ViewTrendRollupBase(SQLModel):
+    window_days: int = Field(primary_key=True, title="days of the window")
+    symbol: str = Field(nullable=False, title="stock symbol")
+    count: int = Field(default=0, nullable=False)
+
+
 class ViewDailyStatTrend(SQLModel):
     company_id: int
     count: int
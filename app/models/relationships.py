@@ -1,13 +1,13 @@
 from datetime import date, datetime
 
-from sqlmodel import Field, Relationship, UniqueConstraint
+from sqlmodel import Field, Index, Relationship, UniqueConstraint
 
 # from sqlalchemy.orm import validates
 
 from app.models.blog import BlogBase
 from app.models.company import CompanyCreate
 from app.models.item import ItemBase
-from app.models.pathview import PathViewBase, ViewDailyStatBase
+from app.models.pathview import PathViewBase, ViewDailyStatBase, ViewTrendRollupBase
 from app.models.user import UserBase
 from app.models.address import (
     AddressBase,
@@ -177,3 +177,19 @@ class ViewDailyStat(ViewDailyStatBase, table=True):
         default_factory=lambda: date.today(),
     )
     count: int = Field(default=1, nullable=False)
+
+
+class ViewTrendRollup(ViewTrendRollupBase, table=True):
+    """views of a company over the last window_days days, today included,
+    for every window of 1 to 90 days
+
+    every row carries the day of the last full rebuild in as_of
+    """
+
+    __tablename__ = "view_trend_rollups"
+    __table_args__ = (Index("ix_vtr_window_count", "window_days", "count"),)
+    company_id: int = Field(
+        primary_key=True,
+        foreign_key="companies.id",
+    )
+    as_of: date = Field(nullable=False)
@@ -6,6 +6,7 @@ from sqlmodel import SQLModel
 class SymbolSearch(SQLModel):
     symbol: str
     count: int
+    company_name: str | None = None
 
 
 class SymbolSearchList(SQLModel):
@@ -42,3 +43,20 @@ class CashCapital(StmtDateBase):
 class BalanceSheet(StmtDateBase):
     asset: list[float]
     liability: list[float]
+
+
+class Fundamentals(SQLModel):
+    """statement reports of one interval, by report name"""
+
+    income_stmt: IncomeStmt | None = None
+    net_inc: NetIncome | None = None
+    gross_profit: GrossProfit | None = None
+    cashflow: CashFlow | None = None
+    cash_capital: CashCapital | None = None
+    balancesheet: BalanceSheet | None = None
+
+
+class FundamentalsReport(SQLModel):
+    symbol: str
+    yearly: Fundamentals | None = None
+    quarterly: Fundamentals | None = None
@@ -20,11 +20,13 @@ class StrengthsPublic(BaseModel):
     # weak: dict[str, dict[str, dict[str, float]]] | None = None
     strong: dict[datetime, dict[str, float]] | None = None
     weak: dict[datetime, dict[str, float]] | None = None
+    as_of: datetime | None = None
 
     model_config = {
         "json_schema_extra": {
             "examples": [
                 {
+                    "as_of": "2023-11-22T16:30:00-05:00",
                     "strong": {
                         "2023-11-20T00:00:00-05:00": {
                             "XLK": 1.0050949160676566,
@@ -1,158 +1,138 @@
-from sqlmodel import Session, col, select
+from typing import Any
 
+from sqlalchemy import literal_column
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlmodel import Session, col, func
+
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.models.relationships import Address, City, Country, State
 
+# state code of profiles without one
+UNKNOWN_STATE = "UNKOWN"
 
-def load_country(
-    *, session: Session, country_in: dict[str, str | int]
-) -> Country | None:
-    statement = select(Country).where(
-        col(Country.abbrev_2).ilike(country_in.get("country"))
-    )
-    return session.exec(statement).one_or_none()
-
-
-def create_country(
-    *,
-    session: Session,
-    country_in: dict[str, str | int],
-) -> Country:
-    country = load_country(session=session, country_in=country_in)
-    if not country:
-        country = Country.model_validate(
-            country_in,
-            update={
-                "name": None,
-                "abbrev_2": country_in.get("country"),
-            },
-        )
-        try:
-            session.add(country)
-            session.commit()
-            session.refresh(country)
-        except Exception as e:
-            session.rollback()
-            print("Error creating country:", e)
-
-    return country
-
-
-def load_state(
-    *,
-    session: Session,
-    state_in: dict[str, str | int],
-    country: Country,
-) -> State | None:
-    statement = select(State).where(
-        col(State.state_code).ilike(state_in.get("state")),
-        State.country_id == country.id,
-    )
-    return session.exec(statement).one_or_none()
-
-
-def create_state(
-    *,
-    session: Session,
-    state_in: dict[str, str | int],
-    country: Country,
-) -> State:
-    state = load_state(session=session, state_in=state_in, country=country)
-    if not state:
-        state_code = state_in.get("state") if state_in.get("state") else "UNKOWN"
-        state = State.model_validate(
-            state_in,
-            update={
-                "name": None,
-                "state_code": state_code,
-                "country_id": country.id,
-            },
-        )
-        try:
-            session.add(state)
-            session.commit()
-            session.refresh(state)
-
-        except Exception as e:
-            session.rollback()
-            print("Error creating state:", e)
-
-    return state
-
-
-def load_city(
-    *,
-    session: Session,
-    city_in: dict[str, str | int],
-    state: State,
-) -> City | None:
-    statement = select(City).where(
-        col(City.name).ilike(city_in.get("city")),
-        City.state_id == state.id,
+# ("country", abbrev), ("state", country id, code) or ("city", state id,
+# name) -> id of a committed row, address dimensions are never deleted
+dimension_ids: TTLCache[tuple[Any, ...], int] = TTLCache(
+    ttl=settings.ADDRESS_ID_CACHE_TTL,
+    maxsize=settings.ADDRESS_ID_CACHE_MAXSIZE,
+)
+
+# ids written by the open transaction of a session, cached on commit
+_PENDING = "dimension_ids"
+
+
+def _upsert_id(statement: Insert, index_elements: list[Any]) -> Insert:
+    # a no-op update so that RETURNING also yields the id of an existing row
+    column = index_elements[-1]
+    return statement.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={column.name: getattr(statement.excluded, column.name)},
+    ).returning(statement.table.c.id)
+
+
+def _dimension_id(session: Session, key: tuple[Any, ...], statement: Insert) -> int:
+    pending = session.info.setdefault(_PENDING, {})
+    dimension_id = dimension_ids.get(key) or pending.get(key)
+    if dimension_id is None:
+        dimension_id = session.execute(statement).scalar_one()
+        pending[key] = dimension_id
+    return dimension_id
+
+
+def remember_dimensions(session: Session) -> None:
+    """cache the dimension ids of the transaction session just committed"""
+    for key, dimension_id in session.info.pop(_PENDING, {}).items():
+        dimension_ids.set(key, dimension_id)
+
+
+def forget_dimensions(session: Session) -> None:
+    """drop the dimension ids of the transaction session rolled back"""
+    session.info.pop(_PENDING, None)
+
+
+def upsert_country(*, session: Session, abbrev_2: str) -> int:
+    """id of the country, inserted when new, caller commits
+
+    Args:
+        session (Session): database session
+        abbrev_2 (str): case-insensitive two letter code, such as 'US'
+
+    Returns:
+        int: country id
+    """
+    abbrev_2 = abbrev_2.upper()
+    statement = _upsert_id(
+        insert(Country).values(name=None, abbrev_2=abbrev_2),
+        [Country.__table__.c.abbrev_2],
     )
-    return session.exec(statement).one_or_none()
-
-
-def create_city(
-    *,
-    session: Session,
-    city_in: dict[str, str | int],
-    state: State,
-) -> City:
-    city = load_city(session=session, city_in=city_in, state=state)
-    if not city:
-        city = City.model_validate(
-            city_in,
-            update={
-                "name": city_in.get("city"),
-                "state_id": state.id,
-            },
-        )
-        try:
-            session.add(city)
-            session.commit()
-            session.refresh(city)
-        except Exception as e:
-            session.rollback()
-            print("Error creating city:", e)
-
-    return city
-
-
-def load_address(
-    *,
-    session: Session,
-    address_in: dict[str, str | int],
-    city: City,
-) -> Address | None:
-    statement = select(Address).where(
-        col(Address.address).ilike(address_in.get("address")),
-        col(Address.zip).ilike(address_in.get("zip")),
-        Address.city_id == city.id,
+    return _dimension_id(session, ("country", abbrev_2), statement)
+
+
+def upsert_state(*, session: Session, state_code: str | None, country_id: int) -> int:
+    """id of the state of a country, inserted when new, caller commits
+
+    Args:
+        session (Session): database session
+        state_code (str | None): case-insensitive, such as 'CA'
+        country_id (int): country of the state
+
+    Returns:
+        int: state id
+    """
+    state_code = (state_code or UNKNOWN_STATE).upper()
+    table = State.__table__
+    statement = _upsert_id(
+        insert(State).values(name=None, state_code=state_code, country_id=country_id),
+        [table.c.country_id, table.c.state_code],
     )
-    return session.exec(statement).one_or_none()
-
-
-def create_address(
-    *,
-    session: Session,
-    address_in: dict[str, str | int],
-    city: City,
-) -> Address:
-    address = load_address(session=session, address_in=address_in, city=city)
-    if not address:
-        address = Address.model_validate(
-            address_in,
-            update={
-                "address": address_in.get("address"),
-                "city_id": city.id,
-            },
-        )
-        try:
-            session.add(address)
-            session.commit()
-            session.refresh(address)
-        except Exception as e:
-            session.rollback()
-            print("Error creating address:", e)
-
-    return address
+    return _dimension_id(session, ("state", country_id, state_code), statement)
+
+
+def upsert_city(*, session: Session, name: str, state_id: int) -> int:
+    """id of the city of a state, matched case-insensitively by
+    uniq_city_state_lower_name, inserted when new, caller commits
+
+    Args:
+        session (Session): database session
+        name (str): such as 'Cupertino'
+        state_id (int): state of the city
+
+    Returns:
+        int: city id
+    """
+    statement = insert(City).values(name=name, state_id=state_id)
+    statement = statement.on_conflict_do_update(
+        index_elements=[col(City.state_id), func.lower(col(City.name))],
+        set_={"state_id": statement.excluded.state_id},
+    ).returning(col(City.id))
+    return _dimension_id(session, ("city", state_id, name.lower()), statement)
+
+
+def upsert_address(
+    *, session: Session, address: str, zip: str | None, city_id: int
+) -> int:
+    """id of the address of a city, matched case-insensitively on address
+    and zip by uniq_addr_city_address_zip, caller commits
+
+    Args:
+        session (Session): database session
+        address (str): street address
+        zip (str | None): zip code
+        city_id (int): city of the address
+
+    Returns:
+        int: address id
+    """
+    statement = insert(Address).values(address=address, zip=zip, city_id=city_id)
+    statement = statement.on_conflict_do_update(
+        index_elements=[
+            col(Address.city_id),
+            func.lower(col(Address.address)),
+            # a literal, the expression must match the index to infer it
+            func.lower(func.coalesce(col(Address.zip), literal_column("''"))),
+        ],
+        set_={"city_id": statement.excluded.city_id},
+    ).returning(col(Address.id))
+    address_id: int = session.execute(statement).scalar_one()
+    return address_id
@@ -1,17 +1,45 @@
-from fastapi import BackgroundTasks, HTTPException, status
+import functools
 
+from fastapi import BackgroundTasks, HTTPException, status
 from httpx import AsyncClient, Response
 from sqlmodel import Session, col, select
 
 from app.api.decorators import ApiDecorator
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.mlmodels.utils.api_exception import ApiException
 from app.models.relationships import Company
+from app.services.upstream import upstream_flight
+
+# upper-case symbol -> detached copy of the company row
+company_cache: TTLCache[str, Company] = TTLCache(
+    ttl=settings.COMPANY_CACHE_TTL,
+    maxsize=settings.COMPANY_CACHE_MAXSIZE,
+)
 
 
 def load_company_profile(*, session: Session, symbol: str) -> Company | None:
-    statement = select(Company).where(col(Company.symbol).ilike(symbol))
-    return session.exec(statement).one_or_none()
+    """company of symbol, from company_cache or by the unique index on
+    companies.symbol, which holds upper-case symbols
+
+    Args:
+        session (Session): database session, used on a cache miss
+        symbol (str): case-insensitive, such as 'tsla'
+
+    Returns:
+        Company | None: shared between requests, not bound to session
+    """
+    symbol = symbol.upper()
+    company = company_cache.get(symbol)
+    if company is None:
+        statement = select(Company).where(col(Company.symbol) == symbol)
+        row = session.exec(statement).one_or_none()
+        if row is None:
+            return None
+        # a copy outside the session, expiring it can not touch the cache
+        company = Company.model_validate(row)
+        company_cache.set(symbol, company)
+    return company
 
 
 # def update_company_profile(
@@ -30,6 +58,22 @@ def load_company_profile(*, session: Session, symbol: str) -> Company | None:
 #     return db_view
 
 
+async def _get_profile(api_uri: str) -> Response:
+    async with AsyncClient() as client:
+        resp = await client.get(api_uri)
+
+    if resp.status_code != status.HTTP_200_OK:
+        raise HTTPException(
+            status_code=resp.status_code,
+            detail=f"response status: {resp.status_code}",
+        )
+    if not resp.json():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Content not found"
+        )
+    return resp
+
+
 @ApiDecorator.save_company_db
 async def fetch_company_profile(
     background_tasks: BackgroundTasks,
@@ -58,17 +102,9 @@ async def fetch_company_profile(
             "FMP_ENDPOINT or FMP_KEY not set yet",
             fetch_company_profile.__name__,
         )
-    async with AsyncClient() as client:
-        resp = await client.get(api_uri)
-
-    if resp.status_code != status.HTTP_200_OK:
-        raise HTTPException(
-            status_code=resp.status_code,
-            detail=f"response status: {resp.status_code}",
-        )
-    if not resp.json():
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Content not found"
-        )
+    # concurrent requests of a symbol share one call to FMP
+    resp = await upstream_flight.run(
+        (symbol.upper(), "profile", None), functools.partial(_get_profile, api_uri)
+    )
 
     return resp, session, background_tasks
@@ -0,0 +1,145 @@
+from typing import Any
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.httpcache import CachedBody
+from app.core.responses import dumps
+from app.models.common import StatementInterval
+from app.models.stock import Fundamentals
+from app.services.upstream import (
+    dataset_tag,
+    fetch_upstream,
+    symbol_tag,
+    upstream_flight,
+)
+from app.services.yfdata import YFinFetch
+
+# report name -> its series, in response order
+REPORT_SERIES: dict[str, list[str]] = {
+    report: [
+        name
+        for name in field.annotation.__args__[0].model_fields  # type: ignore[union-attr]
+        if name != "date"
+    ]
+    for report, field in Fundamentals.model_fields.items()
+}
+
+# report name -> wanted series, None for all of them
+Fields = tuple[tuple[str, frozenset[str] | None], ...]
+
+
+def parse_fields(value: str | None) -> Fields:
+    """comma separated reports or report series, such as
+    'income_stmt,balancesheet.asset'
+
+    Args:
+        value (str | None): query parameter, every report when empty
+
+    Returns:
+        Fields: wanted reports in response order, hashable
+    """
+    wanted: dict[str, set[str] | None] = {}
+    for item in (value or "").split(","):
+        item = item.strip().lower()
+        if not item:
+            continue
+        report, _, series = item.partition(".")
+        if report not in REPORT_SERIES or (
+            series and series not in REPORT_SERIES[report]
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"unknown field {item}, expected a report of "
+                + ", ".join(REPORT_SERIES)
+                + ", or one of its series, such as balancesheet.asset",
+            )
+        if not series:
+            wanted[report] = None
+        else:
+            # a whole report takes in any of its series
+            picked = wanted.setdefault(report, set())
+            if picked is not None:
+                picked.add(series)
+    if not wanted:
+        wanted = dict.fromkeys(REPORT_SERIES)
+    return tuple(
+        (report, None if picked is None else frozenset(picked))
+        for report, picked in sorted(
+            wanted.items(), key=lambda item: list(REPORT_SERIES).index(item[0])
+        )
+    )
+
+
+def _fundamentals(symbol: str) -> dict[str, Fundamentals]:
+    fin_api = YFinFetch(symbol=symbol)
+    fundamentals = {
+        interval.value: fin_api.get_fundamentals(interval)
+        for interval in StatementInterval
+    }
+    if not any(
+        getattr(reports, report) is not None
+        for reports in fundamentals.values()
+        for report in REPORT_SERIES
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"no statements for {symbol}",
+        )
+    return fundamentals
+
+
+def project(fundamentals: Fundamentals, fields: Fields) -> dict[str, dict[str, Any]]:
+    """the wanted reports and series of fundamentals, reports of empty
+    statements are left out
+    """
+    projected: dict[str, dict[str, Any]] = {}
+    for report, series in fields:
+        data = getattr(fundamentals, report)
+        if data is None:
+            continue
+        include = None if series is None else {"date", *series}
+        projected[report] = data.model_dump(mode="json", include=include)
+    return projected
+
+
+async def fundamentals_body(
+    symbol: str,
+    intervals: list[StatementInterval],
+    fields: Fields,
+) -> CachedBody:
+    """FundamentalsReport body of symbol and its etag
+
+    every report of both intervals is built from one fetch of each
+    statement and cached, projections of it are cached apart
+
+    Args:
+        symbol (str): such as 'AAPL'
+        intervals (list[StatementInterval]): intervals in the response
+        fields (Fields): from parse_fields
+
+    Returns:
+        CachedBody: json body
+    """
+    symbol = symbol.upper()
+
+    async def build() -> CachedBody:
+        fundamentals = await fetch_upstream(
+            symbol,
+            "fundamentals",
+            None,
+            _fundamentals,
+            symbol,
+            ttl=settings.STATEMENT_CACHE_TTL,
+        )
+        content: dict[str, Any] = {"symbol": symbol}
+        for interval in intervals:
+            content[interval.value] = project(fundamentals[interval.value], fields)
+        return CachedBody.of(dumps(content))
+
+    return await upstream_flight.run(
+        (symbol, "fundamentals", (tuple(intervals), fields)),
+        build,
+        ttl=settings.STATEMENT_CACHE_TTL,
+        tags=(symbol_tag(symbol), dataset_tag("fundamentals")),
+    )
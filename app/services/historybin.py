@@ -0,0 +1,124 @@
+import struct
+from typing import Any
+
+import numpy as np
+
+from app.models.history import PeriodData
+
+MEDIA_TYPE = "application/vnd.quant.history+octet-stream"
+MAGIC = b"QAH1"
+# fields written as float32, in this order
+PRICE_FIELDS = ("start", "close", "high", "low")
+
+_header = struct.Struct("<4sH")
+_period = struct.Struct("<Idq")
+
+
+def accepts_binary(accept: str | None) -> bool:
+    """whether an Accept header prefers the binary history format over json
+
+    Args:
+        accept (str | None): raw Accept header
+
+    Returns:
+        bool: True when MEDIA_TYPE is listed with a q above application/json
+    """
+    if not accept:
+        return False
+    quality: dict[str, float] = {}
+    for media_range in accept.split(","):
+        media, *params = (part.strip() for part in media_range.split(";"))
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        quality[media.lower()] = q
+    binary = quality.get(MEDIA_TYPE, 0.0)
+    return binary > 0 and binary >= quality.get("application/json", 0.0)
+
+
+def _write_str(value: str) -> bytes:
+    raw = value.encode()
+    return struct.pack("<B", len(raw)) + raw
+
+
+def encode_period(key: str, period: PeriodData) -> bytes:
+    """one period block of the binary history format, see encode_history"""
+    ts = np.asarray(period.date, dtype=np.int64)
+    deltas = np.diff(ts, prepend=ts[:1])
+    if len(ts) and (deltas.min() < 0 or deltas.max() > np.iinfo(np.uint32).max):
+        raise ValueError(f"dates of {key} are not sorted")
+    chunks = [
+        _write_str(key),
+        _period.pack(len(ts), period.rev_idx, int(ts[0]) if len(ts) else 0),
+        deltas.astype("<u4").tobytes(),
+    ]
+    for field in PRICE_FIELDS:
+        chunks.append(np.asarray(getattr(period, field), dtype="<f4").tobytes())
+    return b"".join(chunks)
+
+
+def pack_history(name: str, blocks: list[bytes]) -> bytes:
+    """binary history payload from period blocks built by encode_period"""
+    return b"".join([_header.pack(MAGIC, len(blocks)), _write_str(name), *blocks])
+
+
+def encode_history(name: str, data: dict[str, PeriodData]) -> bytes:
+    """pack history periods into the compact binary format
+
+    layout, little endian:
+        magic b"QAH1", u16 period count, u8 len + utf8 symbol
+        per period:
+            u8 len + utf8 period name
+            u32 rows, f64 rev_idx, i64 first timestamp (epoch seconds)
+            rows x u32 seconds since the previous row, the first is 0
+            rows x f32 for each of start, close, high, low
+
+    Args:
+        name (str): symbol
+        data (dict[str, PeriodData]): periods with epoch second dates
+
+    Returns:
+        bytes: payload
+    """
+    return pack_history(
+        name, [encode_period(key, period) for key, period in data.items()]
+    )
+
+
+def decode_history(payload: bytes) -> dict[str, Any]:
+    """reference decoder of encode_history, returns numpy arrays"""
+    magic, count = _header.unpack_from(payload, 0)
+    if magic != MAGIC:
+        raise ValueError("not a binary history payload")
+    offset = _header.size
+
+    def read_str() -> str:
+        nonlocal offset
+        size = payload[offset]
+        value = payload[offset + 1 : offset + 1 + size].decode()
+        offset += 1 + size
+        return value
+
+    result: dict[str, Any] = {"name": read_str(), "data": {}}
+    for _ in range(count):
+        key = read_str()
+        rows, rev_idx, first = _period.unpack_from(payload, offset)
+        offset += _period.size
+        deltas = np.frombuffer(payload, dtype="<u4", count=rows, offset=offset)
+        offset += deltas.nbytes
+        period: dict[str, Any] = {
+            "date": first + np.cumsum(deltas, dtype=np.int64),
+            "rev_idx": rev_idx,
+        }
+        for field in PRICE_FIELDS:
+            period[field] = np.frombuffer(
+                payload, dtype="<f4", count=rows, offset=offset
+            )
+            offset += rows * 4
+        result["data"][key] = period
+    return result
@@ -0,0 +1,111 @@
+import orjson
+from fastapi import HTTPException, status
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.responses import dumps
+from app.models.common import HistoryPeriod
+from app.models.history import History, StockBrief
+from app.services import historybin
+from app.services.yfdata import YFinFetch
+
+# periods served by /stocks/history, in response order
+HISTORY_PERIODS = [
+    HistoryPeriod.ONE_MONTH,
+    HistoryPeriod.ONE_YEAR,
+    HistoryPeriod.FIVE_YEAR,
+    HistoryPeriod.TEN_YEAR,
+    HistoryPeriod.YEAR_TO_DAY,
+    HistoryPeriod.MAX,
+]
+
+# (symbol, binary) -> serialized period payloads by period name
+history_cache: TTLCache[tuple[str, bool], dict[str, bytes]] = TTLCache(
+    ttl=settings.HISTORY_CACHE_TTL,
+    maxsize=settings.HISTORY_CACHE_MAXSIZE,
+)
+
+
+def parse_periods(value: str | None) -> list[HistoryPeriod]:
+    """comma separated period names or labels, such as 'ONE_YEAR,max'
+
+    Args:
+        value (str | None): query parameter, all periods when empty
+
+    Returns:
+        list[HistoryPeriod]: requested periods, without duplicates
+    """
+    lookup = {period.name: period for period in HISTORY_PERIODS}
+    lookup.update({period.value.label.upper(): period for period in HISTORY_PERIODS})
+    periods: list[HistoryPeriod] = []
+    for item in (value or "").split(","):
+        key = item.strip().upper()
+        if not key:
+            continue
+        if key not in lookup:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"unknown period {item.strip()}, expected one of "
+                + ", ".join(period.name for period in HISTORY_PERIODS),
+            )
+        if lookup[key] not in periods:
+            periods.append(lookup[key])
+    return periods or HISTORY_PERIODS
+
+
+def period_payloads(symbol: str, binary: bool) -> dict[str, bytes]:
+    """serialized payload of every history period of symbol, sliced and
+    encoded together on a miss and cached per format
+    """
+    key = (symbol.upper(), binary)
+    payloads = history_cache.get(key)
+    if payloads is None:
+        fin_api = YFinFetch(symbol=symbol)
+        data = fin_api.get_history_periods(
+            fin_api.get_history(), HISTORY_PERIODS, epoch=binary
+        )
+        payloads = {
+            name: historybin.encode_period(name, period) if binary else dumps(period)
+            for name, period in data.items()
+        }
+        history_cache.set(key, payloads)
+    return payloads
+
+
+def pack_payloads(
+    symbol: str,
+    payloads: dict[str, bytes],
+    periods: list[HistoryPeriod],
+    binary: bool,
+) -> bytes:
+    """History response body of the requested periods out of the payloads
+    of period_payloads, without serializing them again
+    """
+    if binary:
+        return historybin.pack_history(
+            symbol, [payloads[period.name] for period in periods]
+        )
+    return dumps(
+        {
+            "brief": {"name": symbol},
+            "data": {
+                period.name: orjson.Fragment(payloads[period.name])
+                for period in periods
+            },
+        }
+    )
+
+
+def daily_history_payload(symbol: str, binary: bool) -> bytes:
+    """History response body of the last day in 1 hour bars, json or binary"""
+    fin_api = YFinFetch(symbol=symbol)
+    period = HistoryPeriod.ONE_DAY
+    result = fin_api.get_history_data(
+        hist_data=fin_api.get_history(period=period, interval="1h"),
+        period=period,
+        epoch=binary,
+    )
+    data = {period.name: result}
+    if binary:
+        return historybin.encode_history(symbol, data)
+    return dumps(History.model_construct(brief=StockBrief(name=symbol), data=data))
@@ -0,0 +1,238 @@
+import fcntl
+import json
+import os
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import date
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.core.log_config import ip_logger
+
+# one daily bar, ts is the exchange wall clock time in ns since epoch
+BAR_DTYPE = np.dtype(
+    [
+        ("ts", "<i8"),
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("close", "<f8"),
+        ("volume", "<f8"),
+    ]
+)
+# dataframe column -> bar field
+COLUMNS: dict[str, str] = {
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Volume": "volume",
+}
+# corporate action columns, any non-zero row re-adjusts earlier prices
+ACTIONS = ("Dividends", "Stock Splits")
+
+
+def _wall_clock_ns(index: pd.Index) -> np.ndarray:
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.asi8
+
+
+def has_actions(data: pd.DataFrame, after: int) -> bool:
+    """whether a yfinance history dataframe has a dividend or split row
+    later than the bar time after
+    """
+    later = _wall_clock_ns(data.index) > after
+    return any(
+        column in data.columns
+        and bool(data[column].fillna(0).ne(0).to_numpy()[later].any())
+        for column in ACTIONS
+    )
+
+
+def frame_to_bars(data: pd.DataFrame) -> np.ndarray:
+    """yfinance daily history dataframe to a structured bar array"""
+    bars = np.empty(len(data), dtype=BAR_DTYPE)
+    bars["ts"] = _wall_clock_ns(data.index)
+    for column, field in COLUMNS.items():
+        if column in data.columns:
+            bars[field] = data[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            bars[field] = np.nan
+    return bars
+
+
+def bars_to_frame(bars: np.ndarray, tz: str | None) -> pd.DataFrame:
+    """structured bar array to a dataframe shaped like yfinance history"""
+    index = pd.DatetimeIndex(bars["ts"].astype("datetime64[ns]"), name="Date")
+    if tz:
+        index = index.tz_localize(tz)
+    return pd.DataFrame(
+        {column: bars[field] for column, field in COLUMNS.items()},
+        index=index,
+    )
+
+
+class OHLCVStore:
+    """durable daily bar store, one append-only binary file per symbol,
+    read back through numpy memmap under a shared flock
+
+    the first load of a symbol backfills the max history, later loads only
+    ask upstream for bars from the last stored date on and rewrite the tail;
+    prices are auto-adjusted, so when the refetched last bar opens at another
+    price or a dividend or split shows up, the whole history is backfilled
+    again
+    """
+
+    def __init__(
+        self,
+        root: str = settings.OHLCV_STORE_PATH,
+        refresh_seconds: int = settings.OHLCV_REFRESH_SECONDS,
+    ) -> None:
+        self.root = root
+        self.refresh_seconds = refresh_seconds
+
+    def _path(self, symbol: str, suffix: str) -> str:
+        return os.path.join(self.root, f"{symbol.upper()}.{suffix}")
+
+    @contextmanager
+    def _locked(self, symbol: str, shared: bool = False) -> Iterator[None]:
+        os.makedirs(self.root, exist_ok=True)
+        with open(self._path(symbol, "lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def meta(self, symbol: str) -> dict[str, Any]:
+        try:
+            with open(self._path(symbol, "json")) as f:
+                meta: dict[str, Any] = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            meta = {}
+        return meta
+
+    def _write_meta(self, symbol: str, meta: dict[str, Any]) -> None:
+        tmp = self._path(symbol, "json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._path(symbol, "json"))
+
+    def _map(self, symbol: str) -> np.ndarray:
+        # callers hold the lock, write_tail rewrites and truncates the file
+        path = self._path(symbol, "bin")
+        try:
+            rows = os.path.getsize(path) // BAR_DTYPE.itemsize
+        except FileNotFoundError:
+            rows = 0
+        if rows == 0:
+            return np.empty(0, dtype=BAR_DTYPE)
+        # ignore a partially written trailing row
+        return np.memmap(path, dtype=BAR_DTYPE, mode="r", shape=(rows,))
+
+    def read(self, symbol: str) -> np.ndarray:
+        """bars of symbol copied out of the file under a shared lock,
+        empty array when nothing is stored
+        """
+        with self._locked(symbol, shared=True):
+            return np.array(self._map(symbol))
+
+    def write_tail(
+        self, symbol: str, bars: np.ndarray, tz: str | None, replace: bool = False
+    ) -> None:
+        """replace stored bars from bars' first date on and append the rest,
+        or all stored bars with replace
+        """
+        if len(bars) == 0:
+            return
+        with self._locked(symbol):
+            stored = self._map(symbol)
+            start = (
+                0
+                if replace
+                else int(np.searchsorted(stored["ts"], bars["ts"][0], side="left"))
+            )
+            stale_rows = len(stored) - start
+            del stored
+            path = self._path(symbol, "bin")
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                f.seek(start * BAR_DTYPE.itemsize)
+                f.write(bars.tobytes())
+                if stale_rows > len(bars):
+                    f.truncate()
+            meta = self.meta(symbol)
+            meta["tz"] = tz
+            self._write_meta(symbol, meta)
+
+    def _mark_checked(self, symbol: str) -> None:
+        meta = self.meta(symbol)
+        meta["checked_at"] = time.time()
+        self._write_meta(symbol, meta)
+
+    def _backfill(
+        self, symbol: str, fetch: Callable[[date | None], pd.DataFrame]
+    ) -> None:
+        data = fetch(None)
+        tz = str(data.index.tz) if getattr(data.index, "tz", None) else None
+        self.write_tail(symbol, frame_to_bars(data), tz, replace=True)
+        self._mark_checked(symbol)
+
+    @staticmethod
+    def _readjusted(stored: np.ndarray, data: pd.DataFrame) -> bool:
+        """whether upstream adjusted the stored prices since the last sync
+
+        the open of the last stored bar is compared, unlike the rest of a
+        bar it does not move while the day trades; its own dividend or split
+        is already in the stored prices
+        """
+        if has_actions(data, after=int(stored["ts"][-1])):
+            return True
+        bars = frame_to_bars(data)
+        overlap = bars[bars["ts"] == stored["ts"][-1]]
+        return len(overlap) > 0 and not np.allclose(
+            overlap["open"][0], stored["open"][-1], rtol=1e-6, equal_nan=True
+        )
+
+    def history(
+        self,
+        symbol: str,
+        fetch: Callable[[date | None], pd.DataFrame],
+    ) -> pd.DataFrame:
+        """daily history of symbol, synced with upstream at most once
+        per refresh_seconds
+
+        Args:
+            symbol (str): such as 'AAPL'
+            fetch (Callable[[date | None], pd.DataFrame]): upstream daily
+                history from the given date on, max period for None
+
+        Returns:
+            pd.DataFrame: Open/High/Low/Close/Volume indexed by date
+        """
+        stored = self.read(symbol)
+        meta = self.meta(symbol)
+        if len(stored) == 0:
+            self._backfill(symbol, fetch)
+        elif time.time() - meta.get("checked_at", 0) > self.refresh_seconds:
+            last_day = pd.Timestamp(int(stored["ts"][-1])).date()
+            try:
+                data = fetch(last_day)
+                if self._readjusted(stored, data):
+                    self._backfill(symbol, fetch)
+                else:
+                    self.write_tail(symbol, frame_to_bars(data), meta.get("tz"))
+                    self._mark_checked(symbol)
+            except Exception as e:
+                # serve what is stored, retry on the next load
+                ip_logger.error(f"Error syncing history of {symbol}: {e}")
+
+        return bars_to_frame(self.read(symbol), self.meta(symbol).get("tz"))
+
+
+ohlcv_store = OHLCVStore()
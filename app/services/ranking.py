@@ -0,0 +1,373 @@
+from abc import ABC, abstractmethod
+from datetime import date, timedelta
+from typing import Any
+
+from sqlalchemy import text
+from sqlmodel import Session, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import Select
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.executor import run_blocking
+from app.core.responses import dumps
+from app.models.pathview import PathViewPublic, ViewDailyStatTrend
+from app.models.relationships import Company, View, ViewDailyStat, ViewTrendRollup
+from app.services.view import MAX_TREND_DAYS
+
+try:
+    import redis
+except ImportError:  # the redis extra is not installed
+    redis = None  # type: ignore
+
+# limit -> serialized /ticker_rank response, cleared by every view flush
+rank_cache: TTLCache[int, bytes] = TTLCache(ttl=settings.RANK_CACHE_TTL)
+
+# orders view flushes, shared, against reconcile, exclusive, across
+# workers, held until commit
+_LOCK_RANKING_SHARED = text(
+    "SELECT pg_advisory_xact_lock_shared(hashtext('view_ranking'))"
+)
+_LOCK_RANKING = text("SELECT pg_advisory_xact_lock(hashtext('view_ranking'))")
+
+
+def lock_ranking(*, session: Session, shared: bool = False) -> None:
+    """take the ranking lock until the transaction of session ends
+
+    a view flush records into the ranking backend and commits under the
+    shared lock, so reconcile, under the exclusive one, finds a flush in
+    both the sql tables and the backend, or in neither
+    """
+    session.execute(_LOCK_RANKING_SHARED if shared else _LOCK_RANKING)
+
+
+def _rank_projection() -> Select[Any]:
+    # view and company image columns in one joined select, no lazy loads
+    return select(  # type: ignore
+        View.id,
+        View.path,
+        View.symbol,
+        View.count,
+        View.created_at,
+        View.updated_at,
+        Company.image,
+    ).join(Company, col(View.company_id) == col(Company.id))
+
+
+def _ranked_statement(ranked: list[tuple[str, int]]) -> Select[Any]:
+    return _rank_projection().where(
+        col(View.symbol).in_([symbol for symbol, _ in ranked])
+    )
+
+
+def _ranked_rows(ranked: list[tuple[str, int]], rows: Any) -> list[PathViewPublic]:
+    by_symbol = {row.symbol: row for row in rows}
+    return [
+        _rank_row(by_symbol[symbol], count)
+        for symbol, count in ranked
+        if symbol in by_symbol
+    ]
+
+
+def _rank_row(row: Any, count: int | None = None) -> PathViewPublic:
+    return PathViewPublic.model_construct(
+        id=row.id,
+        path=row.path,
+        symbol=row.symbol,
+        count=row.count if count is None else count,
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+        image=row.image,
+    )
+
+
+class RankingBackend(ABC):
+    """answers the view rank and trend of symbols
+
+    record() receives every flushed batch of view increments, rows of
+    symbol, company_id, created_at (day) and count
+    """
+
+    @abstractmethod
+    def record(self, rows: list[dict[str, Any]]) -> None: ...
+
+    @abstractmethod
+    def top(self, session: Session, limit: int) -> list[tuple[str, int]]:
+        """symbols with the most views of all time, with their counts"""
+
+    def rank(self, session: Session, limit: int) -> list[PathViewPublic]:
+        """top() with the view and company columns of each symbol
+
+        the columns are read from sql in one query by the ranked symbols,
+        ticker_rank caches the result until the next flush
+        """
+        ranked = self.top(session, limit)
+        return _ranked_rows(ranked, session.exec(_ranked_statement(ranked)))
+
+    @abstractmethod
+    def trend(
+        self, session: Session, days: int, limit: int
+    ) -> list[ViewDailyStatTrend]:
+        """symbols with the most views over the last days, today included"""
+
+    async def rank_async(
+        self, session: AsyncSession, limit: int
+    ) -> list[PathViewPublic]:
+        """rank() on an async session, on the event loop thread, backends
+        with a blocking client of their own override it
+        """
+        return await session.run_sync(lambda sync: self.rank(sync, limit))
+
+    async def trend_async(
+        self, session: AsyncSession, days: int, limit: int
+    ) -> list[ViewDailyStatTrend]:
+        """trend() on an async session, see rank_async()"""
+        return await session.run_sync(lambda sync: self.trend(sync, days, limit))
+
+    def reconcile(self, session: Session) -> None:  # noqa: B027
+        """resync derived state with the sql tables"""
+
+
+class SqlRankingBackend(RankingBackend):
+    """rank from view_counts and trend from view_trend_rollups, both
+    written by the view flush
+    """
+
+    def record(self, rows: list[dict[str, Any]]) -> None:
+        # the view flush already wrote the rows
+        pass
+
+    def top(self, session: Session, limit: int) -> list[tuple[str, int]]:
+        statement = (
+            select(View.symbol, View.count)
+            .order_by(col(View.count).desc())
+            .limit(limit)
+        )
+        return [(symbol, count) for symbol, count in session.exec(statement)]
+
+    def _rank_statement(self, limit: int) -> Select[Any]:
+        return _rank_projection().order_by(col(View.count).desc()).limit(limit)
+
+    def _trend_statement(self, days: int, limit: int) -> Select[Any]:
+        # one index range of ix_vtr_window_count
+        return (
+            select(  # type: ignore
+                ViewTrendRollup.company_id,
+                ViewTrendRollup.count,
+                ViewTrendRollup.symbol,
+            )
+            .where(ViewTrendRollup.window_days == days)
+            .order_by(col(ViewTrendRollup.count).desc())
+            .limit(limit)
+        )
+
+    def rank(self, session: Session, limit: int) -> list[PathViewPublic]:
+        return [_rank_row(row) for row in session.exec(self._rank_statement(limit))]
+
+    def trend(
+        self, session: Session, days: int, limit: int
+    ) -> list[ViewDailyStatTrend]:
+        return [
+            ViewDailyStatTrend(company_id=company_id, count=count, symbol=symbol)
+            for company_id, count, symbol in session.exec(
+                self._trend_statement(days, limit)
+            )
+        ]
+
+    async def rank_async(
+        self, session: AsyncSession, limit: int
+    ) -> list[PathViewPublic]:
+        rows = await session.exec(self._rank_statement(limit))
+        return [_rank_row(row) for row in rows]
+
+    async def trend_async(
+        self, session: AsyncSession, days: int, limit: int
+    ) -> list[ViewDailyStatTrend]:
+        rows = await session.exec(self._trend_statement(days, limit))
+        return [
+            ViewDailyStatTrend(company_id=company_id, count=count, symbol=symbol)
+            for company_id, count, symbol in rows
+        ]
+
+
+class RedisRankingBackend(RankingBackend):
+    """rank and trend from redis sorted sets, O(log n) per lookup
+
+    keys, under prefix:
+        total       zset symbol -> views of all time
+        day:<date>  zset symbol -> views of the day, expires after 90 days
+        company     hash symbol -> company id
+        trend:<days>:<date>  union of the day sets, cached for a short ttl
+
+    rank() still reads the view and company columns of the ranked symbols
+    from sql, only the ordering comes from redis
+    """
+
+    def __init__(
+        self,
+        client: "redis.Redis",
+        prefix: str = settings.RANKING_KEY_PREFIX,
+        trend_ttl: int = settings.RANKING_TREND_CACHE_SECONDS,
+    ) -> None:
+        self.client = client
+        self.prefix = prefix
+        self.trend_ttl = trend_ttl
+
+    def _key(self, *parts: object) -> str:
+        return ":".join([self.prefix, *map(str, parts)])
+
+    def _day_ttl(self, day: date) -> timedelta:
+        return day + timedelta(days=MAX_TREND_DAYS + 1) - date.today()
+
+    def record(self, rows: list[dict[str, Any]]) -> None:
+        if not rows:
+            return
+        pipe = self.client.pipeline()
+        days: set[date] = set()
+        for row in rows:
+            symbol, day = row["symbol"], row["created_at"]
+            pipe.zincrby(self._key("total"), row["count"], symbol)
+            pipe.zincrby(self._key("day", day.isoformat()), row["count"], symbol)
+            pipe.hset(self._key("company"), symbol, row["company_id"])
+            days.add(day)
+        for day in days:
+            pipe.expire(self._key("day", day.isoformat()), self._day_ttl(day))
+        pipe.execute()
+
+    def top(self, session: Session, limit: int) -> list[tuple[str, int]]:  # noqa: ARG002
+        return self._top(limit)
+
+    def _top(self, limit: int) -> list[tuple[str, int]]:
+        ranked = self.client.zrevrange(
+            self._key("total"), 0, limit - 1, withscores=True
+        )
+        return [(_text(symbol), int(count)) for symbol, count in ranked]
+
+    def trend(
+        self,
+        session: Session,  # noqa: ARG002
+        days: int,
+        limit: int,
+    ) -> list[ViewDailyStatTrend]:
+        return self._trend(days, limit)
+
+    def _trend(self, days: int, limit: int) -> list[ViewDailyStatTrend]:
+        today = date.today()
+        trend_key = self._key("trend", days, today.isoformat())
+        if not self.client.exists(trend_key):
+            day_keys = [
+                self._key("day", (today - timedelta(days=n)).isoformat())
+                for n in range(days)
+            ]
+            pipe = self.client.pipeline()
+            pipe.zunionstore(trend_key, day_keys)
+            pipe.expire(trend_key, self.trend_ttl)
+            pipe.execute()
+        ranked = self.client.zrevrange(trend_key, 0, limit - 1, withscores=True)
+        if not ranked:
+            return []
+        symbols = [_text(symbol) for symbol, _ in ranked]
+        company_ids = self.client.hmget(self._key("company"), symbols)
+        return [
+            ViewDailyStatTrend(
+                company_id=int(company_id), count=int(count), symbol=symbol
+            )
+            for symbol, (_, count), company_id in zip(
+                symbols, ranked, company_ids, strict=True
+            )
+            if company_id is not None
+        ]
+
+    async def rank_async(
+        self, session: AsyncSession, limit: int
+    ) -> list[PathViewPublic]:
+        # the sync redis client runs in the executor, off the event loop
+        ranked = await run_blocking(self._top, limit)
+        rows = await session.exec(_ranked_statement(ranked))
+        return _ranked_rows(ranked, rows)
+
+    async def trend_async(
+        self,
+        session: AsyncSession,  # noqa: ARG002
+        days: int,
+        limit: int,
+    ) -> list[ViewDailyStatTrend]:
+        return await run_blocking(self._trend, days, limit)
+
+    def reconcile(self, session: Session) -> None:
+        """rebuild the sorted sets from view_counts and the last 90 days of
+        view_daily_stats, dropping whatever drifted in redis
+
+        holds the exclusive ranking lock from the sql reads to the redis
+        transaction, views flushed meanwhile are recorded after it
+        """
+        lock_ranking(session=session)
+        totals = session.exec(select(View.symbol, View.count, View.company_id)).all()
+        since = date.today() - timedelta(days=MAX_TREND_DAYS)
+        stats = session.exec(
+            select(
+                ViewDailyStat.symbol,
+                ViewDailyStat.created_at,
+                ViewDailyStat.count,
+                ViewDailyStat.company_id,
+            ).where(ViewDailyStat.created_at >= since)
+        ).all()
+        days: dict[date, dict[str, int]] = {}
+        for symbol, day, count, _ in stats:
+            days.setdefault(day, {})[symbol] = count or 0
+
+        # one MULTI/EXEC, readers never see a half rebuilt ranking
+        pipe = self.client.pipeline(transaction=True)
+        stale = list(self.client.scan_iter(match=self._key("*")))
+        if stale:
+            pipe.delete(*stale)
+        total = {symbol: count or 0 for symbol, count, _ in totals if symbol}
+        if total:
+            pipe.zadd(self._key("total"), total)
+        companies = {symbol: company_id for symbol, _, company_id in totals if symbol}
+        companies.update({symbol: company_id for symbol, _, _, company_id in stats})
+        if companies:
+            pipe.hset(self._key("company"), mapping=companies)
+        for day, counts in days.items():
+            pipe.zadd(self._key("day", day.isoformat()), counts)
+            pipe.expire(self._key("day", day.isoformat()), self._day_ttl(day))
+        pipe.execute()
+        # releases the lock
+        session.commit()
+
+
+def _text(value: str | bytes) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def ticker_rank(session: Session, limit: int) -> bytes:
+    """serialized /ticker_rank response, cached per limit until the next
+    view flush or RANK_CACHE_TTL
+    """
+    payload = rank_cache.get(limit)
+    if payload is None:
+        payload = dumps(ranking_backend.rank(session, limit))
+        rank_cache.set(limit, payload)
+    return payload
+
+
+async def ticker_rank_async(session: AsyncSession, limit: int) -> bytes:
+    """ticker_rank() on an async session, sharing its cache"""
+    payload = rank_cache.get(limit)
+    if payload is None:
+        payload = dumps(await ranking_backend.rank_async(session, limit))
+        rank_cache.set(limit, payload)
+    return payload
+
+
+def make_ranking_backend() -> RankingBackend:
+    if settings.RANKING_BACKEND == "redis":
+        if redis is None:
+            raise RuntimeError(
+                "RANKING_BACKEND=redis needs the redis package, install the redis extra"
+            )
+        return RedisRankingBackend(redis.Redis.from_url(settings.REDIS_URL))
+    return SqlRankingBackend()
+
+
+ranking_backend = make_ranking_backend()
@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+
+# statement line items pulled into the ratio matrices, row order matters
+INCOME_ITEMS: list[str] = [
+    "Total Revenue",
+    "Gross Profit",
+    "Operating Income",
+    "Operating Expense",
+    "Net Income",
+    "Basic EPS",
+]
+BALANCE_ITEMS: list[str] = [
+    "Total Assets",
+    "Current Liabilities",
+    "Stockholders Equity",
+]
+
+REV, GROSS, OP_INC, OP_EXP, NET_INC, EPS = range(len(INCOME_ITEMS))
+ASSETS, CUR_LIAB, EQUITY = range(len(BALANCE_ITEMS))
+
+
+def statement_matrix(
+    stmt: pd.DataFrame,
+    items: list[str],
+    columns: pd.Index | None = None,
+) -> np.ndarray:
+    """pull line items of a statement into a float matrix in one pass,
+    missing line items and periods become NaN rows/columns
+
+    Args:
+        stmt (pd.DataFrame): yfinance statement, line items x periods
+        items (list[str]): line items, in matrix row order
+        columns (pd.Index | None): periods to align to, defaults to stmt's
+
+    Returns:
+        np.ndarray: matrix of shape (len(items), len(columns))
+    """
+    frame = stmt.reindex(index=items, columns=columns)
+    return frame.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def safe_divide(num: np.ndarray, den: np.ndarray) -> np.ndarray:
+    """element-wise num / den, NaN where either side is NaN or den is 0"""
+    num, den = np.broadcast_arrays(num, den)
+    out = np.full(num.shape, np.nan, dtype=np.float64)
+    mask = np.isfinite(num) & np.isfinite(den) & (den != 0)
+    np.divide(num, den, out=out, where=mask)
+    return out
+
+
+def lagged_change(values: np.ndarray, lag: int) -> np.ndarray:
+    """(latest - lagged) / latest along the period axis, periods newest first
+
+    Args:
+        values (np.ndarray): array of shape (..., periods)
+        lag (int): number of periods to look back, clamped to periods - 1
+
+    Returns:
+        np.ndarray: same shape as values, NaN where no lagged period exists
+    """
+    periods = values.shape[-1]
+    lag = min(lag, periods - 1)
+    out = np.full(values.shape, np.nan, dtype=np.float64)
+    if lag <= 0:
+        return out
+    out[..., : periods - lag] = safe_divide(
+        values[..., : periods - lag] - values[..., lag:],
+        values[..., : periods - lag],
+    )
+    return out
+
+
+def profitability_ratios(inc: np.ndarray, bal: np.ndarray) -> dict[str, np.ndarray]:
+    """every profitability ratio for every period in one vectorized pass
+
+    Args:
+        inc (np.ndarray): income matrix, shape (len(INCOME_ITEMS), ..., periods)
+        bal (np.ndarray): balance matrix, shape (len(BALANCE_ITEMS), ..., periods)
+
+    Returns:
+        dict[str, np.ndarray]: ratio name -> array of shape (..., periods)
+    """
+    revenue = inc[REV]
+    # COGS = Revenue x (1 - Gross Profit Margin) = Revenue - Gross Profit
+    cogs = revenue - inc[GROSS]
+    # Capital employed = total assets - current liabilities
+    cap_employed = bal[ASSETS] - bal[CUR_LIAB]
+
+    return {
+        "gross_margin": safe_divide(revenue - cogs, revenue),
+        "op_inc_margin": safe_divide(inc[OP_INC], revenue),
+        "profit_margin": safe_divide(inc[NET_INC], revenue),
+        "return_on_equity": safe_divide(inc[NET_INC], bal[EQUITY]),
+        "return_on_assets": safe_divide(inc[NET_INC], bal[ASSETS]),
+        "return_on_capital_employed": safe_divide(
+            revenue - cogs - inc[OP_EXP], cap_employed
+        ),
+    }
+
+
+def growth_ratios(
+    inc: np.ndarray, lags: dict[str, tuple[int, int]]
+) -> dict[str, np.ndarray]:
+    """statement based growth ratios for every period
+
+    Args:
+        inc (np.ndarray): income matrix, shape (len(INCOME_ITEMS), ..., periods)
+        lags (dict[str, tuple[int, int]]): name -> (income row, lag in periods)
+
+    Returns:
+        dict[str, np.ndarray]: ratio name -> array of shape (..., periods)
+    """
+    return {name: lagged_change(inc[row], lag) for name, (row, lag) in lags.items()}
+
+
+def latest(values: np.ndarray) -> np.ndarray:
+    """latest period of ratio arrays as percent, NaN replaced by 0.0"""
+    return np.round(np.nan_to_num(values[..., 0], nan=0.0) * 100, 2)
+
+
+def as_series(values: np.ndarray) -> list[float | None]:
+    """ratio array of one symbol as percent, NaN replaced by None"""
+    pct = np.round(values * 100, 2)
+    return [None if np.isnan(v) else float(v) for v in pct]
+
+
+class RatioEngine:
+    """ratios of one symbol computed from the needed statement line items,
+    which are pulled into numpy matrices once
+    """
+
+    # name -> (income row, lag in periods)
+    GROWTH_LAGS: dict[str, tuple[int, int]] = {
+        "rev_1y": (REV, 1),
+        "eps_1y": (EPS, 1),
+        "eps_3y_cagr": (EPS, 3),
+    }
+    SERIES_LAGS: dict[str, tuple[int, int]] = {
+        "rev_growth": (REV, 1),
+        "eps_growth": (EPS, 1),
+    }
+
+    def __init__(self, fin_stmt: pd.DataFrame, bal_stmt: pd.DataFrame) -> None:
+        self.dates: list[pd.Timestamp] = fin_stmt.columns.to_list()
+        self.inc: np.ndarray = statement_matrix(fin_stmt, INCOME_ITEMS)
+        self.bal: np.ndarray = statement_matrix(
+            bal_stmt, BALANCE_ITEMS, columns=fin_stmt.columns
+        )
+
+    def profitability(self) -> dict[str, np.ndarray]:
+        return profitability_ratios(self.inc, self.bal)
+
+    def growth(self) -> dict[str, np.ndarray]:
+        return growth_ratios(self.inc, self.GROWTH_LAGS)
+
+    def growth_series(self) -> dict[str, np.ndarray]:
+        return growth_ratios(self.inc, self.SERIES_LAGS)
@@ -1,19 +1,58 @@
-from sqlmodel import Session, col, select
+from typing import Any
 
-from app.models.relationships import View
+from sqlmodel import Session, col, func, or_, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import Select
+
+from app.models.relationships import Company, View
 from app.models.stock import SymbolSearch, SymbolSearchList
 
 
+def _like_prefix(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+def _symbol_list_statement(search: str, limit: int) -> Select[Any]:
+    symbol = func.upper(Company.symbol)
+    count = func.coalesce(View.count, 0)
+    by_symbol = symbol.like(_like_prefix(search.upper()))
+    return (
+        select(symbol.label("symbol"), count.label("count"), Company.company_name)
+        .outerjoin(View, col(View.company_id) == col(Company.id))
+        .where(
+            or_(
+                by_symbol,
+                col(Company.company_name).ilike(_like_prefix(search)),
+                col(Company.company_name).ilike("% " + _like_prefix(search)),
+            )
+        )
+        .order_by(by_symbol.desc(), count.desc(), symbol)
+        .limit(limit)
+    )
+
+
 def get_symbol_list(
     *, session: Session, search: str, limit: int
 ) -> SymbolSearchList | None:
-    statement = (
-        select(View.symbol, View.count)
-        .where(col(View.symbol).ilike(search + "%"))
-        .order_by(View.count.desc(), View.symbol)  # type: ignore
-        .limit(limit)
+    """companies whose symbol or a word of whose name starts with search,
+    symbol matches first and then by views, like symbol_index.search
+
+    the symbol match is served by ix_companies_symbol_pattern, the name
+    match by ix_companies_name_trgm where pg_trgm is installed
+    """
+    data = session.exec(_symbol_list_statement(search, limit)).all()
+
+    return SymbolSearchList(
+        data=[SymbolSearch.model_validate(result) for result in data]
     )
-    data = session.exec(statement).all()
+
+
+async def get_symbol_list_async(
+    *, session: AsyncSession, search: str, limit: int
+) -> SymbolSearchList | None:
+    """get_symbol_list on an async session"""
+    data = (await session.exec(_symbol_list_statement(search, limit))).all()
 
     return SymbolSearchList(
         data=[SymbolSearch.model_validate(result) for result in data]
@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from app.core.config import settings
+from app.core.log_config import ip_logger
+from app.mlmodels.utils.analysis import sector_strength
+from app.models.strength import StrengthsPublic
+
+SECTOR_TICKERS = ["XLK", "XLY", "XLC", "XLE", "XLB", "XLP", "XLV", "XLI"]
+SECTOR_PERIOD = "10mo"
+MARKET_TZ = ZoneInfo("America/New_York")
+# wait before retrying a failed scheduled refresh, unit seconds
+RETRY_DELAY = 15 * 60
+
+
+class StrengthSnapshot:
+    """serialized StrengthsPublic of the default sectors, served as is
+
+    with a ttl a snapshot older than ttl seconds is recomputed on the next
+    get, without one it is only replaced by refresh
+    """
+
+    def __init__(self, ttl: int | None = None) -> None:
+        self.ttl = ttl
+        self.payload: bytes | None = None
+        self.as_of: datetime | None = None
+        self._lock = asyncio.Lock()
+
+    def fresh(self) -> bool:
+        if self.payload is None or self.as_of is None:
+            return False
+        if self.ttl is None:
+            return True
+        return datetime.now(tz=MARKET_TZ) - self.as_of < timedelta(seconds=self.ttl)
+
+    async def refresh(self) -> bytes:
+        """recompute the snapshot, callers waiting on a running refresh
+        share its result
+        """
+        as_of = self.as_of
+        async with self._lock:
+            # replaced while this caller waited for the lock
+            if self.payload is not None and self.as_of is not as_of:
+                return self.payload
+            strong, weak = await sector_strength(
+                ticker_list=SECTOR_TICKERS, period=SECTOR_PERIOD
+            )
+            strengths = StrengthsPublic(
+                strong=strong, weak=weak, as_of=datetime.now(tz=MARKET_TZ)
+            )
+            self.payload = strengths.model_dump_json().encode()
+            self.as_of = strengths.as_of
+
+        return self.payload
+
+    async def get(self) -> bytes:
+        if self.payload is None or not self.fresh():
+            return await self.refresh()
+        return self.payload
+
+    def clear(self) -> None:
+        self.payload = None
+        self.as_of = None
+
+
+# the daily refresher keeps it current, otherwise it expires
+strength_snapshot = StrengthSnapshot(
+    ttl=None if settings.STRENGTH_REFRESH_ENABLED else settings.STRENGTH_CACHE_TTL
+)
+
+
+def next_refresh_time(now: datetime) -> datetime:
+    """
+    next weekday refresh time after market close
+
+    :param now: datetime, timezone aware
+
+    :returns: datetime, in market timezone
+    """
+    now = now.astimezone(MARKET_TZ)
+    run_at = now.replace(
+        hour=settings.STRENGTH_REFRESH_HOUR,
+        minute=settings.STRENGTH_REFRESH_MINUTE,
+        second=0,
+        microsecond=0,
+    )
+    while run_at <= now or run_at.weekday() >= 5:
+        run_at += timedelta(days=1)
+
+    return run_at
+
+
+async def strength_refresher() -> None:
+    """refresh the strength snapshot once per trading day, forever"""
+    while True:
+        now = datetime.now(tz=MARKET_TZ)
+        await asyncio.sleep((next_refresh_time(now) - now).total_seconds())
+        while True:
+            try:
+                await strength_snapshot.refresh()
+                break
+            except Exception as e:
+                ip_logger.error(f"Error refreshing strengths: {e}")
+                await asyncio.sleep(RETRY_DELAY)
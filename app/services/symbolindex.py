@@ -0,0 +1,175 @@
+import heapq
+import re
+import threading
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+from sqlmodel import Session, col, select
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.relationships import Company, View
+from app.models.stock import SymbolSearch
+
+# company name words are indexed by their first letters only, longer
+# searches are checked against the names
+MAX_WORD_PREFIX = 10
+
+_words = re.compile(r"[A-Za-z0-9]+")
+
+
+class _Node:
+    __slots__ = ("children", "symbols")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        # symbols of every key below this node
+        self.symbols: set[str] = set()
+
+
+class PrefixTrie:
+    """upper-case key prefixes to the symbols of the keys starting with them"""
+
+    def __init__(self) -> None:
+        self.root = _Node()
+
+    def add(self, key: str, symbol: str) -> None:
+        node = self.root
+        for char in key:
+            node = node.children.setdefault(char, _Node())
+            node.symbols.add(symbol)
+
+    def find(self, prefix: str) -> set[str]:
+        node = self.root
+        for char in prefix:
+            child = node.children.get(char)
+            if child is None:
+                return set()
+            node = child
+        return node.symbols
+
+
+class SymbolIndex:
+    """in-memory typeahead over every company, by symbol prefix first and
+    then by company name word prefix, each ranked by all-time views
+
+    answers come from the tries under a lock, ranked results are cached
+    until the next change
+    """
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        self._symbols = PrefixTrie()
+        self._words = PrefixTrie()
+        self._names: dict[str, str | None] = {}
+        self._views: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._results: TTLCache[tuple[str, int], list[SymbolSearch]] = TTLCache(
+            ttl=settings.SYMBOL_INDEX_RELOAD_SECONDS, maxsize=maxsize
+        )
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _add(self, symbol: str, company_name: str | None) -> None:
+        self._names[symbol] = company_name
+        self._symbols.add(symbol, symbol)
+        for word in _words.findall(company_name or ""):
+            self._words.add(word.upper()[:MAX_WORD_PREFIX], symbol)
+
+    def add(
+        self,
+        symbol: str,
+        company_name: str | None = None,
+        views: int | None = None,
+    ) -> None:
+        """index a new company, or the new name of a known one"""
+        symbol = symbol.upper()
+        with self._lock:
+            self._add(symbol, company_name)
+            if views is not None:
+                self._views[symbol] = views
+        self._results.clear()
+
+    def add_views(self, counts: Mapping[str, int]) -> None:
+        """add flushed view counts of upper-case symbols"""
+        with self._lock:
+            for symbol, count in counts.items():
+                self._views[symbol] = self._views.get(symbol, 0) + count
+        self._results.clear()
+
+    def replace(self, rows: Iterable[tuple[str, str | None, int | None]]) -> None:
+        """swap the whole index for rows of symbol, company name, views"""
+        index = SymbolIndex()
+        for symbol, company_name, views in rows:
+            symbol = symbol.upper()
+            index._add(symbol, company_name)
+            index._views[symbol] = views or 0
+        with self._lock:
+            self._symbols, self._words = index._symbols, index._words
+            self._names, self._views = index._names, index._views
+            self.loaded = True
+        self._results.clear()
+
+    def _ranked(self, symbols: Iterable[str], limit: int) -> list[str]:
+        # views descending, then symbol, like the sql search
+        return heapq.nsmallest(
+            limit, symbols, key=lambda symbol: (-self._views.get(symbol, 0), symbol)
+        )
+
+    def _named(self, prefix: str, symbols: set[str]) -> Iterable[str]:
+        if len(prefix) <= MAX_WORD_PREFIX:
+            return symbols
+        return (
+            symbol
+            for symbol in symbols
+            if any(
+                word.upper().startswith(prefix)
+                for word in _words.findall(self._names.get(symbol) or "")
+            )
+        )
+
+    def search(self, prefix: str, limit: int) -> list[SymbolSearch]:
+        """companies whose symbol or a word of whose name starts with prefix
+
+        Args:
+            prefix (str): case-insensitive
+            limit (int): most results
+
+        Returns:
+            list[SymbolSearch]: symbol matches first, then name matches
+        """
+        key = (prefix.upper(), limit)
+        results = self._results.get(key)
+        if results is not None:
+            return results
+        prefix = key[0]
+        with self._lock:
+            by_symbol = self._symbols.find(prefix)
+            ranked = self._ranked(by_symbol, limit)
+            if len(ranked) < limit:
+                by_name = self._words.find(prefix[:MAX_WORD_PREFIX]) - by_symbol
+                ranked += self._ranked(
+                    self._named(prefix, by_name), limit - len(ranked)
+                )
+            results = [
+                SymbolSearch(
+                    symbol=symbol,
+                    count=self._views.get(symbol, 0),
+                    company_name=self._names.get(symbol),
+                )
+                for symbol in ranked
+            ]
+        self._results.set(key, results)
+        return results
+
+
+def symbol_index_rows(session: Session) -> list[Any]:
+    """symbol, company name and view count of every company"""
+    statement = select(Company.symbol, Company.company_name, View.count).outerjoin(
+        View, col(View.company_id) == col(Company.id)
+    )
+    return list(session.exec(statement))
+
+
+symbol_index = SymbolIndex()
@@ -0,0 +1,97 @@
+import functools
+from collections.abc import Callable, Hashable
+from typing import Any, TypeVar
+
+from app.core.config import settings
+from app.core.executor import run_blocking
+from app.core.httpcache import CachedBody
+from app.core.singleflight import SingleFlight
+from app.models.common import StatementInterval
+from app.services.yfdata import YFinFetch
+
+T = TypeVar("T")
+
+# (symbol, dataset, interval) -> upstream result, per worker process
+upstream_flight = SingleFlight(
+    ttl=settings.UPSTREAM_CACHE_TTL,
+    maxsize=settings.UPSTREAM_CACHE_MAXSIZE,
+    beta=settings.UPSTREAM_EARLY_REFRESH_BETA,
+)
+
+
+def symbol_tag(symbol: str) -> str:
+    """tag of every cached fetch of symbol"""
+    return f"symbol:{symbol.upper()}"
+
+
+def dataset_tag(dataset: str) -> str:
+    """tag of every cached fetch of dataset"""
+    return f"dataset:{dataset}"
+
+
+async def fetch_upstream(
+    symbol: str,
+    dataset: str,
+    interval: Hashable,
+    func: Callable[..., T],
+    *args: Any,
+    ttl: float | None = None,
+    **kwargs: Any,
+) -> T:
+    """run the blocking fetch func(*args, **kwargs) in the executor, once
+    for all concurrent requests of the same symbol, dataset and interval
+
+    Args:
+        symbol (str): case-insensitive, such as 'NVDA'
+        dataset (str): what func fetches, such as 'income_stmt'
+        interval (Hashable): statement or bar interval, or any other
+            option the result depends on
+        func (Callable[..., T]): blocking fetch
+        ttl (float | None): seconds to cache the result, defaults to
+            UPSTREAM_CACHE_TTL, 0 only coalesces
+
+    Returns:
+        T: shared between requests, not to be modified, tagged by
+            symbol_tag and dataset_tag
+    """
+    return await upstream_flight.run(
+        (symbol.upper(), dataset, interval),
+        functools.partial(run_blocking, func, *args, **kwargs),
+        ttl=ttl,
+        tags=(symbol_tag(symbol), dataset_tag(dataset)),
+    )
+
+
+def _statement_body(
+    symbol: str, report: str, interval: StatementInterval
+) -> CachedBody:
+    data = getattr(YFinFetch(symbol=symbol), f"get_{report}_report")(interval=interval)
+    # pydantic writes the pandas timestamps of the statement dates
+    return CachedBody.of(data.model_dump_json().encode())
+
+
+async def statement_body(
+    symbol: str, report: str, interval: StatementInterval
+) -> CachedBody:
+    """serialized statement report of symbol and its etag, such as report
+    'income_stmt' for YFinFetch.get_income_stmt_report
+    """
+    return await fetch_upstream(
+        symbol,
+        report,
+        interval,
+        _statement_body,
+        symbol,
+        report,
+        interval,
+        ttl=settings.STATEMENT_CACHE_TTL,
+    )
+
+
+def _key_stat(symbol: str, series: bool) -> Any:
+    return YFinFetch(symbol=symbol).get_key_stat(series=series)
+
+
+async def key_stat(symbol: str, series: bool = False) -> Any:
+    """key stats of symbol, optionally with the per-period ratio series"""
+    return await fetch_upstream(symbol, "keystat", series, _key_stat, symbol, series)
@@ -1,12 +1,14 @@
 # import logging
-from sqlmodel import Session, select
+from datetime import date, datetime
+from typing import Any
 
-from app.models.pathview import (
-    PathViewUpdate,
-    ViewDailyStatCreate,
-    ViewDailyStatSearch,
-)
-from app.models.relationships import View, ViewDailyStat
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlmodel import Session, col, delete, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.pathview import ViewDailyStatSearch
+from app.models.relationships import Company, View, ViewDailyStat, ViewTrendRollup
 
 # logging.basicConfig(
 #     filename="app/logs/app.log",
@@ -15,42 +17,217 @@ from app.models.relationships import View, ViewDailyStat
 # )
 # logger = logging.getLogger(__name__)
 
+# counts are only ever changed by these upserts: the addition happens in
+# the database, so concurrent writers in any worker never lose increments
+# and the first view of a symbol or day can not fail on the unique keys
+
+# longest /ticker_trend window kept in view_trend_rollups
+MAX_TREND_DAYS = 90
+
+# window w of a day counts the days after today - w
+_REBUILD_TREND_ROLLUPS = text(
+    """
+    INSERT INTO view_trend_rollups (window_days, company_id, symbol, count, as_of)
+    SELECT w.days, s.company_id, max(s.symbol), sum(s.count), :today
+    FROM view_daily_stats AS s
+    JOIN generate_series(1, CAST(:max_days AS integer)) AS w(days)
+        ON s.created_at > :today - w.days
+    WHERE s.created_at > :today - CAST(:max_days AS integer)
+    GROUP BY w.days, s.company_id
+    """
+)
+
+# new views are added to the windows of the last rebuild, its as_of kept so
+# that the rollover in roll_trend_rollups still sees the table as stale
+_INCREMENT_TREND_ROLLUPS = text(
+    """
+    WITH r AS (
+        SELECT coalesce(
+            (SELECT as_of FROM view_trend_rollups LIMIT 1), CAST(:today AS date)
+        ) AS as_of
+    )
+    INSERT INTO view_trend_rollups (window_days, company_id, symbol, count, as_of)
+    SELECT w.days, v.company_id, max(v.symbol), sum(v.count), max(r.as_of)
+    FROM unnest(
+        CAST(:company_ids AS bigint[]),
+        CAST(:symbols AS varchar[]),
+        CAST(:days AS date[]),
+        CAST(:counts AS bigint[])
+    ) AS v(company_id, symbol, created_at, count)
+    CROSS JOIN r
+    JOIN generate_series(1, CAST(:max_days AS integer)) AS w(days)
+        ON v.created_at > r.as_of - w.days
+    GROUP BY w.days, v.company_id
+    ON CONFLICT (window_days, company_id) DO UPDATE
+    SET count = view_trend_rollups.count + excluded.count
+    """
+)
 
-def create_view(*, session: Session, view_in: View) -> View:
-    view = View.model_validate(
-        view_in,
-        update={
-            "count": 1,
+# increments take it shared and never wait on each other, only on the
+# once-a-day rebuild, which takes it exclusive so that no increment lands
+# between its delete and insert; held until commit, across workers
+_LOCK_TREND_ROLLUPS_SHARED = text(
+    "SELECT pg_advisory_xact_lock_shared(hashtext('view_trend_rollups'))"
+)
+_LOCK_TREND_ROLLUPS = text(
+    "SELECT pg_advisory_xact_lock(hashtext('view_trend_rollups'))"
+)
+
+
+def _view_counts_upsert(rows: list[dict[str, Any]], updated_at: datetime) -> Insert:
+    statement = insert(View).values(
+        [{**row, "created_at": updated_at, "updated_at": updated_at} for row in rows]
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[col(View.symbol)],
+        set_={
+            "count": col(View.count) + statement.excluded.count,
+            "updated_at": statement.excluded.updated_at,
         },
     )
+
+
+def _daily_stats_upsert(rows: list[dict[str, Any]]) -> Insert:
+    statement = insert(ViewDailyStat).values(rows)
+    return statement.on_conflict_do_update(
+        constraint="uniq_vds_created_company",
+        set_={"count": col(ViewDailyStat.count) + statement.excluded.count},
+    )
+
+
+def increment_view(
+    *,
+    session: Session,
+    symbol: str,
+    path: str,
+    company_id: int,
+    by: int = 1,
+) -> int:
+    """add to the all-time view count of symbol, created on its first view
+
+    Args:
+        session (Session): database session, committed
+        symbol (str): upper-case symbol
+        path (str): route path, kept from the first view
+        company_id (int): company of the symbol
+        by (int): views to add
+
+    Returns:
+        int: view count after the increment
+    """
+    statement = _view_counts_upsert(
+        [{"symbol": symbol, "path": path, "company_id": company_id, "count": by}],
+        updated_at=datetime.now(),
+    ).returning(col(View.count))
     try:
-        session.add(view)
+        count: int = session.execute(statement).scalar_one()
         session.commit()
-        session.refresh(view)
-    except Exception as e:
+    except Exception:
         session.rollback()
-        print("Error creating view:", e)
+        raise
 
-    return view
+    return count
 
 
-def update_view(
+def increment_daily_stat(
     *,
     session: Session,
-    db_view: View,
-    view_in: PathViewUpdate,
-) -> View:
-    view_data = view_in.model_dump(exclude_unset=True)
-    db_view.sqlmodel_update(view_data)
+    symbol: str,
+    company_id: int,
+    day: date | None = None,
+    by: int = 1,
+) -> int:
+    """add to the view count of a company on a day, created on its first view
+
+    Args:
+        session (Session): database session, committed
+        symbol (str): upper-case symbol
+        company_id (int): company of the symbol
+        day (date | None): defaults to today
+        by (int): views to add
+
+    Returns:
+        int: view count of the day after the increment
+    """
+    statement = _daily_stats_upsert(
+        [
+            {
+                "symbol": symbol,
+                "company_id": company_id,
+                "created_at": day or date.today(),
+                "count": by,
+            }
+        ]
+    ).returning(col(ViewDailyStat.count))
     try:
-        session.add(db_view)
+        count: int = session.execute(statement).scalar_one()
+        add_trend_rollups(
+            session=session,
+            rows=[
+                {
+                    "symbol": symbol,
+                    "company_id": company_id,
+                    "created_at": day or date.today(),
+                    "count": by,
+                }
+            ],
+        )
         session.commit()
-        session.refresh(db_view)
-    except Exception as e:
+    except Exception:
         session.rollback()
-        print("Error updating view:", e)
+        raise
+
+    return count
+
+
+async def increment_view_async(
+    *,
+    session: AsyncSession,
+    symbol: str,
+    path: str,
+    company_id: int,
+    by: int = 1,
+) -> int:
+    """increment_view on an async session"""
+    statement = _view_counts_upsert(
+        [{"symbol": symbol, "path": path, "company_id": company_id, "count": by}],
+        updated_at=datetime.now(),
+    ).returning(col(View.count))
+    try:
+        count: int = (await session.execute(statement)).scalar_one()
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
 
-    return db_view
+    return count
+
+
+async def increment_daily_stat_async(
+    *,
+    session: AsyncSession,
+    symbol: str,
+    company_id: int,
+    day: date | None = None,
+    by: int = 1,
+) -> int:
+    """increment_daily_stat on an async session"""
+    row = {
+        "symbol": symbol,
+        "company_id": company_id,
+        "created_at": day or date.today(),
+        "count": by,
+    }
+    statement = _daily_stats_upsert([row]).returning(col(ViewDailyStat.count))
+    try:
+        count: int = (await session.execute(statement)).scalar_one()
+        await session.run_sync(lambda sync: add_trend_rollups(session=sync, rows=[row]))
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+
+    return count
 
 
 def daily_stat_on_date(
@@ -65,36 +242,112 @@ def daily_stat_on_date(
     return result
 
 
-def create_daily_stat(
+def company_ids(*, session: Session, symbols: list[str]) -> dict[str, int]:
+    """ids of the companies of upper-case symbols, in one query"""
+    statement = select(Company.id, Company.symbol).where(
+        col(Company.symbol).in_(symbols)
+    )
+    return {symbol: company_id for company_id, symbol in session.exec(statement)}
+
+
+def upsert_view_counts(
     *,
     session: Session,
-    stat_in: ViewDailyStatCreate,
-) -> ViewDailyStat:
-    stat = ViewDailyStat.model_validate(stat_in, update={})
-    try:
-        session.add(stat)
-        session.commit()
-        session.refresh(stat)
-    except Exception as e:
-        session.rollback()
-        print("Error creating stat:", e)
+    rows: list[dict[str, Any]],
+    updated_at: datetime,
+) -> None:
+    """add counts to view_counts in one statement, new symbols are inserted
 
-    return stat
+    Args:
+        session (Session): caller commits
+        rows (list[dict[str, Any]]): symbol, path, company_id, count
+        updated_at (datetime): time of the flush
+    """
+    if rows:
+        session.execute(_view_counts_upsert(rows, updated_at))
 
 
-def update_daily_stat(
+def upsert_daily_stats(
     *,
     session: Session,
-    stat: ViewDailyStat,
-) -> ViewDailyStat:
-    stat.count = stat.count + 1
+    rows: list[dict[str, Any]],
+) -> None:
+    """add counts to view_daily_stats in one statement, keyed by
+    uniq_vds_created_company
 
-    try:
-        session.add(stat)
-        session.commit()
-        session.refresh(stat)
-    except Exception as e:
-        session.rollback()
-        print("Error updating u_stat:", e)
+    Args:
+        session (Session): caller commits
+        rows (list[dict[str, Any]]): symbol, company_id, created_at, count
+    """
+    if rows:
+        session.execute(_daily_stats_upsert(rows))
+
+
+def trend_rollups_as_of(*, session: Session) -> date | None:
+    """day of the last rebuild of view_trend_rollups, None when empty"""
+    statement = select(ViewTrendRollup.as_of).limit(1)
+    return session.exec(statement).first()
+
+
+def rebuild_trend_rollups(*, session: Session, today: date | None = None) -> None:
+    """recompute view_trend_rollups from the last 90 days of
+    view_daily_stats, caller commits
+    """
+    session.execute(delete(ViewTrendRollup))
+    session.execute(
+        _REBUILD_TREND_ROLLUPS,
+        {"today": today or date.today(), "max_days": MAX_TREND_DAYS},
+    )
+
+
+def add_trend_rollups(
+    *,
+    session: Session,
+    rows: list[dict[str, Any]],
+    today: date | None = None,
+) -> None:
+    """add daily view counts to the rolling windows of view_trend_rollups,
+    the windows only move forward in roll_trend_rollups
+
+    Args:
+        session (Session): caller commits, the rows must already be in
+            view_daily_stats within the same transaction
+        rows (list[dict[str, Any]]): symbol, company_id, created_at, count
+        today (date | None): as_of of the first rollups, defaults to today
+    """
+    if not rows:
+        return
+    session.execute(_LOCK_TREND_ROLLUPS_SHARED)
+    session.execute(
+        _INCREMENT_TREND_ROLLUPS,
+        {
+            "today": today or date.today(),
+            "max_days": MAX_TREND_DAYS,
+            "company_ids": [row["company_id"] for row in rows],
+            "symbols": [row["symbol"] for row in rows],
+            "days": [row["created_at"] for row in rows],
+            "counts": [row["count"] for row in rows],
+        },
+    )
+
+
+def roll_trend_rollups(*, session: Session, today: date | None = None) -> bool:
+    """rebuild view_trend_rollups once a day so that the windows move
+    forward, run by the view flusher off the per-view path
+
+    Args:
+        session (Session): caller commits
+        today (date | None): defaults to today
 
-    return stat
+    Returns:
+        bool: whether the rollups were rebuilt
+    """
+    today = today or date.today()
+    if trend_rollups_as_of(session=session) == today:
+        return False
+    session.execute(_LOCK_TREND_ROLLUPS)
+    # another worker may have rebuilt them while this one waited
+    if trend_rollups_as_of(session=session) == today:
+        return False
+    rebuild_trend_rollups(session=session, today=today)
+    return True
@@ -0,0 +1,194 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import yfinance as yf  # type: ignore
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.models.common import HistoryPeriod
+from app.models.keystats import Growth, KeyStat, KeyStatBatch, Profitbility
+from app.services.ratios import (
+    RatioEngine,
+    growth_ratios,
+    latest,
+    profitability_ratios,
+    safe_divide,
+)
+from app.services.yfdata import StatementBundle
+from app.services.yfsession import yf_sessions
+
+SYMBOL_PATTERN = re.compile("^[a-zA-Z]+$")
+# statement fetches of every batch, run from blocking executor threads
+statement_pool = ThreadPoolExecutor(
+    max_workers=settings.YF_BATCH_WORKERS, thread_name_prefix="yfbatch"
+)
+
+
+def parse_symbols(symbols: str) -> tuple[list[str], dict[str, str]]:
+    """split a comma separated symbol list, upper-cased and deduplicated
+
+    Args:
+        symbols (str): such as 'AAPL,msft, NVDA'
+
+    Returns:
+        tuple[list[str], dict[str, str]]: valid symbols, invalid symbol -> error
+    """
+    valid: list[str] = []
+    errors: dict[str, str] = {}
+    for raw in symbols.split(","):
+        symbol = raw.strip().upper()
+        if not symbol or symbol in valid:
+            continue
+        if len(symbol) > 10 or not SYMBOL_PATTERN.match(symbol):
+            errors[symbol] = "invalid symbol"
+        else:
+            valid.append(symbol)
+    if len(valid) > settings.YF_BATCH_MAX_SYMBOLS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"at most {settings.YF_BATCH_MAX_SYMBOLS} symbols per request",
+        )
+
+    return valid, errors
+
+
+def stack_periods(matrices: list[np.ndarray]) -> np.ndarray:
+    """stack (items, periods) matrices of several symbols into one
+    (items, symbols, periods) array, padding short histories with NaN
+    """
+    periods = max(m.shape[-1] for m in matrices)
+    out = np.full(
+        (matrices[0].shape[0], len(matrices), periods), np.nan, dtype=np.float64
+    )
+    for i, matrix in enumerate(matrices):
+        out[:, i, : matrix.shape[-1]] = matrix
+    return out
+
+
+def rps_cagr(
+    opens: pd.DataFrame,
+    closes: pd.DataFrame,
+    period: HistoryPeriod,
+) -> np.ndarray:
+    """rps = (Ending value/Beginning value)**1/n - 1 for every symbol
+
+    Args:
+        opens (pd.DataFrame): daily open prices, dates x symbols
+        closes (pd.DataFrame): daily close prices, dates x symbols
+        period (HistoryPeriod): trailing period
+
+    Returns:
+        np.ndarray: cagr of shape (symbols,), NaN where there is no history
+    """
+    if closes.empty:
+        return np.full(len(closes.columns), np.nan)
+    start = closes.index[-1] - pd.Timedelta(days=period.value.days)
+    window_open = opens.loc[start:].bfill().iloc[0].to_numpy(dtype=np.float64)
+    last_close = closes.ffill().iloc[-1].to_numpy(dtype=np.float64)
+    num_year = max(period.value.days // 365, 1)
+
+    return np.power(safe_divide(last_close, window_open), 1 / num_year) - 1
+
+
+class YFinBatchFetch:
+    """key stats of several symbols: price history in one bulk download,
+    statements fetched concurrently, ratios computed in one vectorized pass
+    """
+
+    def __init__(self, symbols: list[str]) -> None:
+        self.symbols: list[str] = symbols
+        self.errors: dict[str, str] = {}
+
+    def _fetch_statements(self, symbol: str) -> tuple[pd.DataFrame, pd.DataFrame]:
+        bundle = StatementBundle(yf.Ticker(symbol, session=yf_sessions.session), symbol)
+        return bundle.income_stmt(), bundle.balance_sheet()
+
+    def _fetch_engines(self) -> dict[str, RatioEngine]:
+        engines: dict[str, RatioEngine] = {}
+        futures = {
+            symbol: statement_pool.submit(self._fetch_statements, symbol)
+            for symbol in self.symbols
+        }
+        for symbol, future in futures.items():
+            try:
+                fin_stmt, bal_stmt = future.result()
+                engines[symbol] = RatioEngine(fin_stmt, bal_stmt)
+            except HTTPException as e:
+                self.errors[symbol] = str(e.detail)
+            except Exception as e:
+                self.errors[symbol] = str(e) or e.__class__.__name__
+        return engines
+
+    def _fetch_prices(self, symbols: list[str]) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """daily opens and closes of the symbols in one bulk download, the
+        symbols without any price recorded in errors
+        """
+        try:
+            data: pd.DataFrame = yf.download(
+                symbols,
+                period=HistoryPeriod.MAX.value.label,
+                interval="1d",
+                group_by="column",
+                auto_adjust=True,
+                progress=False,
+                session=yf_sessions.session,
+            )
+        except Exception as e:
+            reason = str(e) or e.__class__.__name__
+            for symbol in symbols:
+                self.errors[symbol] = f"price download failed: {reason}"
+            empty = pd.DataFrame(columns=symbols, dtype=np.float64)
+            return empty, empty
+        if data.empty:
+            opens = closes = pd.DataFrame(columns=symbols, dtype=np.float64)
+        else:
+            if not isinstance(data.columns, pd.MultiIndex):
+                # yfinance returns flat columns for a single ticker
+                data.columns = pd.MultiIndex.from_product([data.columns, symbols])
+            opens = data["Open"].reindex(columns=symbols)
+            closes = data["Close"].reindex(columns=symbols)
+        # yfinance leaves the columns of failed tickers empty instead of raising
+        for symbol in closes.columns[closes.isna().all()]:
+            self.errors[symbol] = f"no price history for {symbol}"
+
+        return opens, closes
+
+    def get_key_stats(self) -> KeyStatBatch:
+        engines = self._fetch_engines()
+        symbols = list(engines)
+        if not symbols:
+            return KeyStatBatch(data={}, errors=self.errors)
+
+        inc = stack_periods([engines[s].inc for s in symbols])
+        # balance matrices are aligned to income periods, shapes match
+        bal = stack_periods([engines[s].bal for s in symbols])
+
+        profit = {k: latest(v) for k, v in profitability_ratios(inc, bal).items()}
+        growth = {
+            k: latest(v) for k, v in growth_ratios(inc, RatioEngine.GROWTH_LAGS).items()
+        }
+        opens, closes = self._fetch_prices(symbols)
+        rps_3y = latest(rps_cagr(opens, closes, HistoryPeriod.THREE_YEAR)[:, None])
+        rps_10y = latest(rps_cagr(opens, closes, HistoryPeriod.TEN_YEAR)[:, None])
+
+        data: dict[str, KeyStat] = {}
+        for i, symbol in enumerate(symbols):
+            if symbol in self.errors:
+                continue
+            data[symbol] = KeyStat(
+                growth=Growth(
+                    rev_1y=float(growth["rev_1y"][i]),
+                    rps_3y_cagr=float(rps_3y[i]),
+                    rps_10y_cagr=float(rps_10y[i]),
+                    eps_1y=float(growth["eps_1y"][i]),
+                    eps_3y_cagr=float(growth["eps_3y_cagr"][i]),
+                    eps_10y_cagr=0.0,
+                ),
+                profit=Profitbility(
+                    **{name: float(values[i]) for name, values in profit.items()}
+                ),
+            )
+
+        return KeyStatBatch(data=data, errors=self.errors)
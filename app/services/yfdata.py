@@ -1,26 +1,164 @@
+from datetime import date
 from typing import Any
 from fastapi import HTTPException, status
 import numpy as np
 import pandas as pd
-
-from requests_cache import SQLiteCache  # type: ignore
-from requests_ratelimiter import MemoryQueueBucket
-from pyrate_limiter import Duration, Limiter, RequestRate
 import yfinance as yf  # type: ignore
 
 # from app.api.decorators import ApiDecorator
 from app.models.common import HistoryPeriod, StatementInterval
 from app.models.history import PeriodData
-from app.models.keystats import Growth, Profitbility
+from app.models.keystats import (
+    Growth,
+    GrowthSeries,
+    KeyStat,
+    Profitbility,
+    ProfitbilitySeries,
+)
 from app.models.stock import (
     BalanceSheet,
     CashCapital,
     CashFlow,
+    Fundamentals,
     GrossProfit,
     IncomeStmt,
     NetIncome,
 )
 from app.services.common import CachedLimiterSession, DataErrorDetector
+from app.services.ohlcv import ohlcv_store
+from app.services.ratios import RatioEngine, as_series, latest
+from app.services.yfsession import yf_sessions
+
+
+class StatementBundle:
+    """dataframes of one symbol, each fetched from upstream at most once
+
+    yearly/quarterly income, balance and cashflow statements are memoized
+    per interval, shorter daily history periods are sliced in memory from
+    the max period daily history
+    """
+
+    def __init__(self, ticker: yf.Ticker, symbol: str) -> None:
+        self._ticker = ticker
+        self._symbol = symbol
+        self._statements: dict[tuple[str, StatementInterval], pd.DataFrame] = {}
+        self._history: pd.DataFrame | None = None
+
+    def _statement(
+        self,
+        kind: str,
+        interval: StatementInterval,
+    ) -> pd.DataFrame:
+        key = (kind, interval)
+        if key not in self._statements:
+            attr = kind if interval == StatementInterval.YEARLY else f"quarterly_{kind}"
+            data: pd.DataFrame = getattr(self._ticker, attr)
+            if data.empty:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"empty {kind} for {self._symbol}",
+                )
+            self._statements[key] = data
+        return self._statements[key]
+
+    def income_stmt(
+        self, interval: StatementInterval = StatementInterval.YEARLY
+    ) -> pd.DataFrame:
+        return self._statement("income_stmt", interval)
+
+    def balance_sheet(
+        self, interval: StatementInterval = StatementInterval.YEARLY
+    ) -> pd.DataFrame:
+        return self._statement("balance_sheet", interval)
+
+    def cashflow(
+        self, interval: StatementInterval = StatementInterval.YEARLY
+    ) -> pd.DataFrame:
+        return self._statement("cashflow", interval)
+
+    def _fetch_history(self, start: date | None) -> pd.DataFrame:
+        if start is None:
+            return self._ticker.history(
+                period=HistoryPeriod.MAX.value.label, interval="1d"
+            )
+        return self._ticker.history(start=start, interval="1d")
+
+    @property
+    def history(self) -> pd.DataFrame:
+        """max period daily history, served from the local bar store"""
+        if self._history is None:
+            data = ohlcv_store.history(self._symbol, self._fetch_history)
+            if data.empty:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"empty history for {self._symbol}",
+                )
+            self._history = data
+        return self._history
+
+    def history_slice(self, period: HistoryPeriod) -> pd.DataFrame:
+        """daily history of period, sliced from the max period history
+
+        Args:
+            period (HistoryPeriod): period
+
+        Returns:
+            pd.DataFrame: view on the memoized max history
+        """
+        (start,) = period_starts(self.history.index, [period])
+        return self.history.iloc[start:]
+
+
+def period_starts(index: pd.Index, periods: list[HistoryPeriod]) -> list[int]:
+    """first row of each period in a sorted datetime index
+
+    intraday periods and max cover the whole index, ytd starts on january
+    1st of the latest row's year, others go back the period's days
+    """
+    index = pd.DatetimeIndex(index)
+    if len(index) == 0:
+        return [0] * len(periods)
+    latest_day = index[-1]
+    targets = []
+    for period in periods:
+        if period.value.label in ["1d", "5d", "15d", "max"]:
+            targets.append(index[0])
+        elif period.value.label == "ytd":
+            targets.append(latest_day.normalize().replace(month=1, day=1))
+        else:
+            targets.append(latest_day - np.timedelta64(period.value.days, "D"))
+    starts = np.searchsorted(index.asi8, pd.DatetimeIndex(targets).asi8, side="left")
+    return starts.tolist()
+
+
+def iso_dates(index: pd.Index) -> list[str]:
+    """ISO 8601 strings of a datetime index, formatted in numpy instead of
+    one tz-aware datetime object per row, same output as pydantic
+    """
+    index = pd.DatetimeIndex(index)
+    if index.tz is None:
+        return np.datetime_as_string(index.to_numpy(), unit="s").tolist()
+    local = index.tz_localize(None)
+    dates = np.datetime_as_string(local.to_numpy(), unit="s")
+    offsets = (local.asi8 - index.asi8) // 60_000_000_000
+    suffixes: dict[int, str] = {}
+    for offset in np.unique(offsets).tolist():
+        sign = "+" if offset >= 0 else "-"
+        hours, minutes = divmod(abs(offset), 60)
+        suffixes[offset] = f"{sign}{hours:02d}:{minutes:02d}" if offset else "Z"
+    return [
+        d + suffixes[o] for d, o in zip(dates.tolist(), offsets.tolist(), strict=True)
+    ]
+
+
+def epoch_seconds(index: pd.Index) -> np.ndarray:
+    """int64 seconds since epoch (UTC) of a datetime index"""
+    return pd.DatetimeIndex(index).asi8 // 1_000_000_000
+
+
+def _column(data: pd.DataFrame, column: str) -> np.ndarray:
+    """contiguous float64 array of a dataframe column, no python floats"""
+    return np.ascontiguousarray(data[column].to_numpy(dtype=np.float64))
 
 
 class YFinFetch:
@@ -34,16 +172,11 @@ class YFinFetch:
         # )
         self._symbol: str = symbol
 
-        # set cache
-        self.session: CachedLimiterSession = CachedLimiterSession(
-            limiter=Limiter(
-                RequestRate(10, Duration.MINUTE * 10)
-            ),  # max 10 requests per 10 minutes
-            bucket_class=MemoryQueueBucket,
-            backend=SQLiteCache("app/data/cache/yfinance.cache"),
-        )
-        # self.session = None
+        # borrow the process-wide session: shared cache and rate limit
+        self.session: CachedLimiterSession = yf_sessions.session
         self._ticker: yf.Ticker = self._get_ticker()
+        self.bundle: StatementBundle = StatementBundle(self._ticker, self._symbol)
+        self._ratio_engine: RatioEngine | None = None
 
     @property
     def symbol(self) -> str:
@@ -82,64 +215,33 @@ class YFinFetch:
         return data
 
     def _get_financials(self) -> pd.DataFrame:
-        data: pd.DataFrame = self.ticker.financials
-        if data.empty:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"empty finanials for {self.symbol}",
-            )
-        return data
+        return self.bundle.income_stmt()
 
     def _get_balance_sheet(
         self,
         interval: StatementInterval = StatementInterval.YEARLY,
     ) -> pd.DataFrame:
-        if interval == StatementInterval.YEARLY:
-            data: pd.DataFrame = self.ticker.balance_sheet
-        else:
-            data = self.ticker.quarterly_balance_sheet
-        if data.empty:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"empty balance sheet for {self.symbol}",
-            )
-        return data
+        return self.bundle.balance_sheet(interval)
 
     def _get_income_stmt(
         self,
         interval: StatementInterval = StatementInterval.YEARLY,
     ) -> pd.DataFrame:
-        if interval == StatementInterval.YEARLY:
-            data: pd.DataFrame = self.ticker.income_stmt
-        else:
-            data = self.ticker.quarterly_income_stmt
-        if data.empty:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"empty finanials for {self.symbol}",
-            )
-        return data
+        return self.bundle.income_stmt(interval)
 
     def _get_cashflow_stmt(
         self,
         interval: StatementInterval = StatementInterval.YEARLY,
     ) -> pd.DataFrame:
-        if interval == StatementInterval.YEARLY:
-            data: pd.DataFrame = self.ticker.cashflow
-        else:
-            data = self.ticker.quarterly_cashflow
-        if data.empty:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"empty finanials for {self.symbol}",
-            )
-        return data
+        return self.bundle.cashflow(interval)
 
     def get_history(
         self,
         period: HistoryPeriod = HistoryPeriod.MAX,
         interval: str = "1d",
     ) -> pd.DataFrame:
+        if interval == "1d":
+            return self.bundle.history_slice(period)
         data: pd.DataFrame = self.ticker.history(
             period=period.value.label, interval=interval
         )
@@ -150,51 +252,16 @@ class YFinFetch:
             )
         return data
 
-    def _get_rev_growh(
-        self,
-        fin_stmt: pd.DataFrame,
-        num_year: int,
-    ) -> float:
-        if num_year > len(fin_stmt.columns):
-            num_year = len(fin_stmt.columns) - 1
-            # raise ApiException(
-            #     f"number of year shall be less than {len(fin_stmt.columns)}",
-            #     self._get_rev_growh.__name__,
-            # )
-        if not DataErrorDetector.check_index_exists(
-            idx=["Total Revenue"],
-            idx_total=fin_stmt.index.to_list(),
-        ):
-            return 0.0
-        if pd.isna(
-            [
-                fin_stmt.loc["Total Revenue"].values[0],
-                fin_stmt.loc["Total Revenue"].values[num_year],
-            ]
-        ).any():
-            fin_stmt.bfill(axis=0, inplace=True)
-        try:
-            rev: float = (
-                fin_stmt.loc["Total Revenue", :].values[0]
-                - fin_stmt.loc["Total Revenue"].values[num_year]
-            ) / fin_stmt.loc["Total Revenue"].values[0]
-        except (KeyError, ZeroDivisionError) as e:
-            print("exception caught: ", e)
-            rev = 0.0
-
-        return rev
-
-    def _get_volitality(self, period: HistoryPeriod) -> float:
+    def _volitality(self, hist_data: pd.DataFrame) -> float:
         # volitality = ((Recent Close value - Beginning value)
         # / Recent Close Value) * 100
-        hist_data: pd.DataFrame = self.ticker.history(period.value.label)
         if pd.isna(
             [
                 hist_data.iloc[-1]["Open"],
                 hist_data.iloc[0]["Open"],
             ]
         ).any():
-            hist_data.bfill(axis=1, inplace=True)
+            hist_data = hist_data.bfill(axis=1)
         try:
             vlt: float = (
                 hist_data.iloc[-1]["Open"] - hist_data.iloc[0]["Open"]
@@ -207,7 +274,7 @@ class YFinFetch:
 
     def _get_rps_cagr(self, period: HistoryPeriod) -> float:
         # rps = ((Ending value/Beginning value)**1/n -1) * 100
-        hist_data: pd.DataFrame = self.ticker.history(period.value.label)
+        hist_data: pd.DataFrame = self.bundle.history_slice(period)
         num_year: int = period.value.days // 365
         if pd.isna(
             [
@@ -215,7 +282,7 @@ class YFinFetch:
                 hist_data.iloc[0]["Open"],
             ]
         ).any():
-            hist_data.bfill(axis=1, inplace=True)
+            hist_data = hist_data.bfill(axis=1)
         try:
             rps: float = (hist_data.iloc[-1]["Close"] / hist_data.iloc[0]["Open"]) ** (
                 1 / num_year
@@ -226,296 +293,60 @@ class YFinFetch:
 
         return rps
 
-    def _get_eps(self, fin_stmt: pd.DataFrame, num_year: int = 1) -> float:
-        # eps =
-        if num_year > len(fin_stmt.columns):
-            num_year = len(fin_stmt.columns) - 1
-            # raise ApiException(
-            #     f"number of year shall be less than {len(fin_stmt.columns)}",
-            #     self._get_eps.__name__,
-            # )
-        if not DataErrorDetector.check_index_exists(
-            idx=["Basic EPS"],
-            idx_total=fin_stmt.index.to_list(),
-        ):
-            return 0.0
-        if pd.isna(
-            [
-                fin_stmt.loc["Basic EPS"].values[0],
-                fin_stmt.loc["Basic EPS"].values[num_year],
-            ]
-        ).any():
-            fin_stmt.bfill(axis=0, inplace=True)
-        try:
-            eps: float = (
-                fin_stmt.loc["Basic EPS"].values[0]
-                - fin_stmt.loc["Basic EPS"].values[num_year]
-            ) / fin_stmt.loc["Basic EPS"].values[0]
-        except (KeyError, ZeroDivisionError) as e:
-            print("exception caught: ", e)
-            eps = 0.0
-
-        return eps
+    @property
+    def ratio_engine(self) -> RatioEngine:
+        if self._ratio_engine is None:
+            self._ratio_engine = RatioEngine(
+                fin_stmt=self._get_financials(),
+                bal_stmt=self._get_balance_sheet(),
+            )
+        return self._ratio_engine
+
+    def get_key_stat(self, series: bool = False) -> KeyStat:
+        return KeyStat(
+            growth=self.get_growth(),
+            profit=self.get_profit(),
+            growth_series=self.get_growth_series() if series else None,
+            profit_series=self.get_profit_series() if series else None,
+        )
 
     def get_growth(self) -> Growth:
-        fin_stmt = self._get_financials()
-        rev_1y = self._get_rev_growh(fin_stmt, num_year=1)
+        growth = self.ratio_engine.growth()
         rps_y3 = self._get_rps_cagr(HistoryPeriod.THREE_YEAR)
         rps_y10 = self._get_rps_cagr(HistoryPeriod.TEN_YEAR)
-        eps_1y = self._get_eps(fin_stmt=fin_stmt, num_year=1)
-        eps_3y_cagr = self._get_eps(fin_stmt=fin_stmt, num_year=3)
-        # num_eps_10y = len(fin_stmt.columns)
-        # if len(fin_stmt.columns) < 10
-        # else 10
-        eps_10y_cagr = 0
 
         return Growth(
-            rev_1y=round(rev_1y * 100, 2),
+            rev_1y=float(latest(growth["rev_1y"])),
             rps_3y_cagr=round(rps_y3 * 100, 2),
             rps_10y_cagr=round(rps_y10 * 100, 2),
-            eps_1y=round(eps_1y * 100, 2),
-            eps_3y_cagr=round(eps_3y_cagr * 100, 2),
-            eps_10y_cagr=round(eps_10y_cagr * 100, 2),
+            eps_1y=float(latest(growth["eps_1y"])),
+            eps_3y_cagr=float(latest(growth["eps_3y_cagr"])),
+            eps_10y_cagr=0.0,
         )
 
-    def _get_gross_profit_margin(self, fin_stmt: pd.DataFrame) -> float:
-        # gross_profit_margin = (gross_profit / revenue)
-        if not DataErrorDetector.check_index_exists(
-            idx=["Gross Profit", "Total Revenue"],
-            idx_total=fin_stmt.index.to_list(),
-        ):
-            return 0.0
-        if pd.isna(
-            [
-                fin_stmt.loc["Gross Profit"].values[0],
-                fin_stmt.loc["Total Revenue"].values[0],
-            ]
-        ).any():
-            fin_stmt.bfill(axis=0, inplace=True)
-        try:
-            gross_profit_margin: float = (
-                fin_stmt.loc["Gross Profit"].values[0]
-                / fin_stmt.loc["Total Revenue"].values[0]
-            )
-        except (KeyError, ZeroDivisionError) as e:
-            print("exception caught: ", e)
-            gross_profit_margin = 0.0
-
-        return gross_profit_margin
-
-    def _get_cogs(self, fin_stmt: pd.DataFrame) -> float:
-        # COGS=Revenue×(1−Gross_Profit_Margin)
-        if not DataErrorDetector.check_index_exists(
-            idx=["Total Revenue"],
-            idx_total=fin_stmt.index.to_list(),
-        ):
-            return 0.0
-        if pd.isna(fin_stmt.loc["Total Revenue"].values[0]):
-            fin_stmt.bfill(axis=0, inplace=True)
-        try:
-            cogs: float = fin_stmt.loc["Total Revenue"].values[0] / (
-                1 - self._get_gross_profit_margin(fin_stmt)
-            )
-        except (KeyError, ZeroDivisionError) as e:
-            print("exception caught: ", e)
-            cogs = 0.0
-
-        return cogs
-
-    def _get_gross_margin(self, fin_stmt: pd.DataFrame) -> float:
-        # gross_margin = ((revenue - cogs) / revenue)
-        if not DataErrorDetector.check_index_exists(
-            idx=["Total Revenue"],
-            idx_total=fin_stmt.index.to_list(),
-        ):
-            return 0.0
-        if pd.isna(fin_stmt.loc["Total Revenue"].values[0]):
-            fin_stmt.bfill(axis=0, inplace=True)
-        try:
-            gross_margin: float = 1 - (
-                self._get_cogs(fin_stmt) / fin_stmt.loc["Total Revenue"].values[0]
-            )
-        except (KeyError, ZeroDivisionError) as e:
-            print("exception caught: ", e)
-            gross_margin = 0.0
-
-        return gross_margin
-
-    def _get_op_inc_margin(self, fin_stmt: pd.DataFrame) -> float:
-        # Op Inc Margin = operating income / total revenue
-        if not DataErrorDetector.check_index_exists(
-            idx=["Total Revenue", "Operating Income"],
-            idx_total=fin_stmt.index.to_list(),
-        ):
-            return 0.0
-        if pd.isna(
-            [
-                fin_stmt.loc["Total Revenue"].values[0],
-                fin_stmt.loc["Operating Income"].values[0],
-            ]
-        ).any():
-            fin_stmt.bfill(axis=0, inplace=True)
-        try:
-            op_inc_margin: float = (
-                fin_stmt.loc["Operating Income"].values[0]
-                / fin_stmt.loc["Total Revenue"].values[0]
-            )
-        except (KeyError, ZeroDivisionError) as e:
-            print("exception caught: ", e)
-            op_inc_margin = 0.0
-
-        return op_inc_margin
-
-    def _get_profit_margin(self, fin_stmt: pd.DataFrame) -> float:
-        # profit_margin = (net_income / revenue)
-        if not DataErrorDetector.check_index_exists(
-            idx=["Total Revenue", "Net Income"],
-            idx_total=fin_stmt.index.to_list(),
-        ):
-            return 0.0
-        if pd.isna(
-            [
-                fin_stmt.loc["Total Revenue"].values[0],
-                fin_stmt.loc["Net Income"].values[0],
-            ]
-        ).any():
-            fin_stmt.bfill(axis=0, inplace=True)
-        try:
-            profit_margin: float = (
-                fin_stmt.loc["Net Income"].values[0]
-                / fin_stmt.loc["Total Revenue"].values[0]
-            )
-        except (KeyError, ZeroDivisionError) as e:
-            print("exception caught: ", e)
-            profit_margin = 0.0
-
-        return profit_margin
-
-    def _get_roe(
-        self,
-        fin_stmt: pd.DataFrame,
-        bal_stmt: pd.DataFrame,
-    ) -> float:
-        # roe = (net_income / shareholders_equity)
-        if not DataErrorDetector.check_index_exists(
-            idx=["Stockholders Equity", "Net Income"],
-            idx_total=fin_stmt.index.to_list(),
-        ):
-            return 0.0
-        if pd.isna(
-            [
-                bal_stmt.loc["Stockholders Equity"].values[0],
-                fin_stmt.loc["Net Income"].values[0],
-            ]
-        ).any():
-            fin_stmt.bfill(axis=0, inplace=True)
-            bal_stmt.bfill(axis=0, inplace=True)
-        try:
-            roe: float = (
-                fin_stmt.loc["Net Income"].values[0]
-                / bal_stmt.loc["Stockholders Equity"].values[0]
-            )
-        except (KeyError, ZeroDivisionError) as e:
-            print("exception caught: ", e)
-            roe = 0.0
-
-        return roe
+    def get_profit(self) -> Profitbility:
+        profit = self.ratio_engine.profitability()
 
-    def _get_roa(
-        self,
-        fin_stmt: pd.DataFrame,
-        bal_stmt: pd.DataFrame,
-    ) -> float:
-        # roa = (net_income / total_assets)
-        if not DataErrorDetector.check_index_exists(
-            idx=["Total Assets", "Net Income"],
-            idx_total=fin_stmt.index.to_list(),
-        ):
-            return 0.0
-        if pd.isna(
-            [
-                bal_stmt.loc["Total Assets"].values[0],
-                fin_stmt.loc["Net Income"].values[0],
-            ]
-        ).any():
-            fin_stmt.bfill(axis=0, inplace=True)
-            bal_stmt.bfill(axis=0, inplace=True)
-        try:
-            roa: float = (
-                fin_stmt.loc["Net Income"].values[0]
-                / bal_stmt.loc["Total Assets"].values[0]
-            )
-        except (KeyError, ZeroDivisionError) as e:
-            print("exception caught: ", e)
-            roa = 0.0
+        return Profitbility(**{name: float(latest(v)) for name, v in profit.items()})
 
-        return roa
+    def get_growth_series(self) -> GrowthSeries:
+        growth = self.ratio_engine.growth_series()
 
-    def _get_roce(
-        self,
-        fin_stmt: pd.DataFrame,
-        bal_stmt: pd.DataFrame,
-    ) -> float:
-        # Return on capital employed =
-        # (revenue - cogs - operating expenses) / capital employed
-        # Capital employed = total assets - current liabilities
-        if not DataErrorDetector.check_index_exists(
-            idx=[
-                "Total Assets",
-                "Operating Expense",
-                "Total Revenue",
-                "Current Liabilities",
-            ],
-            idx_total=fin_stmt.index.to_list(),
-        ):
-            return 0.0
-        if pd.isna(
-            [
-                bal_stmt.loc["Total Assets"].values[0],
-                bal_stmt.loc["Current Liabilities"].values[0],
-                fin_stmt.loc["Total Revenue"].values[0],
-                fin_stmt.loc["Operating Expense"].values[0],
-            ]
-        ).any():
-            fin_stmt.bfill(axis=0, inplace=True)
-            bal_stmt.bfill(axis=0, inplace=True)
-        cap_employed = (
-            bal_stmt.loc["Total Assets"].values[0]
-            - bal_stmt.loc["Current Liabilities"].values[0]
+        return GrowthSeries(
+            date=self.ratio_engine.dates,
+            **{name: as_series(v) for name, v in growth.items()},
         )
-        try:
-            roce: float = (
-                fin_stmt.loc["Total Revenue"].values[0]
-                - self._get_cogs(fin_stmt=fin_stmt)
-                - fin_stmt.loc["Operating Expense"].values[0]
-            ) / cap_employed
-        except (KeyError, ZeroDivisionError) as e:
-            print("exception caught: ", e)
-            roce = 0.0
 
-        return roce
+    def get_profit_series(self) -> ProfitbilitySeries:
+        profit = self.ratio_engine.profitability()
 
-    def get_profit(self) -> Profitbility:
-        fin_stmt = self._get_financials()
-        bal_stmt = self._get_balance_sheet()
-        gross_margin = self._get_gross_margin(fin_stmt=fin_stmt)
-        op_inc_margin = self._get_op_inc_margin(fin_stmt=fin_stmt)
-        profit_margin = self._get_profit_margin(fin_stmt=fin_stmt)
-        roe = self._get_roe(fin_stmt=fin_stmt, bal_stmt=bal_stmt)
-        roa = self._get_roa(fin_stmt=fin_stmt, bal_stmt=bal_stmt)
-        roce = self._get_roce(fin_stmt=fin_stmt, bal_stmt=bal_stmt)
-
-        return Profitbility(
-            gross_margin=round(gross_margin * 100, 2),
-            op_inc_margin=round(op_inc_margin * 100, 2),
-            profit_margin=round(profit_margin * 100, 2),
-            return_on_equity=round(roe * 100, 2),
-            return_on_assets=round(roa * 100, 2),
-            return_on_capital_employed=round(roce * 100, 2),
+        return ProfitbilitySeries(
+            date=self.ratio_engine.dates,
+            **{name: as_series(v) for name, v in profit.items()},
         )
 
     def get_history_data(
-        self, hist_data: pd.DataFrame, period: HistoryPeriod
+        self, hist_data: pd.DataFrame, period: HistoryPeriod, epoch: bool = False
     ) -> PeriodData:
         """get historical stock data from yfinance
         slice from max period for day intervals
@@ -524,30 +355,50 @@ class YFinFetch:
         Args:
             hist_data (pd.DataFrame): historical dataframe
             period (HistoryPeriod): period
+            epoch (bool): dates as int64 epoch seconds instead of ISO strings,
+                for the binary history format
 
         Returns:
             PeriodData: _description_
         """
-        latest_day = hist_data.index.array[-1]
-        if period.value.label in ["1d", "5d", "15d", "max"]:
-            hist_data_slice = hist_data
-        elif period.value.label == "ytd":
-            week: int = latest_day.week
-            target_day = latest_day - np.timedelta64(week, "W")
-            hist_data_slice = hist_data.loc[target_day:, :]
-        else:
-            target_day = latest_day - np.timedelta64(period.value.days, "D")
-            hist_data_slice = hist_data.loc[target_day:, :]
-        data: PeriodData = PeriodData(
-            date=hist_data_slice.index.array,
-            start=hist_data_slice.loc[:, "Open"].to_list(),
-            close=hist_data_slice.loc[:, "Close"].to_list(),
-            high=hist_data_slice.loc[:, "High"].to_list(),
-            low=hist_data_slice.loc[:, "Low"].to_list(),
-            rev_idx=self._get_volitality(period=period),
-        )
+        return self.get_history_periods(hist_data, [period], epoch)[period.name]
 
-        return data
+    def get_history_periods(
+        self,
+        hist_data: pd.DataFrame,
+        periods: list[HistoryPeriod],
+        epoch: bool = False,
+    ) -> dict[str, PeriodData]:
+        """slice several periods out of one historical dataframe, the start
+        rows of all periods are found with a single searchsorted
+
+        Args:
+            hist_data (pd.DataFrame): historical dataframe
+            periods (list[HistoryPeriod]): periods
+            epoch (bool): dates as int64 epoch seconds instead of ISO strings
+
+        Returns:
+            dict[str, PeriodData]: by period name
+        """
+        results: dict[str, PeriodData] = {}
+        for period, start in zip(
+            periods, period_starts(hist_data.index, periods), strict=True
+        ):
+            hist_data_slice = hist_data.iloc[start:]
+            # numpy arrays are kept as they are and written out by
+            # NumpyJSONResponse, skipping per element validation
+            results[period.name] = PeriodData.model_construct(
+                date=epoch_seconds(hist_data_slice.index)
+                if epoch
+                else iso_dates(hist_data_slice.index),
+                start=_column(hist_data_slice, "Open"),
+                close=_column(hist_data_slice, "Close"),
+                high=_column(hist_data_slice, "High"),
+                low=_column(hist_data_slice, "Low"),
+                rev_idx=self._volitality(hist_data_slice),
+            )
+
+        return results
 
     def get_income_stmt_report(
         self, interval: StatementInterval = StatementInterval.YEARLY
@@ -557,7 +408,7 @@ class YFinFetch:
             idx=["Total Revenue", "Operating Income"],
             idx_total=data.index.to_list(),
         ):
-            data.bfill(axis=0, inplace=True)
+            data = data.bfill(axis=0)
 
         return IncomeStmt.model_validate(
             data,
@@ -715,3 +566,27 @@ class YFinFetch:
                 "liability": tmp + long_t_d + accounts_payable,
             },
         )
+
+    def get_fundamentals(
+        self, interval: StatementInterval = StatementInterval.YEARLY
+    ) -> Fundamentals:
+        """every statement report of interval, the income, balance and
+        cashflow statements are fetched once by the bundle and shared by
+        the reports built from them
+
+        Args:
+            interval (StatementInterval): yearly or quarterly
+
+        Returns:
+            Fundamentals: reports of empty statements are None
+        """
+        reports: dict[str, Any] = {}
+        for report in Fundamentals.model_fields:
+            try:
+                reports[report] = getattr(self, f"get_{report}_report")(
+                    interval=interval
+                )
+            except HTTPException as e:
+                if e.status_code != status.HTTP_404_NOT_FOUND:
+                    raise
+        return Fundamentals(**reports)
@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+from typing import Any
+
+from pyrate_limiter import Duration, FileLockSQLiteBucket, Limiter, RequestRate
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from requests_cache import SQLiteCache  # type: ignore
+from requests_ratelimiter import MemoryQueueBucket
+
+from app.core.config import settings
+from app.models.metrics import UpstreamSessionStats
+from app.services.common import CachedLimiterSession
+
+
+class CountingLimiterSession(CachedLimiterSession):
+    """CachedLimiterSession that keeps track of cache hits/misses
+    and of the number of requests waiting on the limiter or network
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+
+    def send(self, request: PreparedRequest, **kwargs: Any) -> Response:
+        with self._stats_lock:
+            self.requests += 1
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            response: Response = super().send(request, **kwargs)
+        finally:
+            with self._stats_lock:
+                self.queue_depth -= 1
+        with self._stats_lock:
+            if getattr(response, "from_cache", False):
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+        return response
+
+
+class YFSessionManager:
+    """process-wide owner of the yfinance http session
+
+    one pooled session per worker process, lazily (re)built after fork,
+    one cache backend, and one rate limit bucket which is shared across
+    workers when YF_LIMITER_PATH is set
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._session: CountingLimiterSession | None = None
+        self._pid: int | None = None
+
+    @property
+    def session(self) -> CountingLimiterSession:
+        pid = os.getpid()
+        if self._session is None or self._pid != pid:
+            with self._lock:
+                if self._session is None or self._pid != pid:
+                    self._session = self._build_session()
+                    self._pid = pid
+
+        return self._session
+
+    @staticmethod
+    def _rate() -> RequestRate:
+        return RequestRate(
+            settings.YF_RATE_LIMIT_REQUESTS,
+            Duration.MINUTE * settings.YF_RATE_LIMIT_MINUTES,
+        )
+
+    def _build_session(self) -> CountingLimiterSession:
+        os.makedirs(os.path.dirname(settings.YF_CACHE_PATH), exist_ok=True)
+        if settings.YF_LIMITER_PATH:
+            os.makedirs(os.path.dirname(settings.YF_LIMITER_PATH), exist_ok=True)
+            # sqlite counts under a host-wide file lock, SQLiteBucket keeps
+            # its size in process memory; timestamps are compared across
+            # processes, so wall clock time
+            limiter = Limiter(
+                self._rate(),
+                bucket_class=FileLockSQLiteBucket,
+                bucket_kwargs={"path": settings.YF_LIMITER_PATH},
+                time_function=time.time,
+            )
+        else:
+            limiter = Limiter(self._rate(), bucket_class=MemoryQueueBucket)
+
+        session = CountingLimiterSession(
+            # the session ignores bucket_class and bucket_kwargs of its own
+            # when given a limiter
+            limiter=limiter,
+            # yahoo answers from several hosts, keep them in one bucket
+            per_host=False,
+            bucket_name="yfinance",
+            backend=SQLiteCache(settings.YF_CACHE_PATH),
+        )
+        adapter = HTTPAdapter(
+            pool_connections=settings.YF_POOL_SIZE,
+            pool_maxsize=settings.YF_POOL_SIZE,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        return session
+
+    def stats(self) -> UpstreamSessionStats:
+        session = self._session
+        if session is None or self._pid != os.getpid():
+            return UpstreamSessionStats(pid=os.getpid())
+
+        return UpstreamSessionStats(
+            pid=os.getpid(),
+            requests=session.requests,
+            cache_hits=session.cache_hits,
+            cache_misses=session.cache_misses,
+            queue_depth=session.queue_depth,
+            max_queue_depth=session.max_queue_depth,
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+            self._pid = None
+
+
+yf_sessions = YFSessionManager()
@@ -1,70 +1,143 @@
+import asyncio
 from datetime import datetime
-from sqlmodel import Session, select
+from typing import Any
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, col
+from app.core.config import settings
+from app.core.db import engine
+from app.core.executor import run_blocking
+from app.core.log_config import ip_logger
 from app.models.relationships import AddressProfile, Company
 from app.services.address import (
-    create_city,
-    create_country,
-    create_address,
-    create_state,
+    forget_dimensions,
+    remember_dimensions,
+    upsert_address,
+    upsert_city,
+    upsert_country,
+    upsert_state,
 )
+from app.services.symbolindex import symbol_index, symbol_index_rows
+from app.services.upstream import symbol_tag, upstream_flight
 
 
-async def create_company_profile(
-    *,
-    session: Session,
-    profile_in: dict[str, str | int],
-) -> None:
-    country = create_country(
-        session=session,
-        country_in=profile_in,
-    )
-    state = create_state(
-        session=session,
-        state_in=profile_in,
-        country=country,
-    )
-    city = create_city(
+def _address_id(
+    session: Session, profile_in: dict[str, Any], country_id: int | None
+) -> int | None:
+    city = profile_in.get("city")
+    address = profile_in.get("address")
+    if not (country_id and city and address):
+        return None
+    state_id = upsert_state(
         session=session,
-        city_in=profile_in,
-        state=state,
+        state_code=str(profile_in.get("state") or "") or None,
+        country_id=country_id,
     )
-    address = create_address(
+    city_id = upsert_city(session=session, name=str(city), state_id=state_id)
+    zip_code = profile_in.get("zip")
+    return upsert_address(
         session=session,
-        address_in=profile_in,
-        city=city,
+        address=str(address),
+        zip=str(zip_code) if zip_code else None,
+        city_id=city_id,
     )
+
+
+def save_company_profile(*, session: Session, profile_in: dict[str, Any]) -> int:
+    """write a company profile with its address in one transaction, each
+    row with a single INSERT ... ON CONFLICT ... RETURNING
+
+    Args:
+        session (Session): database session, committed
+        profile_in (dict[str, Any]): FMP profile api item
+
+    Returns:
+        int: company id, of the existing row when the symbol is known
+    """
     try:
-        ipodate: str = str(profile_in.get("ipoDate", ""))
+        country = profile_in.get("country")
+        country_id = (
+            upsert_country(session=session, abbrev_2=str(country)) if country else None
+        )
+        address_id = _address_id(session, profile_in, country_id)
+        ipodate = str(profile_in.get("ipoDate") or "")
         profile = Company.model_validate(
             profile_in,
             update={
+                "symbol": str(profile_in["symbol"]).upper(),
                 "company_name": profile_in.get("companyName"),
-                "ipo_date": datetime.strptime(ipodate, "%Y-%m-%d").date(),
+                "ipo_date": (
+                    datetime.strptime(ipodate, "%Y-%m-%d").date() if ipodate else None
+                ),
                 "default_image": profile_in.get("defaultImage"),
                 "created_at": datetime.now(),
                 "updated_at": datetime.now(),
-                "country_id": country.id,
+                "country_id": country_id,
             },
         )
-        session.add(profile)
-        session.commit()
-        session.refresh(profile)
-        statement = select(AddressProfile).where(
-            AddressProfile.address_id == address.id,
-            AddressProfile.profile_id == profile.id,
-        )
-        addr_profile = session.exec(statement).one_or_none()
-        if not addr_profile:
-            addr_profile = AddressProfile(
-                is_main=False,
-                address_id=address.id,
-                profile_id=profile.id,
-                created_at=datetime.now(),
-                updated_at=datetime.now(),
+        statement = insert(Company).values(profile.model_dump(exclude={"id"}))
+        statement = statement.on_conflict_do_update(
+            index_elements=[col(Company.symbol)],
+            set_={"symbol": statement.excluded.symbol},
+        ).returning(col(Company.id))
+        company_id: int = session.execute(statement).scalar_one()
+        if address_id is not None:
+            session.execute(
+                insert(AddressProfile)
+                .values(
+                    is_main=False,
+                    address_id=address_id,
+                    profile_id=company_id,
+                    created_at=datetime.now(),
+                    updated_at=datetime.now(),
+                )
+                .on_conflict_do_nothing(
+                    index_elements=[
+                        col(AddressProfile.address_id),
+                        col(AddressProfile.profile_id),
+                    ]
+                )
             )
-            session.add(addr_profile)
-            session.commit()
-            session.refresh(addr_profile)
-    except Exception as e:
+        session.commit()
+    except Exception:
         session.rollback()
+        forget_dimensions(session)
+        raise
+    remember_dimensions(session)
+    # app.services.company imports this module through ApiDecorator
+    from app.services.company import company_cache
+
+    company_cache.pop(profile.symbol)
+    # the fetched FMP profile is superseded by the row
+    upstream_flight.purge(symbol_tag(profile.symbol))
+    symbol_index.add(profile.symbol, profile.company_name)
+    return company_id
+
+
+async def create_company_profile(
+    *,
+    session: Session,
+    profile_in: dict[str, Any],
+) -> None:
+    try:
+        save_company_profile(session=session, profile_in=profile_in)
+    except Exception as e:
         print("Error creating profile:", e)
+
+
+def load_symbol_index() -> None:
+    with Session(engine) as session:
+        symbol_index.replace(symbol_index_rows(session))
+
+
+async def symbol_indexer(
+    interval: float = settings.SYMBOL_INDEX_RELOAD_SECONDS,
+) -> None:
+    """load the symbol search index on start and reload it every interval
+    seconds, forever
+    """
+    while True:
+        try:
+            await run_blocking(load_symbol_index)
+        except Exception as e:
+            ip_logger.error(f"Error loading symbol index: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,333 @@
+"""bulk import of FMP company profiles
+
+    python -m app.tasks.import_profiles profiles.json
+    python -m app.tasks.import_profiles profiles.csv --batch-size 1000
+    python -m app.tasks.import_profiles "http://localhost:8080/api/v3/profile/AAPL,MSFT"
+
+the source is a json list of FMP profiles, a csv with the same columns,
+or an url answering like the FMP profile api. Countries, states, cities
+and addresses are resolved in memory and everything is written with
+multi-row inserts in one transaction. Symbols already in companies are
+skipped.
+"""
+
+import argparse
+import csv
+import json
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from app.core.db import engine
+from app.models.relationships import (
+    Address,
+    AddressProfile,
+    City,
+    Company,
+    Country,
+    State,
+)
+from app.services.address import UNKNOWN_STATE
+
+
+@dataclass
+class ImportStats:
+    profiles: int = 0
+    companies: int = 0
+    skipped: int = 0
+    created: dict[str, int] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return self.companies + sum(self.created.values())
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def report(self) -> str:
+        created = ", ".join(f"{count} {name}" for name, count in self.created.items())
+        return (
+            f"{self.companies} companies imported, {self.skipped} skipped, "
+            f"of {self.profiles} profiles in {self.seconds:.2f}s "
+            f"({self.rows_per_second:,.0f} rows/s); created {created}"
+        )
+
+
+def read_profiles(source: str) -> list[dict[str, Any]]:
+    """profiles of a json or csv file, or of an FMP style url"""
+    if source.startswith(("http://", "https://")):
+        resp = httpx.get(source, timeout=60)
+        resp.raise_for_status()
+        return list(resp.json())
+    path = Path(source)
+    if path.suffix.lower() == ".csv":
+        with path.open(newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+    return list(json.loads(path.read_text(encoding="utf-8")))
+
+
+def _text(value: Any) -> str | None:
+    text = str(value).strip() if value is not None else ""
+    return text or None
+
+
+def _ipo_date(value: Any) -> date | None:
+    text = _text(value)
+    return datetime.strptime(text, "%Y-%m-%d").date() if text else None
+
+
+def _flag(value: Any) -> bool:
+    # csv columns hold "True" / "False"
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes")
+    return bool(value)
+
+
+def _batches(rows: list[dict[str, Any]], size: int) -> Iterator[list[dict[str, Any]]]:
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def _insert_ids(
+    session: Session,
+    model: Any,
+    rows: list[dict[str, Any]],
+    batch_size: int,
+) -> list[int]:
+    """multi-row inserts of rows, ids in the order of rows"""
+    ids: list[int] = []
+    # core insert of the table, the orm would leave out None values
+    table = model.__table__
+    statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+    for batch in _batches(rows, batch_size):
+        ids.extend(session.execute(statement, batch).scalars())
+    return ids
+
+
+def _resolve(
+    session: Session,
+    model: Any,
+    known: dict[tuple[Any, ...], int],
+    wanted: Iterable[tuple[tuple[Any, ...], dict[str, Any]]],
+    batch_size: int,
+) -> int:
+    """insert the wanted rows whose keys are not known yet, and add
+    their ids to known
+
+    Returns:
+        int: rows inserted
+    """
+    missing: dict[tuple[Any, ...], dict[str, Any]] = {}
+    for key, row in wanted:
+        if key not in known:
+            missing.setdefault(key, row)
+    ids = _insert_ids(session, model, list(missing.values()), batch_size)
+    known.update(zip(missing, ids, strict=True))
+    return len(ids)
+
+
+def import_profiles(
+    session: Session,
+    profiles: list[dict[str, Any]],
+    batch_size: int = 500,
+) -> ImportStats:
+    """write profiles, their address dimensions and address profiles
+
+    Args:
+        session (Session): committed once at the end, rolled back on error
+        profiles (list[dict[str, Any]]): FMP profile api items
+        batch_size (int): rows per insert statement
+
+    Returns:
+        ImportStats: counts and timing
+    """
+    start = time.perf_counter()
+    stats = ImportStats(profiles=len(profiles))
+    try:
+        existing = set(session.exec(select(Company.symbol)))
+        new: dict[str, dict[str, Any]] = {}
+        for profile in profiles:
+            symbol = (_text(profile.get("symbol")) or "").upper()
+            if symbol and symbol not in existing:
+                new[symbol] = profile
+        # known, duplicated or without a symbol
+        stats.skipped = len(profiles) - len(new)
+
+        # every dimension row is loaded once, keyed case-insensitively
+        countries = {
+            (abbrev.upper(),): id_
+            for id_, abbrev in session.exec(select(Country.id, Country.abbrev_2))
+        }
+        states = {
+            (country_id, code.upper()): id_
+            for id_, country_id, code in session.exec(
+                select(State.id, State.country_id, State.state_code)
+            )
+        }
+        cities = {
+            (state_id, name.lower()): id_
+            for id_, state_id, name in session.exec(
+                select(City.id, City.state_id, City.name)
+            )
+        }
+        addresses = {
+            (city_id, address.lower(), (zip_ or "").lower()): id_
+            for id_, city_id, address, zip_ in session.exec(
+                select(Address.id, Address.city_id, Address.address, Address.zip)
+            )
+        }
+
+        def country_key(profile: dict[str, Any]) -> tuple[str] | None:
+            country = _text(profile.get("country"))
+            return (country.upper(),) if country else None
+
+        def state_key(profile: dict[str, Any]) -> tuple[int, str] | None:
+            key = country_key(profile)
+            if key is None:
+                return None
+            state = _text(profile.get("state")) or UNKNOWN_STATE
+            return (countries[key], state.upper())
+
+        def city_key(profile: dict[str, Any]) -> tuple[int, str] | None:
+            key = state_key(profile)
+            city = _text(profile.get("city"))
+            if key is None or city is None:
+                return None
+            return (states[key], city.lower())
+
+        def address_key(profile: dict[str, Any]) -> tuple[int, str, str] | None:
+            key = city_key(profile)
+            address = _text(profile.get("address"))
+            if key is None or address is None:
+                return None
+            zip_ = _text(profile.get("zip")) or ""
+            return (cities[key], address.lower(), zip_.lower())
+
+        stats.created["countries"] = _resolve(
+            session,
+            Country,
+            countries,
+            (
+                (key, {"name": None, "abbrev_2": key[0]})
+                for key in map(country_key, new.values())
+                if key
+            ),
+            batch_size,
+        )
+        stats.created["states"] = _resolve(
+            session,
+            State,
+            states,
+            (
+                (key, {"name": None, "state_code": key[1], "country_id": key[0]})
+                for key in map(state_key, new.values())
+                if key
+            ),
+            batch_size,
+        )
+        stats.created["cities"] = _resolve(
+            session,
+            City,
+            cities,
+            (
+                (key, {"name": _text(p.get("city")), "state_id": key[0]})
+                for p in new.values()
+                if (key := city_key(p))
+            ),
+            batch_size,
+        )
+        stats.created["addresses"] = _resolve(
+            session,
+            Address,
+            addresses,
+            (
+                (
+                    key,
+                    {
+                        "address": _text(p.get("address")),
+                        "zip": _text(p.get("zip")),
+                        "city_id": key[0],
+                    },
+                )
+                for p in new.values()
+                if (key := address_key(p))
+            ),
+            batch_size,
+        )
+
+        now = datetime.now()
+        company_rows = []
+        for symbol, p in new.items():
+            key = country_key(p)
+            company_rows.append(
+                {
+                    "symbol": symbol,
+                    "company_name": _text(p.get("companyName")) or symbol,
+                    "industry": _text(p.get("industry")),
+                    "sector": _text(p.get("sector")),
+                    "cik": _text(p.get("cik")),
+                    "isin": _text(p.get("isin")),
+                    "cusip": _text(p.get("cusip")),
+                    "website": _text(p.get("website")),
+                    "description": _text(p.get("description")),
+                    "ipo_date": _ipo_date(p.get("ipoDate")),
+                    "image": _text(p.get("image")),
+                    "default_image": _flag(p.get("defaultImage")),
+                    "country_id": countries[key] if key else None,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+        company_ids = _insert_ids(session, Company, company_rows, batch_size)
+        stats.companies = len(company_ids)
+
+        profile_rows = []
+        for company_id, p in zip(company_ids, new.values(), strict=True):
+            key = address_key(p)
+            if key is None:
+                continue
+            profile_rows.append(
+                {
+                    "is_main": False,
+                    "address_id": addresses[key],
+                    "profile_id": company_id,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+        stats.created["address profiles"] = len(
+            _insert_ids(session, AddressProfile, profile_rows, batch_size)
+        )
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("source", help="json or csv file, or FMP profile url")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    profiles = read_profiles(args.source)
+    with Session(engine) as session:
+        stats = import_profiles(session, profiles, batch_size=args.batch_size)
+    print(stats.report())
+
+
+if __name__ == "__main__":
+    main()
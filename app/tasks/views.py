@@ -1,82 +1,176 @@
+import asyncio
+import threading
+from collections import Counter
 from datetime import date, datetime
-from fastapi import HTTPException, status
-from sqlmodel import Session, col, select
-from app.models.pathview import (
-    PathViewUpdate,
-    ViewDailyStatCreate,
-    ViewDailyStatSearch,
-)
-from app.models.relationships import Company, View
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.executor import run_blocking
+from app.core.log_config import ip_logger
+from app.services.ranking import lock_ranking, rank_cache, ranking_backend
+from app.services.symbolindex import symbol_index
 from app.services.view import (
-    create_daily_stat,
-    create_view,
-    daily_stat_on_date,
-    update_daily_stat,
-    update_view,
+    add_trend_rollups,
+    company_ids,
+    roll_trend_rollups,
+    upsert_daily_stats,
+    upsert_view_counts,
 )
 
 
-def update_view_counts(path: str, symbol: str, session: Session) -> None:
-    stmt_comp = select(Company).where(col(Company.symbol).ilike(symbol))
-    company = session.exec(stmt_comp).one_or_none()
-    if not company:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Symbol not found"
-        )
-    statement = select(View).where(col(View.symbol).ilike(symbol))
-    stock = session.exec(statement).one_or_none()
-    if not stock:
-        stock = create_view(
-            session=session,
-            view_in=View(
-                path=path,
-                symbol=symbol.upper(),
-                company_id=company.id,
-                company=company,
-                created_at=datetime.now(),
-                updated_at=datetime.now(),
-            ),
-        )
-    else:
-        stock = update_view(
-            session=session,
-            db_view=stock,
-            view_in=PathViewUpdate(
-                count=stock.count + 1,
-                updated_at=datetime.now(),
-            ),
-        )
-    # return stock
-
-
-def update_view_stats(
-    symbol: str,
-    session: Session,
-    company: Company | None,
+class ViewCounterBuffer:
+    """in-process page view counts aggregated per (symbol, day), written
+    to view_counts and view_daily_stats by periodic flushes instead of
+    a few selects and commits per page view
+
+    views of symbols without a company row are dropped on flush, views of
+    a failed flush are kept for the next one
+    """
+
+    def __init__(self) -> None:
+        self._counts: Counter[tuple[str, date]] = Counter()
+        self._paths: dict[str, str] = {}
+        # resolved once per symbol, company ids never change
+        self._company_ids: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.flushes = 0
+        self.flushed_views = 0
+
+    def add(
+        self,
+        symbol: str,
+        path: str,
+        company_id: int | None = None,
+        day: date | None = None,
+    ) -> None:
+        symbol = symbol.upper()
+        with self._lock:
+            self._counts[(symbol, day or date.today())] += 1
+            self._paths.setdefault(symbol, path)
+            if company_id:
+                self._company_ids[symbol] = company_id
+
+    def pending(self) -> int:
+        return sum(self._counts.values())
+
+    def _take(self) -> tuple[Counter[tuple[str, date]], dict[str, str]]:
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            paths, self._paths = self._paths, {}
+        return counts, paths
+
+    def _restore(
+        self, counts: Counter[tuple[str, date]], paths: dict[str, str]
+    ) -> None:
+        with self._lock:
+            self._counts.update(counts)
+            for symbol, path in paths.items():
+                self._paths.setdefault(symbol, path)
+
+    def flush(self, session: Session) -> int:
+        """write buffered views in one transaction
+
+        Args:
+            session (Session): database session
+
+        Returns:
+            int: number of views written
+        """
+        counts, paths = self._take()
+        if not counts:
+            return 0
+        try:
+            missing = [s for s in paths if s not in self._company_ids]
+            if missing:
+                found = company_ids(session=session, symbols=missing)
+                with self._lock:
+                    self._company_ids.update(found)
+            totals: Counter[str] = Counter()
+            daily_rows = []
+            for (symbol, day), count in counts.items():
+                company_id = self._company_ids.get(symbol)
+                if company_id is None:
+                    continue
+                totals[symbol] += count
+                daily_rows.append(
+                    {
+                        "symbol": symbol,
+                        "company_id": company_id,
+                        "created_at": day,
+                        "count": count,
+                    }
+                )
+            view_rows = [
+                {
+                    "symbol": symbol,
+                    "path": paths[symbol],
+                    "company_id": self._company_ids[symbol],
+                    "count": count,
+                }
+                for symbol, count in totals.items()
+            ]
+            upsert_view_counts(
+                session=session, rows=view_rows, updated_at=datetime.now()
+            )
+            upsert_daily_stats(session=session, rows=daily_rows)
+            add_trend_rollups(session=session, rows=daily_rows)
+            lock_ranking(session=session, shared=True)
+            try:
+                ranking_backend.record(daily_rows)
+            except Exception as e:
+                # the sql tables are written, reconcile() catches up
+                ip_logger.error(f"Error recording view ranking: {e}")
+            session.commit()
+        except Exception:
+            session.rollback()
+            self._restore(counts, paths)
+            raise
+        rank_cache.clear()
+        symbol_index.add_views(totals)
+        self.flushes += 1
+        self.flushed_views += sum(totals.values())
+        return sum(totals.values())
+
+
+view_buffer = ViewCounterBuffer()
+
+
+def flush_views() -> int:
+    with Session(engine) as session:
+        # the first flush of a day moves the trend windows forward
+        if roll_trend_rollups(session=session):
+            session.commit()
+        return view_buffer.flush(session)
+
+
+async def view_flusher(
+    interval: float = settings.VIEW_FLUSH_INTERVAL_SECONDS,
+) -> None:
+    """flush buffered views every interval seconds, forever"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_blocking(flush_views)
+        except Exception as e:
+            ip_logger.error(f"Error flushing views: {e}")
+
+
+def reconcile_ranking() -> None:
+    with Session(engine) as session:
+        ranking_backend.reconcile(session)
+
+
+async def ranking_reconciler(
+    interval: float = settings.RANKING_RECONCILE_SECONDS,
 ) -> None:
-    if not company or not company.id:
-        stmt_comp = select(Company).where(col(Company.symbol).ilike(symbol))
-        company = session.exec(stmt_comp).one_or_none()
-    if not company:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Symbol not found"
-        )
-    v_search = ViewDailyStatSearch(
-        company_id=company.id,
-        created_at=date.today(),
-    )
-    stat = daily_stat_on_date(session=session, stat_in=v_search)
-
-    if not stat:
-        v_create = ViewDailyStatCreate(
-            symbol=symbol.upper(),
-            company_id=company.id,
-            created_at=date.today(),
-        )
-        stat = create_daily_stat(session=session, stat_in=v_create)
-    else:
-        stat = update_daily_stat(
-            session=session,
-            stat=stat,
-        )
-    # return stock
+    """resync the ranking backend with the sql tables on start and every
+    interval seconds, forever
+    """
+    while True:
+        try:
+            await run_blocking(reconcile_ranking)
+        except Exception as e:
+            ip_logger.error(f"Error reconciling view ranking: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,261 @@
+from collections import Counter
+from collections.abc import Generator
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.benchmarks.history_serialization import synthetic_history
+from app.core.config import settings
+from app.models.common import StatementInterval
+from app.models.relationships import Company
+from app.models.stock import IncomeStmt
+from app.services.historybin import MEDIA_TYPE, decode_history
+from app.services.historycache import history_cache
+from app.services.ranking import rank_cache
+from app.services.upstream import symbol_tag, upstream_flight
+from app.services.view import increment_view
+from app.services.yfdata import YFinFetch
+from app.tasks.views import view_buffer
+
+
+@pytest.fixture
+def history_calls(monkeypatch: pytest.MonkeyPatch) -> Generator[list[str], None, None]:
+    hist = synthetic_history(300)
+    calls: list[str] = []
+
+    def fake_history(self: YFinFetch, *_: object, **__: object) -> object:
+        calls.append(self._symbol)
+        return hist
+
+    monkeypatch.setattr(YFinFetch, "get_history", fake_history)
+    history_cache.clear()
+    yield calls
+    history_cache.clear()
+
+
+@pytest.fixture
+def income_calls(monkeypatch: pytest.MonkeyPatch) -> Generator[list[str], None, None]:
+    calls: list[str] = []
+
+    def fake_report(self: YFinFetch, **_: object) -> IncomeStmt:
+        calls.append(self._symbol)
+        return IncomeStmt(
+            date=[pd.Timestamp("2023-09-30")], revenue=[383.3], op_income=[114.3]
+        )
+
+    monkeypatch.setattr(YFinFetch, "get_income_stmt_report", fake_report)
+    upstream_flight.clear()
+    yield calls
+    upstream_flight.clear()
+
+
+STATEMENT_ROWS = {
+    "income_stmt": [
+        "Total Revenue",
+        "Operating Income",
+        "Net Income",
+        "Gross Profit",
+        "Operating Expense",
+    ],
+    "balance_sheet": [
+        "Total Assets",
+        "Current Liabilities",
+        "Other Current Liabilities",
+        "Long Term Debt",
+        "Accounts Payable",
+        "Cash And Cash Equivalents",
+        "Working Capital",
+    ],
+    "cashflow": ["Free Cash Flow"],
+}
+
+
+class FakeTicker:
+    """statements of a yfinance ticker, counting the reads of each"""
+
+    def __init__(self) -> None:
+        self.reads: Counter[str] = Counter()
+
+    def __getattr__(self, attr: str) -> pd.DataFrame:
+        self.reads[attr] = self.reads[attr] + 1
+        if attr == "quarterly_cashflow":
+            return pd.DataFrame()
+        rows = STATEMENT_ROWS[attr.removeprefix("quarterly_")]
+        dates = [pd.Timestamp("2023-09-30"), pd.Timestamp("2022-09-30")]
+        return pd.DataFrame(
+            [[float(i + 1), float(i + 2)] for i in range(len(rows))],
+            index=rows,
+            columns=dates,
+        )
+
+
+@pytest.fixture
+def ticker(monkeypatch: pytest.MonkeyPatch) -> Generator[FakeTicker, None, None]:
+    fake = FakeTicker()
+    monkeypatch.setattr(YFinFetch, "_get_ticker", lambda _: fake)
+    upstream_flight.clear()
+    yield fake
+    upstream_flight.clear()
+
+
+def test_history_json(client: TestClient, history_calls: list[str]) -> None:
+    response = client.get(f"{settings.API_V1_STR}/stocks/history/AAPL")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    content = response.json()
+    assert content["brief"]["name"] == "AAPL"
+    assert len(content["data"]) == 6
+    assert len(content["data"]["MAX"]["close"]) == 300
+    assert content["data"]["MAX"]["date"][0].endswith("-05:00")
+    assert history_calls == ["AAPL"]
+
+
+def test_history_periods_from_cache(
+    client: TestClient, history_calls: list[str]
+) -> None:
+    client.get(f"{settings.API_V1_STR}/stocks/history/AAPL")
+    response = client.get(
+        f"{settings.API_V1_STR}/stocks/history/AAPL",
+        params={"periods": "max,ONE_MONTH"},
+    )
+    assert response.status_code == 200
+    assert list(response.json()["data"]) == ["MAX", "ONE_MONTH"]
+    assert len(history_calls) == 1
+
+
+@pytest.mark.usefixtures("history_calls")
+def test_history_unknown_period(client: TestClient) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/stocks/history/AAPL", params={"periods": "2w"}
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.usefixtures("history_calls")
+def test_history_binary(client: TestClient) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/stocks/history/AAPL",
+        params={"periods": "1y"},
+        headers={"Accept": MEDIA_TYPE, "Accept-Encoding": "gzip"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == MEDIA_TYPE
+    assert response.headers["content-encoding"] == "identity"
+    decoded = decode_history(response.content)
+    assert decoded["name"] == "AAPL"
+    assert list(decoded["data"]) == ["ONE_YEAR"]
+    assert 250 <= len(decoded["data"]["ONE_YEAR"]["close"]) <= 262
+
+
+def test_ticker_rank(client: TestClient, db: Session, company: Company) -> None:
+    assert company.id is not None
+    company.image = "https://example.com/logo.png"
+    db.add(company)
+    db.commit()
+    increment_view(
+        session=db, symbol=company.symbol, path="/p", company_id=company.id, by=1000
+    )
+
+    rank_cache.clear()
+    response = client.get(f"{settings.API_V1_STR}/stocks/ticker_rank")
+    assert response.status_code == 200
+    top = response.json()[0]
+    assert (top["symbol"], top["count"]) == (company.symbol, 1000)
+    assert top["image"] == company.image
+
+
+def test_symbol_revalidated_and_counted(client: TestClient, company: Company) -> None:
+    url = f"{settings.API_V1_STR}/stocks/symbol/{company.symbol}"
+    pending = view_buffer.pending()
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+
+    etag = response.headers["etag"]
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert view_buffer.pending() == pending + 2
+
+
+def test_statement_not_modified(client: TestClient, income_calls: list[str]) -> None:
+    url = f"{settings.API_V1_STR}/stocks/inc-stmt/AAPL"
+    params = {"interval": StatementInterval.YEARLY.value}
+    response = client.get(url, params=params)
+    assert response.status_code == 200
+    assert response.json()["date"] == ["2023-09-30T00:00:00"]
+    assert response.json()["revenue"] == [383.3]
+    etag = response.headers["etag"]
+    assert "stale-while-revalidate" in response.headers["cache-control"]
+
+    assert etag.startswith("W/")
+    response = client.get(
+        url, params=params, headers={"If-None-Match": etag.removeprefix("W/")}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert income_calls == ["AAPL"]
+
+    # purged with the symbol, fetched again, same content and etag
+    upstream_flight.purge(symbol_tag("aapl"))
+    response = client.get(url, params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert income_calls == ["AAPL", "AAPL"]
+
+
+def test_fundamentals_fetch_each_statement_once(
+    client: TestClient, ticker: FakeTicker
+) -> None:
+    url = f"{settings.API_V1_STR}/stocks/fundamentals/aapl"
+    response = client.get(url)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["symbol"] == "AAPL"
+    assert list(data["yearly"]) == [
+        "income_stmt",
+        "net_inc",
+        "gross_profit",
+        "cashflow",
+        "cash_capital",
+        "balancesheet",
+    ]
+    # the quarterly cashflow statement is empty
+    assert "cashflow" not in data["quarterly"]
+    assert data["yearly"]["income_stmt"]["revenue"] == [1.0, 2.0]
+    assert data["yearly"]["net_inc"]["date"] == [
+        "2023-09-30T00:00:00",
+        "2022-09-30T00:00:00",
+    ]
+    assert set(ticker.reads.values()) == {1}
+    assert len(ticker.reads) == 6
+
+    response = client.get(
+        url,
+        params={"fields": "balancesheet.asset,net_inc", "interval": "quarterly"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert list(data) == ["symbol", "quarterly"]
+    assert list(data["quarterly"]) == ["net_inc", "balancesheet"]
+    assert set(data["quarterly"]["balancesheet"]) == {"date", "asset"}
+    # projections are cut from the cached reports
+    assert set(ticker.reads.values()) == {1}
+
+    etag = response.headers["etag"]
+    response = client.get(
+        url,
+        params={"fields": "net_inc,balancesheet.asset", "interval": "quarterly"},
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 304
+
+
+@pytest.mark.usefixtures("ticker")
+def test_fundamentals_unknown_field(client: TestClient) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/stocks/fundamentals/AAPL",
+        params={"fields": "balancesheet.revenue"},
+    )
+    assert response.status_code == 400
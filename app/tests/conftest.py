@@ -7,7 +7,15 @@ from sqlmodel import Session, delete
 from app.core.config import settings
 from app.core.db import engine, init_db
 from app.main import app
-from app.models.relationships import Item, User
+from app.models.relationships import (
+    Company,
+    Item,
+    User,
+    View,
+    ViewDailyStat,
+    ViewTrendRollup,
+)
+from app.tests.utils.company import create_random_company
 from app.tests.utils.user import authentication_token_from_email
 from app.tests.utils.utils import get_superuser_token_headers
 
@@ -40,3 +48,14 @@ def normal_user_token_headers(client: TestClient, db: Session) -> dict[str, str]
     return authentication_token_from_email(
         client=client, email=settings.EMAIL_TEST_USER, db=db
     )
+
+
+@pytest.fixture
+def company(db: Session) -> Generator[Company, None, None]:
+    company = create_random_company(db)
+    yield company
+    db.execute(delete(ViewTrendRollup).where(ViewTrendRollup.company_id == company.id))
+    db.execute(delete(ViewDailyStat).where(ViewDailyStat.company_id == company.id))
+    db.execute(delete(View).where(View.company_id == company.id))
+    db.execute(delete(Company).where(Company.id == company.id))
+    db.commit()
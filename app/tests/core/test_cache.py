@@ -0,0 +1,31 @@
+import time
+
+from app.core.cache import TTLCache
+
+
+def test_get_set() -> None:
+    cache: TTLCache[str, int] = TTLCache(ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_expiry() -> None:
+    cache: TTLCache[str, int] = TTLCache(ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction() -> None:
+    cache: TTLCache[str, int] = TTLCache(ttl=60, maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
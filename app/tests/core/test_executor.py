@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.executor import BlockingExecutor
+
+
+def test_run_returns_result() -> None:
+    executor = BlockingExecutor(max_workers=2, timeout=5)
+    result = asyncio.run(executor.run(sum, [1, 2, 3]))
+    stats = executor.stats()
+    executor.shutdown()
+    assert result == 6
+    assert stats.calls == 1
+    assert stats.in_flight == 0
+
+
+def test_run_keeps_loop_responsive() -> None:
+    executor = BlockingExecutor(max_workers=2, timeout=5)
+
+    async def main() -> int:
+        ticks = 0
+
+        async def ticker() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.create_task(ticker())
+        await executor.run(time.sleep, 0.2)
+        task.cancel()
+        return ticks
+
+    ticks = asyncio.run(main())
+    executor.shutdown()
+    assert ticks > 5
+
+
+def test_run_timeout() -> None:
+    executor = BlockingExecutor(max_workers=1, timeout=0.05)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(executor.run(time.sleep, 0.5))
+    assert exc.value.status_code == 504
+    assert executor.stats().timeouts == 1
+    executor.shutdown()
@@ -0,0 +1,38 @@
+from app.core.httpcache import CachedBody, cached_response, etag_matches
+
+
+def test_etag_of_content() -> None:
+    body = CachedBody.of(b'{"a":1}')
+    assert body.etag == CachedBody.of(b'{"a":1}').etag
+    assert body.etag != CachedBody.of(b'{"a":2}').etag
+    assert body.etag.startswith('W/"') and body.etag.endswith('"')
+
+
+def test_etag_matches() -> None:
+    etag = 'W/"abc"'
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"xyz", W/"abc"', etag)
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches("*", etag)
+    assert not etag_matches('"xyz"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_cached_response() -> None:
+    body = CachedBody.of(b'{"a":1}')
+    response = cached_response(body, None, max_age=60, stale=600)
+    assert response.status_code == 200
+    assert response.body == b'{"a":1}'
+    assert response.headers["etag"] == body.etag
+    assert response.headers["cache-control"] == (
+        "public, max-age=60, stale-while-revalidate=600"
+    )
+
+    response = cached_response(body, body.etag)
+    assert response.status_code == 304
+    assert response.body == b""
+
+    response = cached_response(body, None, revalidate=True)
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.headers["etag"] == body.etag
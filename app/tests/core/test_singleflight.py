@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_fetch() -> None:
+    flight = SingleFlight(ttl=60, beta=0)
+    calls = 0
+
+    async def fetch() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "NVDA"
+
+    async def main() -> list[str]:
+        return await asyncio.gather(*(flight.run("key", fetch) for _ in range(10)))
+
+    assert asyncio.run(main()) == ["NVDA"] * 10
+    assert asyncio.run(flight.run("key", fetch)) == "NVDA"
+    stats = flight.stats()
+    assert calls == 1
+    assert (stats.calls, stats.fetches, stats.coalesced, stats.hits) == (11, 1, 9, 1)
+    assert stats.in_flight == 0
+
+
+def test_error_raised_to_every_caller_and_not_cached() -> None:
+    flight = SingleFlight(ttl=60, beta=0)
+    calls = 0
+
+    async def fetch() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise HTTPException(status_code=404, detail="empty history")
+
+    async def main() -> list[object]:
+        return await asyncio.gather(
+            *(flight.run("key", fetch) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, HTTPException) for r in results)
+    with pytest.raises(HTTPException):
+        asyncio.run(flight.run("key", fetch))
+    assert calls == 2
+    assert flight.stats().errors == 2
+
+
+def test_cancelled_caller_leaves_fetch_running() -> None:
+    flight = SingleFlight(ttl=60, beta=0)
+
+    async def fetch() -> int:
+        await asyncio.sleep(0.05)
+        return 1
+
+    async def main() -> int:
+        first = asyncio.create_task(flight.run("key", fetch))
+        second = asyncio.create_task(flight.run("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == 1
+    assert flight.stats().fetches == 1
+
+
+def test_early_refresh_answers_from_cache() -> None:
+    # a huge beta refreshes on every hit
+    flight = SingleFlight(ttl=60, beta=1e9)
+    calls = 0
+
+    async def fetch() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def main() -> list[int]:
+        first = await flight.run("key", fetch)
+        stale = await flight.run("key", fetch)
+        await asyncio.sleep(0.05)
+        return [first, stale, await flight.run("key", fetch)]
+
+    # the second hit is answered before its refresh lands
+    assert asyncio.run(main()) == [1, 1, 2]
+    assert flight.stats().early_refreshes == 2
+
+
+def test_ttl_zero_only_coalesces() -> None:
+    flight = SingleFlight(ttl=60, beta=0)
+    calls = 0
+
+    async def fetch() -> int:
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert asyncio.run(flight.run("key", fetch, ttl=0)) == 1
+    assert asyncio.run(flight.run("key", fetch, ttl=0)) == 2
+    assert flight.stats().cached == 0
+
+
+def test_purge_by_tag() -> None:
+    flight = SingleFlight(ttl=60, beta=0)
+
+    async def fetch() -> int:
+        return 1
+
+    async def main() -> None:
+        await flight.run(("AAPL", "cashflow"), fetch, tags=["symbol:AAPL"])
+        await flight.run(("MSFT", "cashflow"), fetch, tags=["symbol:MSFT"])
+
+    asyncio.run(main())
+    assert flight.purge("symbol:AAPL", "symbol:TSLA") == 1
+    assert flight.stats().cached == 1
@@ -0,0 +1,121 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.middleware.ratelimit import (
+    Limit,
+    MemoryRateLimitBackend,
+    RateLimiter,
+    RateLimitMiddleware,
+    RedisRateLimitBackend,
+    parse_limit,
+)
+from app.models.relationships import User
+from app.services.auth.auth_jwt import JWTHandler
+
+
+def test_parse_limit() -> None:
+    assert parse_limit("60/minute") == Limit(requests=60, seconds=60)
+    assert parse_limit(" 5 / seconds") == Limit(requests=5, seconds=1)
+    with pytest.raises(ValueError):
+        parse_limit("60 per minute")
+
+
+def test_sliding_window() -> None:
+    backend = MemoryRateLimitBackend()
+    limit = Limit(requests=10, seconds=60)
+
+    async def hits(now: float, count: int) -> list[float]:
+        return [await backend.hit("key", limit, now) for _ in range(count)]
+
+    # ten requests fill the window starting at 600
+    assert asyncio.run(hits(600.0, 10)) == [0.0] * 10
+    assert asyncio.run(hits(659.0, 1))[0] == pytest.approx(1.0)
+    # half way into the next window half of the previous one still counts
+    assert asyncio.run(hits(690.0, 6)) == [0.0] * 5 + [pytest.approx(6.0)]
+    # two windows later nothing counts
+    assert asyncio.run(hits(780.0, 10)) == [0.0] * 10
+
+
+def test_memory_bounded() -> None:
+    backend = MemoryRateLimitBackend(maxsize=100)
+    limit = Limit(requests=1, seconds=60)
+
+    async def main() -> None:
+        for client in range(1000):
+            await backend.hit(f"ip:{client}", limit, 600.0)
+
+    asyncio.run(main())
+    assert len(backend) == 100
+
+
+def test_redis_backend_shared() -> None:
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    limit = Limit(requests=3, seconds=60)
+
+    async def main() -> list[float]:
+        # two workers on one redis
+        workers = [
+            RedisRateLimitBackend(fakeredis.FakeAsyncRedis(server=server), "test")
+            for _ in range(2)
+        ]
+        return [await workers[i % 2].hit("key", limit, 600.0) for i in range(5)]
+
+    results = asyncio.run(main())
+    assert results[:3] == [0.0] * 3
+    assert all(retry > 0 for retry in results[3:])
+
+
+def make_client(limiter: RateLimiter) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/stocks/{symbol}")
+    @app.get("/login")
+    async def ok() -> str:
+        return "ok"
+
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    return TestClient(app)
+
+
+def test_middleware_limits_by_route_and_user() -> None:
+    limiter = RateLimiter(
+        MemoryRateLimitBackend(),
+        default="2/minute",
+        user="4/minute",
+        routes={"/login": "1/minute"},
+        users={"7": "3/minute"},
+    )
+    client = make_client(limiter)
+
+    statuses = [client.get("/stocks/AAPL").status_code for _ in range(3)]
+    assert statuses == [200, 200, 429]
+    response = client.get("/stocks/MSFT")
+    assert int(response.headers["retry-after"]) > 0
+    # the login route is counted apart
+    assert [client.get("/login").status_code for _ in range(2)] == [200, 429]
+
+    user = User(id=8, email="limit@example.com", hashed_password="x")
+    token = JWTHandler.jwt_encode(user, expires_delta=timedelta(minutes=5))
+    headers = {"Authorization": f"Bearer {token.access_token}"}
+    statuses = [
+        client.get("/stocks/AAPL", headers=headers).status_code for _ in range(5)
+    ]
+    assert statuses == [200] * 4 + [429]
+
+    user.id = 7
+    token = JWTHandler.jwt_encode(user, expires_delta=timedelta(minutes=5))
+    headers = {"Authorization": f"Bearer {token.access_token}"}
+    statuses = [
+        client.get("/stocks/AAPL", headers=headers).status_code for _ in range(4)
+    ]
+    assert statuses == [200] * 3 + [429]
+
+    # a token that does not verify counts as the client ip
+    headers = {"Authorization": "Bearer not.a.token"}
+    assert client.get("/stocks/AAPL", headers=headers).status_code == 429
+    assert limiter.limited == 6
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.ratios import RatioEngine
+
+DATES = pd.to_datetime(["2023-12-31", "2022-12-31", "2021-12-31", "2020-12-31"])
+
+
+@pytest.fixture
+def ratio_engine() -> RatioEngine:
+    fin_stmt = pd.DataFrame(
+        {
+            DATES[0]: [200.0, 80.0, 40.0, 30.0, 20.0, 2.0],
+            DATES[1]: [100.0, 50.0, 20.0, 25.0, 10.0, 1.0],
+            DATES[2]: [50.0, 20.0, 10.0, 10.0, 5.0, 0.0],
+            DATES[3]: [np.nan, np.nan, np.nan, np.nan, np.nan, np.nan],
+        },
+        index=[
+            "Total Revenue",
+            "Gross Profit",
+            "Operating Income",
+            "Operating Expense",
+            "Net Income",
+            "Basic EPS",
+        ],
+    )
+    bal_stmt = pd.DataFrame(
+        {
+            DATES[0]: [400.0, 100.0],
+            DATES[1]: [200.0, 0.0],
+            DATES[2]: [100.0, 50.0],
+        },
+        index=["Total Assets", "Stockholders Equity"],
+    )
+    return RatioEngine(fin_stmt=fin_stmt, bal_stmt=bal_stmt)
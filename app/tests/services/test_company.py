@@ -0,0 +1,24 @@
+from sqlmodel import Session
+
+from app.models.relationships import Company
+from app.services.company import company_cache, load_company_profile
+
+
+def test_profile_cached_by_upper_case_symbol(db: Session, company: Company) -> None:
+    company_cache.clear()
+    hits, misses = company_cache.hits, company_cache.misses
+
+    loaded = load_company_profile(session=db, symbol=company.symbol.lower())
+    assert loaded is not None
+    assert (loaded.id, loaded.symbol) == (company.id, company.symbol)
+    assert company_cache.misses == misses + 1
+
+    # detached from db, expiring the session leaves the cached copy intact
+    db.expire_all()
+    cached = load_company_profile(session=db, symbol=company.symbol)
+    assert cached is loaded
+    assert cached.company_name == company.company_name
+    assert company_cache.hits == hits + 1
+
+    assert load_company_profile(session=db, symbol="QXNONE") is None
+    assert company_cache.get("QXNONE") is None
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from app.models.history import PeriodData
+from app.services.historybin import (
+    MEDIA_TYPE,
+    accepts_binary,
+    decode_history,
+    encode_history,
+)
+
+
+def test_accepts_binary() -> None:
+    assert accepts_binary(MEDIA_TYPE)
+    assert accepts_binary(f"{MEDIA_TYPE}, application/json;q=0.5")
+    assert not accepts_binary(None)
+    assert not accepts_binary("application/json")
+    assert not accepts_binary(f"application/json, {MEDIA_TYPE};q=0.9")
+    assert not accepts_binary(f"{MEDIA_TYPE};q=0")
+
+
+def test_encode_decode_roundtrip() -> None:
+    ts = np.array([1_700_000_000, 1_700_086_400, 1_700_345_600], dtype=np.int64)
+    prices = np.array([1.5, np.nan, 3.25])
+    data = {
+        "ONE_MONTH": PeriodData.model_construct(
+            date=ts, start=prices, close=prices, high=prices, low=prices, rev_idx=1.2
+        ),
+        "EMPTY": PeriodData.model_construct(
+            date=np.empty(0, dtype=np.int64),
+            start=[],
+            close=[],
+            high=[],
+            low=[],
+            rev_idx=0.0,
+        ),
+    }
+    payload = encode_history("AAPL", data)
+    # header + per row 4 bytes delta and 4 x float32
+    assert len(payload) < 80 + 3 * 20
+
+    decoded = decode_history(payload)
+    assert decoded["name"] == "AAPL"
+    period = decoded["data"]["ONE_MONTH"]
+    assert period["rev_idx"] == 1.2
+    np.testing.assert_array_equal(period["date"], ts)
+    np.testing.assert_array_equal(period["close"], prices.astype(np.float32))
+    assert len(decoded["data"]["EMPTY"]["date"]) == 0
+
+
+def test_encode_rejects_unsorted_dates() -> None:
+    data = {
+        "MAX": PeriodData.model_construct(
+            date=np.array([2, 1]),
+            start=[1, 1],
+            close=[1, 1],
+            high=[1, 1],
+            low=[1, 1],
+            rev_idx=0.0,
+        )
+    }
+    with pytest.raises(ValueError):
+        encode_history("AAPL", data)
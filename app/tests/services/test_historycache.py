@@ -0,0 +1,21 @@
+import pytest
+from fastapi import HTTPException
+
+from app.models.common import HistoryPeriod
+from app.services.historycache import HISTORY_PERIODS, parse_periods
+
+
+def test_parse_periods() -> None:
+    assert parse_periods(None) == HISTORY_PERIODS
+    assert parse_periods(" ,") == HISTORY_PERIODS
+    assert parse_periods("max, one_year,1Y,ytd") == [
+        HistoryPeriod.MAX,
+        HistoryPeriod.ONE_YEAR,
+        HistoryPeriod.YEAR_TO_DAY,
+    ]
+
+
+def test_parse_periods_unknown() -> None:
+    with pytest.raises(HTTPException) as exc:
+        parse_periods("1mo,ONE_DAY")
+    assert exc.value.status_code == 400
@@ -0,0 +1,119 @@
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.services.ohlcv import OHLCVStore
+
+
+def make_bars(start: str, periods: int, value: float = 1.0) -> pd.DataFrame:
+    index = pd.date_range(start, periods=periods, freq="D", tz="America/New_York")
+    values = np.full(periods, value)
+    return pd.DataFrame(
+        {
+            "Open": values,
+            "High": values,
+            "Low": values,
+            "Close": values,
+            "Volume": values,
+            "Dividends": 0.0,
+        },
+        index=index,
+    )
+
+
+def test_backfill_then_incremental(tmp_path: Path) -> None:
+    store = OHLCVStore(root=str(tmp_path), refresh_seconds=0)
+    starts: list[date | None] = []
+
+    def fetch(start: date | None) -> pd.DataFrame:
+        starts.append(start)
+        if start is None:
+            return make_bars("2024-01-01", 10)
+        # last stored bar closes higher, one new bar appended
+        data = make_bars("2024-01-10", 2, value=2.0)
+        data.iloc[0, data.columns.get_loc("Open")] = 1.0
+        return data
+
+    first = store.history("aapl", fetch)
+    assert len(first) == 10
+    assert str(first.index.tz) == "America/New_York"
+
+    second = store.history("AAPL", fetch)
+    assert starts == [None, date(2024, 1, 10)]
+    assert len(second) == 11
+    assert second.index[-1] == pd.Timestamp("2024-01-11", tz="America/New_York")
+    assert second["Close"].iloc[-2:].tolist() == [2.0, 2.0]
+    assert second["Close"].iloc[0] == 1.0
+
+
+def test_refresh_window_skips_upstream(tmp_path: Path) -> None:
+    store = OHLCVStore(root=str(tmp_path), refresh_seconds=3600)
+    calls: list[date | None] = []
+
+    def fetch(start: date | None) -> pd.DataFrame:
+        calls.append(start)
+        return make_bars("2024-01-01", 5)
+
+    store.history("MSFT", fetch)
+    data = store.history("MSFT", fetch)
+    assert calls == [None]
+    assert len(data) == 5
+
+
+def test_sync_error_serves_stored(tmp_path: Path) -> None:
+    store = OHLCVStore(root=str(tmp_path), refresh_seconds=0)
+    store.history("NVDA", lambda _: make_bars("2024-01-01", 3))
+
+    def broken(_: date | None) -> pd.DataFrame:
+        raise ConnectionError("upstream down")
+
+    assert len(store.history("NVDA", broken)) == 3
+
+
+def test_adjusted_prices_backfill_again(tmp_path: Path) -> None:
+    store = OHLCVStore(root=str(tmp_path), refresh_seconds=0)
+    starts: list[date | None] = []
+    upstream = make_bars("2024-01-01", 10)
+
+    def fetch(start: date | None) -> pd.DataFrame:
+        starts.append(start)
+        if start is None:
+            return upstream
+        return upstream.loc[str(start) :]
+
+    store.history("KO", fetch)
+    # a dividend on a new bar re-adjusted every earlier price
+    upstream = make_bars("2024-01-01", 11, value=0.5)
+    upstream.iloc[-1, upstream.columns.get_loc("Dividends")] = 0.1
+    data = store.history("KO", fetch)
+    assert starts == [None, date(2024, 1, 10), None]
+    assert data["Close"].tolist() == [0.5] * 11
+
+    # the last bar refetched at another open, without an action row
+    upstream = make_bars("2024-01-01", 11, value=0.25)
+    assert store.history("KO", fetch)["Close"].tolist() == [0.25] * 11
+    assert starts[-2:] == [date(2024, 1, 11), None]
+
+    # unchanged, only the tail is refetched
+    store.history("KO", fetch)
+    assert starts[-1] == date(2024, 1, 11)
+
+
+def test_action_on_last_stored_bar_only_refetches_tail(tmp_path: Path) -> None:
+    store = OHLCVStore(root=str(tmp_path), refresh_seconds=0)
+    starts: list[date | None] = []
+    # the last stored bar is the ex-dividend day
+    upstream = make_bars("2024-01-01", 10)
+    upstream.iloc[-1, upstream.columns.get_loc("Dividends")] = 0.1
+
+    def fetch(start: date | None) -> pd.DataFrame:
+        starts.append(start)
+        if start is None:
+            return upstream
+        return upstream.loc[str(start) :]
+
+    for _ in range(3):
+        store.history("KO", fetch)
+    assert starts == [None, date(2024, 1, 10), date(2024, 1, 10)]
@@ -0,0 +1,181 @@
+import asyncio
+import threading
+from datetime import date, timedelta
+from typing import Any
+
+import orjson
+import pytest
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.db import async_engine, engine
+from app.core.executor import blocking_executor
+from app.models.relationships import Company
+from app.services.ranking import (
+    RankingBackend,
+    RedisRankingBackend,
+    SqlRankingBackend,
+    rank_cache,
+    ticker_rank,
+)
+from app.services.view import increment_daily_stat, increment_view
+from app.tasks import views
+from app.tasks.views import ViewCounterBuffer
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def add_views(db: Session, company: Company, views: int) -> None:
+    assert company.id is not None
+    increment_view(
+        session=db,
+        symbol=company.symbol,
+        path="/path",
+        company_id=company.id,
+        by=views,
+    )
+    increment_daily_stat(
+        session=db, symbol=company.symbol, company_id=company.id, by=views
+    )
+
+
+def test_redis_rank_and_trend() -> None:
+    backend = RedisRankingBackend(fakeredis.FakeRedis(), prefix="test")
+    today = date.today()
+    backend.record(
+        [
+            {"symbol": "AAA", "company_id": 1, "created_at": today, "count": 2},
+            {"symbol": "BBB", "company_id": 2, "created_at": today, "count": 1},
+            {
+                "symbol": "BBB",
+                "company_id": 2,
+                "created_at": today - timedelta(days=1),
+                "count": 2,
+            },
+            {
+                "symbol": "CCC",
+                "company_id": 3,
+                "created_at": today - timedelta(days=10),
+                "count": 9,
+            },
+        ]
+    )
+
+    assert backend.top(None, 2) == [("CCC", 9), ("BBB", 3)]  # type: ignore
+    trend = backend.trend(None, days=2, limit=5)  # type: ignore
+    assert [(t.symbol, t.count, t.company_id) for t in trend] == [
+        ("BBB", 3, 2),
+        ("AAA", 2, 1),
+    ]
+    assert backend.client.ttl("test:day:" + today.isoformat()) > 0
+
+
+def test_redis_reconcile_from_sql(db: Session, company: Company) -> None:
+    add_views(db, company, 3)
+    client = fakeredis.FakeRedis()
+    client.zadd("test:total", {company.symbol: 100, "GONE": 1})
+    backend = RedisRankingBackend(client, prefix="test")
+
+    backend.reconcile(db)
+
+    assert dict(backend.top(db, 50))[company.symbol] == 3
+    assert "GONE" not in dict(backend.top(db, 50))
+    trend = {t.symbol: t for t in backend.trend(db, days=1, limit=50)}
+    assert trend[company.symbol].count == 3
+    assert trend[company.symbol].company_id == company.id
+
+
+def test_sql_rank_and_trend(db: Session, company: Company) -> None:
+    add_views(db, company, 2)
+    backend = SqlRankingBackend()
+
+    assert (company.symbol, 2) in backend.top(db, 50)
+    trend = {t.symbol: t.count for t in backend.trend(db, days=1, limit=50)}
+    assert trend[company.symbol] == 2
+
+
+def test_ticker_rank_cached_until_flush(db: Session, company: Company) -> None:
+    rank_cache.clear()
+    add_views(db, company, 1000)
+    first = orjson.loads(ticker_rank(db, 1))
+    assert (first[0]["symbol"], first[0]["count"]) == (company.symbol, 1000)
+
+    add_views(db, company, 1)
+    assert orjson.loads(ticker_rank(db, 1))[0]["count"] == 1000
+
+    buffer = ViewCounterBuffer()
+    buffer.add(company.symbol, "/path", company_id=company.id)
+    buffer.flush(db)
+    assert orjson.loads(ticker_rank(db, 1))[0]["count"] == 1002
+
+
+def test_async_rank_and_trend_match_sync(db: Session, company: Company) -> None:
+    add_views(db, company, 5)
+    backend = SqlRankingBackend()
+
+    async def read() -> tuple[list[Any], list[Any], list[Any]]:
+        async with AsyncSession(async_engine) as session:
+            rank = await backend.rank_async(session, 50)
+            trend = await backend.trend_async(session, days=7, limit=50)
+            # the run_sync default of other backends
+            top = await RankingBackend.rank_async(backend, session, 50)
+        await async_engine.dispose()
+        return rank, trend, top
+
+    rank, trend, top = asyncio.run(read())
+    assert rank == backend.rank(db, 50)
+    assert trend == backend.trend(db, days=7, limit=50)
+    assert [r.symbol for r in top] == [r.symbol for r in rank]
+
+
+def test_redis_reconcile_waits_for_flush(
+    db: Session, company: Company, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    backend = RedisRankingBackend(fakeredis.FakeRedis(), prefix="test")
+    monkeypatch.setattr(views, "ranking_backend", backend)
+    reconciled = threading.Event()
+
+    def reconcile() -> None:
+        with Session(engine) as session:
+            backend.reconcile(session)
+        reconciled.set()
+
+    thread = threading.Thread(target=reconcile)
+    blocked: list[bool] = []
+    record = backend.record
+
+    def record_during_reconcile(rows: list[dict[str, Any]]) -> None:
+        # reading sql before the flush commits would drop its views
+        thread.start()
+        blocked.append(not reconciled.wait(0.2))
+        record(rows)
+
+    monkeypatch.setattr(backend, "record", record_during_reconcile)
+    buffer = ViewCounterBuffer()
+    for _ in range(4):
+        buffer.add(company.symbol, "/path", company_id=company.id)
+    buffer.flush(db)
+    thread.join(5)
+
+    assert blocked == [True]
+    assert reconciled.is_set()
+    assert dict(backend.top(db, 50))[company.symbol] == 4
+
+
+def test_redis_async_rank_and_trend_off_the_loop(db: Session, company: Company) -> None:
+    add_views(db, company, 3)
+    backend = RedisRankingBackend(fakeredis.FakeRedis(), prefix="test")
+    backend.reconcile(db)
+    calls = blocking_executor.calls
+
+    async def read() -> tuple[list[Any], list[Any]]:
+        async with AsyncSession(async_engine) as session:
+            rank = await backend.rank_async(session, 50)
+            trend = await backend.trend_async(session, days=1, limit=50)
+        await async_engine.dispose()
+        return rank, trend
+
+    rank, trend = asyncio.run(read())
+    assert rank == backend.rank(db, 50)
+    assert trend == backend.trend(db, days=1, limit=50)
+    assert blocking_executor.calls == calls + 2
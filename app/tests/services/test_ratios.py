@@ -0,0 +1,33 @@
+import numpy as np
+
+from app.services.ratios import RatioEngine, as_series, latest, safe_divide
+
+
+def test_safe_divide_masks() -> None:
+    result = safe_divide(np.array([1.0, 1.0, np.nan]), np.array([2.0, 0.0, 1.0]))
+    assert result[0] == 0.5
+    assert np.isnan(result[1:]).all()
+
+
+def test_profitability_every_period(ratio_engine: RatioEngine) -> None:
+    profit = ratio_engine.profitability()
+    np.testing.assert_allclose(profit["gross_margin"][:3], [0.4, 0.5, 0.4])
+    np.testing.assert_allclose(profit["profit_margin"][:3], [0.1, 0.1, 0.1])
+    np.testing.assert_allclose(profit["return_on_assets"][:3], [0.05, 0.05, 0.05])
+    # zero equity and missing line items are masked, not raised
+    assert np.isnan(profit["return_on_equity"][1])
+    assert np.isnan(profit["return_on_capital_employed"]).all()
+    assert np.isnan(profit["gross_margin"][3])
+
+
+def test_growth_lags(ratio_engine: RatioEngine) -> None:
+    growth = ratio_engine.growth()
+    assert latest(growth["rev_1y"]) == 50.0
+    assert latest(growth["eps_1y"]) == 50.0
+    # only 4 periods, 3y lag lands on the empty period
+    assert latest(growth["eps_3y_cagr"]) == 0.0
+
+
+def test_series_output(ratio_engine: RatioEngine) -> None:
+    growth = ratio_engine.growth_series()
+    assert as_series(growth["rev_growth"]) == [50.0, 50.0, None, None]
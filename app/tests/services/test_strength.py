@@ -0,0 +1,94 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any
+
+import pytest
+
+from app.models.strength import StrengthsPublic
+from app.services import strength
+
+
+def test_snapshot_refresh(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def fake_sector_strength(
+        ticker_list: list[str],  # noqa: ARG001
+        period: str,  # noqa: ARG001
+    ) -> tuple[dict[datetime, Any], dict[datetime, Any]]:
+        return {datetime(2024, 5, 1): {"b_mark": 1.0}}, {}
+
+    monkeypatch.setattr(strength, "sector_strength", fake_sector_strength)
+    snapshot = strength.StrengthSnapshot()
+
+    payload = asyncio.run(snapshot.get())
+    data = StrengthsPublic.model_validate_json(payload)
+
+    assert snapshot.as_of is not None
+    assert data.as_of == snapshot.as_of
+    assert asyncio.run(snapshot.get()) is payload
+
+
+def test_snapshot_concurrent_gets_compute_once(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    calls = 0
+
+    async def fake_sector_strength(
+        ticker_list: list[str],  # noqa: ARG001
+        period: str,  # noqa: ARG001
+    ) -> tuple[dict[datetime, Any], dict[datetime, Any]]:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {datetime(2024, 5, 1): {"b_mark": 1.0}}, {}
+
+    monkeypatch.setattr(strength, "sector_strength", fake_sector_strength)
+    snapshot = strength.StrengthSnapshot()
+
+    async def main() -> list[bytes]:
+        return await asyncio.gather(*(snapshot.get() for _ in range(5)))
+
+    payloads = asyncio.run(main())
+    assert calls == 1
+    assert all(payload is payloads[0] for payload in payloads)
+
+    # an explicit refresh always recomputes
+    asyncio.run(snapshot.refresh())
+    assert calls == 2
+
+
+def test_snapshot_expires_after_ttl(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = 0
+
+    async def fake_sector_strength(
+        ticker_list: list[str],  # noqa: ARG001
+        period: str,  # noqa: ARG001
+    ) -> tuple[dict[datetime, Any], dict[datetime, Any]]:
+        nonlocal calls
+        calls += 1
+        return {datetime(2024, 5, 1): {"b_mark": 1.0}}, {}
+
+    monkeypatch.setattr(strength, "sector_strength", fake_sector_strength)
+    snapshot = strength.StrengthSnapshot(ttl=60)
+
+    asyncio.run(snapshot.get())
+    asyncio.run(snapshot.get())
+    assert calls == 1
+
+    assert snapshot.as_of is not None
+    snapshot.as_of -= timedelta(seconds=61)
+    asyncio.run(snapshot.get())
+    assert calls == 2
+
+
+def test_next_refresh_time() -> None:
+    tz = strength.MARKET_TZ
+    # wednesday before and after the refresh time
+    assert strength.next_refresh_time(datetime(2024, 5, 1, 9, tzinfo=tz)) == (
+        datetime(2024, 5, 1, 16, 30, tzinfo=tz)
+    )
+    assert strength.next_refresh_time(datetime(2024, 5, 1, 17, tzinfo=tz)) == (
+        datetime(2024, 5, 2, 16, 30, tzinfo=tz)
+    )
+    # friday evening rolls over the weekend
+    assert strength.next_refresh_time(datetime(2024, 5, 3, 17, tzinfo=tz)) == (
+        datetime(2024, 5, 6, 16, 30, tzinfo=tz)
+    )
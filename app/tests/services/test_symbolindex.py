@@ -0,0 +1,104 @@
+import asyncio
+
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.db import async_engine
+from app.models.relationships import Company
+from app.models.stock import SymbolSearchList
+from app.services.stock import get_symbol_list, get_symbol_list_async
+from app.services.symbolindex import SymbolIndex, symbol_index_rows
+from app.services.view import increment_view
+
+
+def make_index() -> SymbolIndex:
+    index = SymbolIndex()
+    index.replace(
+        [
+            ("AAPL", "Apple Inc.", 50),
+            ("aal", "American Airlines Group Inc.", 5),
+            ("AA", "Alcoa Corporation", None),
+            ("MSFT", "Microsoft Corporation", 40),
+            ("AMZN", "Amazon.com, Inc.", 60),
+        ]
+    )
+    return index
+
+
+def test_symbol_prefix_ranked_by_views() -> None:
+    index = make_index()
+
+    assert index.loaded
+    assert [r.symbol for r in index.search("aa", 5)] == ["AAPL", "AAL", "AA"]
+    assert [r.symbol for r in index.search("AA", 2)] == ["AAPL", "AAL"]
+    assert index.search("aapl", 5)[0].company_name == "Apple Inc."
+
+
+def test_name_matches_follow_symbol_matches() -> None:
+    index = make_index()
+
+    index.add("GOOGL", "Alphabet Inc.", views=1000)
+
+    # the most viewed company matches by name only, after the symbols
+    assert [r.symbol for r in index.search("a", 5)] == [
+        "AMZN",
+        "AAPL",
+        "AAL",
+        "AA",
+        "GOOGL",
+    ]
+    assert [r.symbol for r in index.search("corp", 5)] == ["MSFT", "AA"]
+    assert [r.symbol for r in index.search("microsoftcorp", 5)] == []
+    assert [r.symbol for r in index.search("zzz", 5)] == []
+
+
+def test_add_and_views_invalidate_results() -> None:
+    index = make_index()
+    assert [r.symbol for r in index.search("ms", 5)] == ["MSFT"]
+
+    index.add("mstr", "MicroStrategy Incorporated")
+    assert [r.symbol for r in index.search("ms", 5)] == ["MSFT", "MSTR"]
+
+    index.add_views({"MSTR": 100})
+    results = index.search("ms", 5)
+    assert [(r.symbol, r.count) for r in results] == [("MSTR", 100), ("MSFT", 40)]
+
+
+def test_index_and_sql_search_agree(db: Session, company: Company) -> None:
+    assert company.id is not None
+    increment_view(
+        session=db,
+        symbol=company.symbol,
+        path="/path",
+        company_id=company.id,
+        by=3,
+    )
+    index = SymbolIndex()
+    index.replace(symbol_index_rows(db))
+
+    prefix = company.symbol[:6]
+    found = get_symbol_list(session=db, search=prefix.lower(), limit=5)
+    assert found is not None
+    assert [r.symbol for r in found.data] == [r.symbol for r in index.search(prefix, 5)]
+    assert (found.data[0].symbol, found.data[0].count) == (company.symbol, 3)
+
+    by_name = get_symbol_list(session=db, search=company.company_name, limit=5)
+    assert by_name is not None
+    assert [r.symbol for r in by_name.data] == [company.symbol]
+    assert [r.symbol for r in index.search(company.company_name[:10], 5)] == [
+        company.symbol
+    ]
+
+
+def test_async_sql_search(db: Session, company: Company) -> None:
+    async def search() -> SymbolSearchList | None:
+        async with AsyncSession(async_engine) as session:
+            found = await get_symbol_list_async(
+                session=session, search=company.symbol, limit=5
+            )
+        await async_engine.dispose()
+        return found
+
+    assert asyncio.run(search()) == get_symbol_list(
+        session=db, search=company.symbol, limit=5
+    )
@@ -0,0 +1,136 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from threading import Barrier
+
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.db import async_engine, engine
+from app.models.relationships import Company, View, ViewDailyStat, ViewTrendRollup
+from app.services.view import (
+    increment_daily_stat,
+    increment_daily_stat_async,
+    increment_view,
+    increment_view_async,
+    roll_trend_rollups,
+    trend_rollups_as_of,
+)
+
+WRITERS = 8
+VIEWS_PER_WRITER = 25
+
+
+def test_concurrent_increments_are_not_lost(db: Session, company: Company) -> None:
+    assert company.id is not None
+    company_id = company.id
+    symbol = company.symbol
+    # all writers start together so they race on the first insert too
+    barrier = Barrier(WRITERS)
+
+    def writer() -> list[int]:
+        counts = []
+        with Session(engine) as session:
+            barrier.wait()
+            for _ in range(VIEWS_PER_WRITER):
+                counts.append(
+                    increment_view(
+                        session=session,
+                        symbol=symbol,
+                        path=f"/api/v1/stocks/symbol/{symbol}",
+                        company_id=company_id,
+                    )
+                )
+                increment_daily_stat(
+                    session=session, symbol=symbol, company_id=company_id
+                )
+        return counts
+
+    with ThreadPoolExecutor(max_workers=WRITERS) as pool:
+        results = list(pool.map(lambda _: writer(), range(WRITERS)))
+
+    total = WRITERS * VIEWS_PER_WRITER
+    returned = sorted(count for counts in results for count in counts)
+    assert returned == list(range(1, total + 1))
+    view = db.exec(select(View).where(View.company_id == company_id)).one()
+    assert view.count == total
+    stat = db.exec(
+        select(ViewDailyStat).where(
+            ViewDailyStat.company_id == company_id,
+            ViewDailyStat.created_at == date.today(),
+        )
+    ).one()
+    assert stat.count == total
+    assert rollups(db, company)[1] == total
+
+
+def rollups(db: Session, company: Company) -> dict[int, int]:
+    statement = select(ViewTrendRollup).where(ViewTrendRollup.company_id == company.id)
+    return {rollup.window_days: rollup.count for rollup in db.exec(statement)}
+
+
+def test_trend_rollups_follow_daily_stats(db: Session, company: Company) -> None:
+    assert company.id is not None
+    today = date.today()
+    for days_ago, views in [(0, 1), (1, 2), (10, 4), (89, 8), (90, 16)]:
+        increment_daily_stat(
+            session=db,
+            symbol=company.symbol,
+            company_id=company.id,
+            day=today - timedelta(days=days_ago),
+            by=views,
+        )
+
+    windows = rollups(db, company)
+    assert len(windows) == 90
+    assert (windows[1], windows[2], windows[10], windows[11]) == (1, 3, 3, 7)
+    assert (windows[89], windows[90]) == (7, 15)
+
+    # the first roll of the next day rebuilds, today drops out of window 1
+    tomorrow = today + timedelta(days=1)
+    assert roll_trend_rollups(session=db, today=tomorrow)
+    db.commit()
+    assert not roll_trend_rollups(session=db, today=tomorrow)
+    windows = rollups(db, company)
+    assert 1 not in windows
+    assert (windows[2], windows[90]) == (1, 7)
+
+    # views before a roll are added without moving the windows
+    increment_daily_stat(
+        session=db, symbol=company.symbol, company_id=company.id, by=32
+    )
+    assert trend_rollups_as_of(session=db) == tomorrow
+    assert rollups(db, company)[2] == 33
+
+    assert roll_trend_rollups(session=db)
+    db.commit()
+    windows = rollups(db, company)
+    assert (windows[1], windows[90]) == (33, 47)
+
+
+def test_async_increments(db: Session, company: Company) -> None:
+    assert company.id is not None
+    company_id = company.id
+    symbol = company.symbol
+
+    async def increment() -> tuple[int, int]:
+        async with AsyncSession(async_engine) as session:
+            view = await increment_view_async(
+                session=session,
+                symbol=symbol,
+                path="/path",
+                company_id=company_id,
+                by=2,
+            )
+            stat = await increment_daily_stat_async(
+                session=session, symbol=symbol, company_id=company_id, by=2
+            )
+        await async_engine.dispose()
+        return view, stat
+
+    assert asyncio.run(increment()) == (2, 2)
+    assert (
+        increment_view(session=db, symbol=symbol, path="/path", company_id=company_id)
+        == 3
+    )
+    assert rollups(db, company)[1] == 2
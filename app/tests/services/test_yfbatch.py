@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+import yfinance as yf  # type: ignore
+from fastapi import HTTPException
+
+from app.services.ratios import RatioEngine
+from app.services.yfbatch import YFinBatchFetch, parse_symbols, stack_periods
+
+
+def test_parse_symbols() -> None:
+    valid, errors = parse_symbols("aapl, MSFT,AAPL,,brk.b")
+    assert valid == ["AAPL", "MSFT"]
+    assert errors == {"BRK.B": "invalid symbol"}
+
+
+def test_parse_symbols_too_many() -> None:
+    with pytest.raises(HTTPException):
+        parse_symbols(
+            ",".join(f"A{chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(31))
+        )
+
+
+def test_stack_periods_pads() -> None:
+    stacked = stack_periods([np.ones((2, 3)), np.ones((2, 1))])
+    assert stacked.shape == (2, 2, 3)
+    assert np.isnan(stacked[:, 1, 1:]).all()
+
+
+def test_batch_partial_results(
+    monkeypatch: pytest.MonkeyPatch, ratio_engine: RatioEngine
+) -> None:
+
+    def fake_engines(self: YFinBatchFetch) -> dict[str, object]:
+        self.errors["BAD"] = "empty income_stmt for BAD"
+        return {"AAA": ratio_engine, "BBB": ratio_engine}
+
+    def fake_prices(
+        self: YFinBatchFetch,  # noqa: ARG001
+        symbols: list[str],
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+        index = pd.date_range(end="2024-05-01", periods=3 * 365 + 1, freq="D")
+        opens = pd.DataFrame(1.0, index=index, columns=symbols)
+        closes = pd.DataFrame(1.0, index=index, columns=symbols)
+        closes.iloc[-1] = [1.331, np.nan]
+        return opens, closes
+
+    monkeypatch.setattr(YFinBatchFetch, "_fetch_engines", fake_engines)
+    monkeypatch.setattr(YFinBatchFetch, "_fetch_prices", fake_prices)
+    result = YFinBatchFetch(["AAA", "BBB", "BAD"]).get_key_stats()
+
+    assert set(result.data) == {"AAA", "BBB"}
+    assert result.errors == {"BAD": "empty income_stmt for BAD"}
+    assert result.data["AAA"].profit.gross_margin == 40.0
+    assert result.data["AAA"].growth.rps_3y_cagr == 10.0
+    assert result.data["BBB"].growth.rps_3y_cagr == 0.0
+
+
+def test_batch_price_failures_are_reported(
+    monkeypatch: pytest.MonkeyPatch, ratio_engine: RatioEngine
+) -> None:
+    def fake_engines(self: YFinBatchFetch) -> dict[str, object]:  # noqa: ARG001
+        return {"AAA": ratio_engine, "BBB": ratio_engine}
+
+    def failed_download(*args: object, **kwargs: object) -> pd.DataFrame:  # noqa: ARG001
+        raise ConnectionError("rate limited")
+
+    monkeypatch.setattr(YFinBatchFetch, "_fetch_engines", fake_engines)
+    monkeypatch.setattr(yf, "download", failed_download)
+    result = YFinBatchFetch(["AAA", "BBB"]).get_key_stats()
+
+    assert result.data == {}
+    assert result.errors == {
+        "AAA": "price download failed: rate limited",
+        "BBB": "price download failed: rate limited",
+    }
+
+    def partial_download(symbols: list[str], **kwargs: object) -> pd.DataFrame:  # noqa: ARG001
+        index = pd.date_range(end="2024-05-01", periods=3 * 365 + 1, freq="D")
+        columns = pd.MultiIndex.from_product([["Open", "Close"], symbols])
+        data = pd.DataFrame(1.0, index=index, columns=columns)
+        data.loc[:, (slice(None), "BBB")] = np.nan
+        return data
+
+    monkeypatch.setattr(yf, "download", partial_download)
+    result = YFinBatchFetch(["AAA", "BBB"]).get_key_stats()
+
+    assert set(result.data) == {"AAA"}
+    assert result.errors == {"BBB": "no price history for BBB"}
@@ -0,0 +1,75 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from app.benchmarks.history_serialization import (
+    list_path,
+    numpy_path,
+    synthetic_history,
+)
+from app.models.common import HistoryPeriod
+from app.services.yfdata import iso_dates, period_starts
+
+
+def make_history(days: int = 3650) -> pd.DataFrame:
+    index = pd.date_range(
+        end="2024-05-01", periods=days, freq="D", tz="America/New_York"
+    )
+    values = np.arange(1, days + 1, dtype=float)
+    return pd.DataFrame(
+        {"Open": values, "Close": values, "High": values, "Low": values},
+        index=index,
+    )
+
+
+def test_period_starts_max_and_intraday_cover_all() -> None:
+    hist = make_history()
+    periods = [HistoryPeriod.MAX, HistoryPeriod.ONE_DAY]
+    assert period_starts(hist.index, periods) == [0, 0]
+
+
+def test_period_starts_trailing_days() -> None:
+    hist = make_history()
+    (start,) = period_starts(hist.index, [HistoryPeriod.ONE_YEAR])
+    assert hist.index[start] == hist.index[-1] - pd.Timedelta(days=365)
+
+
+def test_period_starts_ytd() -> None:
+    hist = make_history()
+    (start,) = period_starts(hist.index, [HistoryPeriod.YEAR_TO_DAY])
+    assert hist.index[start] == pd.Timestamp("2024-01-01", tz="America/New_York")
+    # january 1st 2027 is in week 53 of 2026, ytd is that one day
+    index = pd.date_range(end="2027-01-01", periods=30, tz="America/New_York")
+    assert period_starts(index, [HistoryPeriod.YEAR_TO_DAY]) == [29]
+
+
+def test_iso_dates_matches_pydantic() -> None:
+    index = pd.date_range("2024-03-09", periods=3, tz="America/New_York")
+    assert iso_dates(index) == [
+        "2024-03-09T00:00:00-05:00",
+        "2024-03-10T00:00:00-05:00",
+        "2024-03-11T00:00:00-04:00",
+    ]
+    assert iso_dates(pd.date_range("2024-03-09", periods=1, tz="UTC")) == [
+        "2024-03-09T00:00:00Z"
+    ]
+    assert iso_dates(pd.date_range("2024-03-09", periods=1)) == ["2024-03-09T00:00:00"]
+
+
+def test_numpy_path_matches_list_path() -> None:
+    hist = synthetic_history(600)
+    hist.iloc[3, 0] = np.nan
+    legacy = json.loads(list_path(hist).decode().replace("NaN", "null"))
+    assert json.loads(numpy_path(hist)) == legacy
+
+
+def test_period_starts_match_label_slicing() -> None:
+    hist = make_history()
+    periods = [HistoryPeriod.ONE_MONTH, HistoryPeriod.FIVE_YEAR, HistoryPeriod.MAX]
+    starts = period_starts(hist.index, periods)
+    latest = hist.index[-1]
+    assert starts[0] == len(hist) - len(hist.loc[latest - np.timedelta64(30, "D") :])
+    assert starts[1] == len(hist) - len(hist.loc[latest - np.timedelta64(1825, "D") :])
+    assert starts[2] == 0
+    assert period_starts(hist.index[:0], periods) == [0, 0, 0]
@@ -0,0 +1,40 @@
+import os
+from pathlib import Path
+
+import pytest
+from pyrate_limiter import BucketFullException
+
+from app.core.config import settings
+from app.services.yfsession import YFSessionManager
+
+
+def test_session_is_shared() -> None:
+    manager = YFSessionManager()
+    session = manager.session
+    assert manager.session is session
+    manager.close()
+    assert manager.session is not session
+    manager.close()
+
+
+def test_stats_before_first_use() -> None:
+    manager = YFSessionManager()
+    stats = manager.stats()
+    assert stats.pid == os.getpid()
+    assert stats.requests == 0
+    assert stats.queue_depth == 0
+
+
+def test_rate_limit_shared_between_workers(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, "YF_LIMITER_PATH", str(tmp_path / "yf.limiter"))
+    monkeypatch.setattr(settings, "YF_RATE_LIMIT_REQUESTS", 2)
+    # two managers stand in for two worker processes
+    first, second = YFSessionManager(), YFSessionManager()
+    first.session.limiter.try_acquire("yfinance")
+    second.session.limiter.try_acquire("yfinance")
+    with pytest.raises(BucketFullException):
+        first.session.limiter.try_acquire("yfinance")
+    first.close()
+    second.close()
@@ -0,0 +1,82 @@
+import json
+from collections.abc import Generator
+from pathlib import Path
+from typing import Any
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session, col, select
+
+from app.core.db import engine
+from app.models.relationships import AddressProfile, Company
+from app.services.address import dimension_ids
+from app.services.company import company_cache, load_company_profile
+from app.tasks.company import save_company_profile
+from app.tests.utils.company import delete_profiles
+
+FIXTURE = Path(__file__).parents[1] / "fixtures" / "fmp_profiles.json"
+SYMBOLS = ["QXNEWA", "QXNEWB"]
+
+
+@pytest.fixture
+def profiles(db: Session) -> Generator[list[dict[str, Any]], None, None]:
+    items = json.loads(FIXTURE.read_text())
+    # the same country, state, city and address, spelled differently
+    yield [{**items[0], "symbol": SYMBOLS[0]}, {**items[1], "symbol": SYMBOLS[1]}]
+    delete_profiles(db, SYMBOLS, "ZQ")
+
+
+@pytest.fixture
+def executed() -> Generator[list[str], None, None]:
+    statements: list[str] = []
+
+    def record(*args: Any) -> None:
+        statements.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_profile_written_in_one_transaction(
+    db: Session, profiles: list[dict[str, Any]], executed: list[str]
+) -> None:
+    dimension_ids.clear()
+
+    first = save_company_profile(session=db, profile_in=profiles[0])
+    # country, state, city, address, company and address profile
+    assert len(executed) == 6
+    executed.clear()
+
+    second = save_company_profile(session=db, profile_in=profiles[1])
+    # country, state and city ids come from the cache
+    assert len(executed) == 3
+    assert save_company_profile(session=db, profile_in=profiles[0]) == first
+
+    address_ids = db.exec(
+        select(AddressProfile.address_id).where(
+            col(AddressProfile.profile_id).in_([first, second])
+        )
+    ).all()
+    assert len(address_ids) == 2
+    assert len(set(address_ids)) == 1
+    company = db.get(Company, second)
+    assert company is not None
+    assert (company.symbol, company.ipo_date) == (SYMBOLS[1], None)
+
+    assert load_company_profile(session=db, symbol=SYMBOLS[0].lower()) is not None
+    save_company_profile(session=db, profile_in=profiles[0])
+    assert company_cache.get(SYMBOLS[0]) is None
+
+
+def test_failed_profile_is_rolled_back(
+    db: Session, profiles: list[dict[str, Any]]
+) -> None:
+    dimension_ids.clear()
+    broken = {**profiles[0], "ipoDate": "not a date"}
+
+    with pytest.raises(ValueError):
+        save_company_profile(session=db, profile_in=broken)
+
+    assert len(dimension_ids) == 0
+    assert db.exec(select(Company).where(Company.symbol == SYMBOLS[0])).first() is None
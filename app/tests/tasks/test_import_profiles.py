@@ -0,0 +1,69 @@
+import csv
+import json
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from sqlmodel import Session, col, select
+
+from app.models.relationships import AddressProfile, Company
+from app.tasks.import_profiles import import_profiles, read_profiles
+from app.tests.utils.company import delete_profiles
+
+FIXTURE = Path(__file__).parents[1] / "fixtures" / "fmp_profiles.json"
+SYMBOLS = ["QXIMPA", "QXIMPB", "QXIMPC", "QXIMPD"]
+
+
+@pytest.fixture
+def imported(db: Session) -> Generator[None, None, None]:
+    yield
+    delete_profiles(db, SYMBOLS, "ZQ")
+
+
+def test_import_fixture(db: Session, imported: None) -> None:  # noqa: ARG001
+    stats = import_profiles(db, read_profiles(str(FIXTURE)), batch_size=2)
+
+    assert (stats.profiles, stats.companies, stats.skipped) == (5, 4, 1)
+    assert stats.created == {
+        "countries": 1,
+        "states": 2,
+        "cities": 2,
+        "addresses": 2,
+        "address profiles": 3,
+    }
+    assert stats.rows_per_second > 0
+    companies = {
+        company.symbol: company
+        for company in db.exec(select(Company).where(col(Company.symbol).in_(SYMBOLS)))
+    }
+    assert sorted(companies) == SYMBOLS
+    # the last duplicate wins
+    assert companies["QXIMPA"].description == "Alpha fixture company, listed twice."
+    assert companies["QXIMPB"].ipo_date is None
+    assert companies["QXIMPD"].country_id is None
+    # same address spelled differently
+    address_ids = db.exec(
+        select(AddressProfile.address_id).where(
+            col(AddressProfile.profile_id).in_(
+                [companies["QXIMPA"].id, companies["QXIMPB"].id]
+            )
+        )
+    ).all()
+    assert len(set(address_ids)) == 1
+
+    again = import_profiles(db, read_profiles(str(FIXTURE)))
+    assert (again.companies, again.skipped) == (0, 5)
+    assert sum(again.created.values()) == 0
+
+
+def test_read_csv(tmp_path: Path) -> None:
+    profiles = json.loads(FIXTURE.read_text())
+    path = tmp_path / "profiles.csv"
+    with path.open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(profiles[0]))
+        writer.writeheader()
+        writer.writerows(profiles)
+
+    rows = read_profiles(str(path))
+    assert [row["symbol"] for row in rows] == [p["symbol"] for p in profiles]
+    assert rows[1]["defaultImage"] == "True"
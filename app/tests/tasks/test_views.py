@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlmodel import Session, select
+
+from app.models.relationships import Company, View, ViewDailyStat
+from app.tasks import views
+from app.tasks.views import ViewCounterBuffer
+from app.tests.utils.company import random_symbol
+
+
+def daily_counts(db: Session, company: Company) -> dict[date, int]:
+    statement = select(ViewDailyStat).where(ViewDailyStat.company_id == company.id)
+    return {stat.created_at: stat.count for stat in db.exec(statement)}
+
+
+def test_flush_aggregates_views(db: Session, company: Company) -> None:
+    buffer = ViewCounterBuffer()
+    today = date.today()
+    yesterday = today - timedelta(days=1)
+    path = f"/api/v1/stocks/symbol/{company.symbol}"
+    for _ in range(3):
+        buffer.add(company.symbol.lower(), path)
+    buffer.add(company.symbol, path, day=yesterday)
+    buffer.add(company.symbol, path, company_id=company.id, day=yesterday)
+    buffer.add(random_symbol(), "/unknown")
+
+    assert buffer.flush(db) == 5
+    assert buffer.pending() == 0
+    view = db.exec(select(View).where(View.company_id == company.id)).one()
+    assert (view.symbol, view.path, view.count) == (company.symbol, path, 5)
+    assert daily_counts(db, company) == {today: 3, yesterday: 2}
+
+    buffer.add(company.symbol, path)
+    assert buffer.flush(db) == 1
+    db.refresh(view)
+    assert view.count == 6
+    assert daily_counts(db, company) == {today: 4, yesterday: 2}
+
+
+def test_failed_flush_keeps_views(
+    db: Session, company: Company, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    buffer = ViewCounterBuffer()
+    buffer.add(company.symbol, "/path")
+
+    def broken(**_: object) -> None:
+        raise RuntimeError("database is gone")
+
+    monkeypatch.setattr(views, "upsert_daily_stats", broken)
+    with pytest.raises(RuntimeError):
+        buffer.flush(db)
+    assert buffer.pending() == 1
+
+    monkeypatch.undo()
+    assert buffer.flush(db) == 1
@@ -0,0 +1,45 @@
+import random
+import string
+
+from sqlmodel import Session, col, delete, select
+
+from app.models.relationships import (
+    Address,
+    AddressProfile,
+    City,
+    Company,
+    Country,
+    State,
+)
+from app.services.address import dimension_ids
+from app.tests.utils.utils import random_lower_string
+
+
+def random_symbol() -> str:
+    return "".join(random.choices(string.ascii_uppercase, k=8))
+
+
+def create_random_company(db: Session) -> Company:
+    company = Company(symbol=random_symbol(), company_name=random_lower_string())
+    db.add(company)
+    db.commit()
+    db.refresh(company)
+    return company
+
+
+def delete_profiles(db: Session, symbols: list[str], country: str) -> None:
+    """delete companies and every address row under a test country"""
+    company_ids = select(Company.id).where(col(Company.symbol).in_(symbols))
+    country_ids = select(Country.id).where(Country.abbrev_2 == country)
+    state_ids = select(State.id).where(col(State.country_id).in_(country_ids))
+    city_ids = select(City.id).where(col(City.state_id).in_(state_ids))
+    db.execute(
+        delete(AddressProfile).where(col(AddressProfile.profile_id).in_(company_ids))
+    )
+    db.execute(delete(Company).where(col(Company.symbol).in_(symbols)))
+    db.execute(delete(Address).where(col(Address.city_id).in_(city_ids)))
+    db.execute(delete(City).where(col(City.state_id).in_(state_ids)))
+    db.execute(delete(State).where(col(State.country_id).in_(country_ids)))
+    db.execute(delete(Country).where(Country.abbrev_2 == country))
+    db.commit()
+    dimension_ids.clear()